@@ -1,4 +1,6 @@
 from django.contrib import admin
+
+from apps.jobs.admin import queue_admin_job
 from .models import Account
 
 
@@ -70,8 +72,13 @@ class AccountAdmin(BaseStampedAdmin):
         ),
     )
 
-    # expose computed total as readonly in form
-    readonly_fields = BaseStampedAdmin.readonly_fields + ("total_balance",)
+    # Balances are ledger snapshots: they move through transactions and
+    # rollup_ledger (or the reset actions), never by hand
+    readonly_fields = BaseStampedAdmin.readonly_fields + (
+        "checking_balance",
+        "savings_balance",
+        "total_balance",
+    )
 
     actions = ("reset_checking_balance", "reset_savings_balance")
 
@@ -83,20 +90,27 @@ class AccountAdmin(BaseStampedAdmin):
             print(f"[ADMIN][Account] total_balance error: {exc}")
             return 0
 
-    # quick utilities with debug prints
+    # quick utilities, run by `manage.py run_admin_jobs`
     def reset_checking_balance(self, request, queryset):
-        updated = queryset.update(checking_balance=0)
-        print(
-            f"[ADMIN][Account] Reset checking_balance to 0 for {updated} record(s) by {request.user}"
+        queue_admin_job(
+            self,
+            request,
+            "accounts.reset_balance",
+            queryset,
+            label="Reset checking balance to 0",
+            params={"field": "checking_balance"},
         )
 
     reset_checking_balance.short_description = "Reset checking balance to 0"
 
     def reset_savings_balance(self, request, queryset):
-        updated = queryset.update(savings_balance=0)
-        print(
-            f"[ADMIN][Account] Reset savings_balance to 0 for {updated} record(s) by {request.user}"
+        queue_admin_job(
+            self,
+            request,
+            "accounts.reset_balance",
+            queryset,
+            label="Reset savings balance to 0",
+            params={"field": "savings_balance"},
         )
 
     reset_savings_balance.short_description = "Reset savings balance to 0"
-
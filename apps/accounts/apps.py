@@ -7,3 +7,4 @@ class AccountsConfig(AppConfig):
 
     def ready(self):
         import apps.accounts.signals
+        import apps.accounts.service.job_handlers
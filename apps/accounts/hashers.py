@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, get_hasher
+
+
+class PinPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 with a configurable, lower iteration count for account PINs.
+
+    A 4–6 digit PIN has at most 10^6 values, so no iteration count makes
+    an offline attack expensive; online guessing is stopped by the lockout
+    counters on Account. Iterations therefore only need to stay above
+    trivial, and PIN checks stay short.
+    """
+
+    algorithm = "pin_pbkdf2_sha256"
+
+    @property
+    def iterations(self):
+        return settings.ACCOUNT_PIN_HASH_ITERATIONS
+
+
+def pin_hasher():
+    """The PIN hasher, or the default one if it is not in PASSWORD_HASHERS."""
+    try:
+        return get_hasher(settings.ACCOUNT_PIN_HASHER)
+    except ValueError:
+        return get_hasher("default")
+
+
+def hash_pin(raw_pin: str) -> str:
+    hasher = pin_hasher()
+    return hasher.encode(raw_pin, hasher.salt())
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.accounts.service.account_number_service import replenish
+
+
+class Command(BaseCommand):
+    help = "Top up the pool of free, Luhn-checked account numbers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=settings.ACCOUNT_NUMBER_POOL_SIZE,
+            help="Free numbers to keep in the pool.",
+        )
+
+    def handle(self, *args, **options):
+        added = replenish(options["size"])
+        self.stdout.write(f"[AccountNumber] Added {added} number(s)")
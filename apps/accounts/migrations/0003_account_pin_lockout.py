@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-17 20:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_alter_account_created_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="account",
+            name="failed_pin_attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="account",
+            name="pin_locked_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
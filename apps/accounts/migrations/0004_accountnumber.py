@@ -0,0 +1,56 @@
+# Generated by Django 5.0 on 2026-10-17 20:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_account_pin_lockout"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccountNumber",
+            fields=[
+                (
+                    "number",
+                    models.CharField(max_length=25, primary_key=True, serialize=False),
+                ),
+                (
+                    "account_type",
+                    models.CharField(
+                        blank=True,
+                        choices=[("savings", "Savings"), ("checking", "Checking")],
+                        max_length=10,
+                        null=True,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("assigned_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="numbers",
+                        to="accounts.account",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Account Number",
+                "verbose_name_plural": "Account Numbers",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("account__isnull", True)),
+                        fields=["created_at"],
+                        name="accountnumber_free_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+from django.utils import timezone
+
+BATCH_SIZE = 2000
+
+
+def backfill(apps, schema_editor):
+    Account = apps.get_model("accounts", "Account")
+    AccountNumber = apps.get_model("accounts", "AccountNumber")
+
+    now = timezone.now()
+    rows = []
+    accounts = Account.objects.only(
+        "id", "checking_acc_number", "savings_acc_number"
+    ).iterator(chunk_size=BATCH_SIZE)
+    for account in accounts:
+        for account_type, number in (
+            ("checking", account.checking_acc_number),
+            ("savings", account.savings_acc_number),
+        ):
+            if number:
+                rows.append(
+                    AccountNumber(
+                        number=number,
+                        account_id=account.id,
+                        account_type=account_type,
+                        assigned_at=now,
+                    )
+                )
+        if len(rows) >= BATCH_SIZE:
+            AccountNumber.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    if rows:
+        AccountNumber.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_accountnumber"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,20 +1,23 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.hashers import (
-    make_password,
     check_password,
     identify_hasher,
 )
 
+from apps.accounts.hashers import hash_pin
+
 from cortanae.generic_utils.models_utils import (
     ActiveInactiveModelMixin,
     BaseModelMixin,
+    TrackedFieldsMixin,
 )
 from apps.users.models import User
 
 # Create your models here.
 
 
-class Account(BaseModelMixin, ActiveInactiveModelMixin):
+class Account(TrackedFieldsMixin, BaseModelMixin, ActiveInactiveModelMixin):
     """model for storing account information
     handles both internal accounts and external accounts
     """
@@ -23,6 +26,15 @@ class Account(BaseModelMixin, ActiveInactiveModelMixin):
         ("savings", "Savings"),
         ("checking", "Checking"),
     ]
+    tracked_fields = (
+        "account_name",
+        "checking_acc_number",
+        "savings_acc_number",
+        "checking_balance",
+        "savings_balance",
+        "account_pin",
+        "is_active",
+    )
     user = models.OneToOneField(
         User,
         null=True,
@@ -47,6 +59,9 @@ class Account(BaseModelMixin, ActiveInactiveModelMixin):
         max_length=255, default="Cortanae Capital Bank"
     )
     account_pin = models.CharField(max_length=255)
+    # PIN lockout (see apps.accounts.service.pin_service)
+    failed_pin_attempts = models.PositiveSmallIntegerField(default=0)
+    pin_locked_until = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.account_name} - {self.checking_acc_number} / {self.savings_acc_number}"
@@ -58,7 +73,7 @@ class Account(BaseModelMixin, ActiveInactiveModelMixin):
                 identify_hasher(self.account_pin)
             except Exception:
                 # account_pin is raw → hash it
-                self.account_pin = make_password(self.account_pin)
+                self.account_pin = hash_pin(self.account_pin)
 
         super().save(*args, **kwargs)
 
@@ -70,3 +85,44 @@ class Account(BaseModelMixin, ActiveInactiveModelMixin):
             return False
         print(f"[PIN] Verify • account={self.pk} •")
         return True
+
+
+class AccountNumber(models.Model):
+    """
+    Lookup table: account number -> (account, account type).
+
+    Unassigned rows (account is null) are the pool the allocator hands
+    out; every checking/savings number in use has an assigned row, so a
+    beneficiary lookup is one primary-key probe.
+    """
+
+    ACCOUNT_TYPE = Account.ACCOUNT_TYPE
+
+    number = models.CharField(max_length=25, primary_key=True)
+    account = models.ForeignKey(
+        Account,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="numbers",
+    )
+    account_type = models.CharField(
+        choices=ACCOUNT_TYPE, max_length=10, null=True, blank=True
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    assigned_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Account Number"
+        verbose_name_plural = "Account Numbers"
+        indexes = [
+            # The free pool, so claiming never scans assigned numbers
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(account__isnull=True),
+                name="accountnumber_free_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.number} • {self.account_type or 'free'}"
@@ -3,11 +3,28 @@ from django.forms import ValidationError
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer, Serializer
 from .models import Account
+from .service.pin_service import PinLockedError, verify_account_pin
+from apps.transactions.service.ledger_service import BALANCE_FIELDS, account_balances
 import random
 
 
+def check_pin_or_raise(account, raw_pin, message="Incorrect pin"):
+    """Verify a PIN (outside any row lock) or raise a DRF ValidationError."""
+    try:
+        ok = verify_account_pin(account, raw_pin)
+    except PinLockedError as e:
+        raise serializers.ValidationError(
+            {
+                "detail": "Too many incorrect PIN attempts. "
+                f"Try again after {e.locked_until:%Y-%m-%d %H:%M} UTC."
+            }
+        )
+    if not ok:
+        raise serializers.ValidationError({"detail": message})
+
+
 class AccountPinChangeSerializer(ModelSerializer):
-    account_pin = serializers.CharField(required=True)
+    account_pin = serializers.CharField(required=True, write_only=True)
     new_account_pin = serializers.CharField(required=True, write_only=True)
 
     class Meta:
@@ -15,18 +32,17 @@ class AccountPinChangeSerializer(ModelSerializer):
         fields = ["account_pin", "new_account_pin"]
 
     def validate_account_pin(self, value):
-        user = self.context["request"].user.user_accounts
-        if not user.check_account_pin(value):
-            raise ValidationError({"detail": "Incorrect pin"})
+        check_pin_or_raise(self.context["request"].user.user_accounts, value)
         return value
 
-    def validate_new_account_pin(self, value):
-        user_account = self.context["request"].user.user_accounts
-        if user_account.check_account_pin(value):
+    def validate(self, attrs):
+        # The old PIN was verified above, so a plain comparison is enough;
+        # no second hash of the new PIN.
+        if attrs.get("new_account_pin") == attrs.get("account_pin"):
             raise ValidationError(
                 {"detail": "Old account pin is the same as new pin"}
             )
-        return value
+        return attrs
 
     def update(self, instance, validated_data):
         new_pin = validated_data.pop("new_account_pin")
@@ -48,6 +64,8 @@ class AccountCreateSerializer(ModelSerializer):
 
 
 class AccountSerializer(serializers.ModelSerializer):
+    """Balances are the available ones: snapshot plus legs not rolled up yet."""
+
     class Meta:
         model = Account  # import from your app's models
         fields = (
@@ -59,3 +77,11 @@ class AccountSerializer(serializers.ModelSerializer):
             "checking_acc_number",
             "savings_acc_number",
         )
+        read_only_fields = ("checking_balance", "savings_balance")
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for account_type, balance in account_balances(instance).items():
+            field = BALANCE_FIELDS[account_type]
+            data[field] = self.fields[field].to_representation(balance)
+        return data
@@ -0,0 +1,50 @@
+from django.db import transaction
+
+from apps.accounts.models import Account
+
+
+def lock_accounts(*account_ids, **filters) -> dict:
+    """
+    Lock every given Account row with a single
+    `SELECT ... FOR UPDATE ... ORDER BY id` and return them keyed by pk.
+
+    All balance-changing flows must take their account locks through this
+    helper: rows are always locked in primary-key order, so two flows that
+    touch the same accounts in opposite directions (A→B and B→A) queue up
+    instead of deadlocking. Must be called inside `transaction.atomic()`.
+
+    On Postgres the lock is `FOR NO KEY UPDATE`: a plain `FOR UPDATE`
+    conflicts with the `FOR KEY SHARE` lock every insert referencing the
+    account (Transaction, LedgerEntry) takes, which re-introduces the A→B /
+    B→A deadlock through the foreign keys.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        raise RuntimeError("lock_accounts() must run inside transaction.atomic()")
+
+    to_pk = Account._meta.pk.to_python
+    ids = {to_pk(account_id) for account_id in account_ids if account_id is not None}
+    if not ids:
+        return {}
+
+    accounts = {
+        account.pk: account
+        for account in Account.objects.select_for_update(
+            no_key=connection.features.has_select_for_no_key_update
+        )
+        .filter(pk__in=ids, **filters)
+        .order_by("pk")
+    }
+    missing = ids - set(accounts)
+    if missing:
+        raise Account.DoesNotExist(
+            f"Account(s) not found: {', '.join(str(pk) for pk in missing)}"
+        )
+    return accounts
+
+
+def lock_account(account_id, **filters) -> Account:
+    """Single-row convenience wrapper around lock_accounts()."""
+    return lock_accounts(account_id, **filters)[
+        Account._meta.pk.to_python(account_id)
+    ]
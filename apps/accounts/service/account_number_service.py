@@ -0,0 +1,152 @@
+"""
+Account numbers: 11 digits, the last one a Luhn check digit.
+
+Numbers are pre-generated into AccountNumber (the pool) and claimed with
+SELECT ... FOR UPDATE SKIP LOCKED, so registration never probes for
+collisions and concurrent registrations never wait on each other.
+"""
+import secrets
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.accounts.models import Account, AccountNumber
+
+NUMBER_LENGTH = 11
+NUMBER_FIELDS = {
+    "checking": "checking_acc_number",
+    "savings": "savings_acc_number",
+}
+
+
+class AccountNumberPoolExhausted(Exception):
+    pass
+
+
+def luhn_check_digit(payload: str) -> str:
+    total = 0
+    # Double every second digit counting from the right of the payload
+    for i, ch in enumerate(reversed(payload)):
+        d = int(ch)
+        if i % 2 == 0:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return str((10 - total % 10) % 10)
+
+
+def is_valid_number(number: str) -> bool:
+    return (
+        len(number) == NUMBER_LENGTH
+        and number.isdigit()
+        and luhn_check_digit(number[:-1]) == number[-1]
+    )
+
+
+def _candidate() -> str:
+    payload = str(secrets.randbelow(9) + 1) + "".join(
+        str(secrets.randbelow(10)) for _ in range(NUMBER_LENGTH - 2)
+    )
+    return payload + luhn_check_digit(payload)
+
+
+def replenish(size: int | None = None) -> int:
+    """
+    Top the free pool up to `size` numbers. Collisions with numbers
+    already in the table are dropped by the primary key, not probed for.
+    Returns how many numbers were added.
+    """
+    size = size or settings.ACCOUNT_NUMBER_POOL_SIZE
+    free = AccountNumber.objects.filter(account__isnull=True).count()
+    added = 0
+    while free + added < size:
+        missing = size - free - added
+        stamp = timezone.now()
+        batch = [
+            AccountNumber(number=_candidate(), created_at=stamp)
+            for _ in range(missing)
+        ]
+        AccountNumber.objects.bulk_create(batch, ignore_conflicts=True)
+        # ignore_conflicts does not say which rows went in; ours carry this
+        # batch's stamp, and looking them up by key beats a table COUNT(*)
+        added += AccountNumber.objects.filter(
+            number__in=[row.number for row in batch], created_at=stamp
+        ).count()
+    print(f"[AccountNumber] Pool replenished • added={added} • free={free + added}")
+    return added
+
+
+def claim_numbers(count: int) -> list[str]:
+    """
+    Reserve `count` free numbers for the current transaction. They stay
+    locked until it commits, by which time register_account_numbers() has
+    assigned them.
+    """
+    if not transaction.get_connection().in_atomic_block:
+        raise RuntimeError("claim_numbers() must run inside transaction.atomic()")
+    for _ in range(2):
+        numbers = list(
+            AccountNumber.objects.select_for_update(skip_locked=True)
+            .filter(account__isnull=True)
+            .order_by("created_at")
+            .values_list("number", flat=True)[:count]
+        )
+        if len(numbers) == count:
+            return numbers
+        # Pool ran dry: refill inline once rather than fail the signup
+        replenish()
+    raise AccountNumberPoolExhausted("No free account numbers available")
+
+
+def register_account_numbers(account: Account) -> None:
+    """
+    Point the lookup rows at `account`'s current numbers and drop rows for
+    numbers it no longer uses. Free pool rows and the account's own rows
+    are replaced; the rest is a plain INSERT, so a number that belongs to
+    another account raises IntegrityError instead of being taken from it.
+    """
+    now = timezone.now()
+    rows = [
+        AccountNumber(
+            number=getattr(account, field),
+            account=account,
+            account_type=account_type,
+            assigned_at=now,
+        )
+        for account_type, field in NUMBER_FIELDS.items()
+        if getattr(account, field)
+    ]
+    with transaction.atomic():
+        AccountNumber.objects.filter(
+            Q(account=account)
+            | Q(number__in=[row.number for row in rows], account__isnull=True)
+        ).delete()
+        AccountNumber.objects.bulk_create(rows)
+
+
+def _lookup_queryset():
+    return AccountNumber.objects.select_related("account").only(
+        "number",
+        "account_type",
+        "account__id",
+        "account__account_name",
+        "account__user_id",
+        "account__checking_acc_number",
+        "account__savings_acc_number",
+    )
+
+
+def resolve_number(number: str) -> tuple[str, Account] | None:
+    """(account_type, Account) for an account number, or None."""
+    row = _lookup_queryset().filter(number=number, account__isnull=False).first()
+    return (row.account_type, row.account) if row else None
+
+
+def resolve_numbers(numbers: Iterable[str]) -> dict[str, tuple[str, Account]]:
+    """Map number -> (account_type, Account) in one query."""
+    rows = _lookup_queryset().filter(number__in=set(numbers), account__isnull=False)
+    return {row.number: (row.account_type, row.account) for row in rows}
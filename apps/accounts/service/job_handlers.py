@@ -0,0 +1,34 @@
+"""Admin job handlers for accounts; run by `manage.py run_admin_jobs`."""
+from django.db import transaction
+
+from apps.accounts.models import Account
+from apps.accounts.service.account_lock_service import lock_accounts
+from apps.accounts.service.profile_cache_service import invalidate_profiles
+from apps.jobs.service.job_service import register
+from apps.transactions.models import LedgerEntry
+from apps.transactions.service.ledger_service import BALANCE_FIELDS
+
+# balance field -> ledger account_type
+RESETTABLE_FIELDS = {field: account_type for account_type, field in BALANCE_FIELDS.items()}
+
+
+@register("accounts.reset_balance")
+def reset_balance(ids, field):
+    if field not in RESETTABLE_FIELDS:
+        raise ValueError(f"Cannot reset '{field}'")
+    with transaction.atomic():
+        # Same lock as debits and roll_up_account(); accounts deleted since
+        # the job was queued are skipped.
+        locked = lock_accounts(
+            *Account.objects.filter(pk__in=ids).values_list("pk", flat=True)
+        )
+        updated = Account.objects.filter(pk__in=locked).update(**{field: 0})
+        # Legs not rolled up yet belong to the balance being cleared; settle
+        # them here so the next roll-up does not add them back.
+        settled = LedgerEntry.objects.filter(
+            account_id__in=locked,
+            account_type=RESETTABLE_FIELDS[field],
+            rolled_up=False,
+        ).update(rolled_up=True)
+        invalidate_profiles(account.user_id for account in locked.values())
+    print(f"[JOBS][Account] Reset {field} to 0 for {updated} record(s) • settled {settled} pending leg(s)")
@@ -0,0 +1,186 @@
+"""
+Account PIN verification, kept out of the account row lock.
+
+Callers verify first (`verify_account_pin`), then lock, then call
+`pin_unchanged` on the locked row: if the PIN hash moved in between, the
+earlier verification no longer counts. Attempts are counted on the row
+before hashing, so the lockout holds against concurrent guesses.
+"""
+import hashlib
+import hmac
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.accounts.hashers import hash_pin, pin_hasher
+from apps.accounts.models import Account
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# (account pk, stored hash) -> (hmac of the raw pin, expires at)
+_verified: dict[tuple, tuple[bytes, float]] = {}
+_verified_lock = threading.Lock()
+_VERIFIED_MAX = 10_000
+
+
+class PinLockedError(Exception):
+    def __init__(self, locked_until):
+        self.locked_until = locked_until
+        super().__init__(f"PIN locked until {locked_until.isoformat()}")
+
+
+def _pool() -> ThreadPoolExecutor:
+    # Bounds how many PIN hashes run at once, whatever the request
+    # concurrency; hashlib releases the GIL so they run in parallel.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PIN_HASH_WORKERS,
+                thread_name_prefix="pin-hash",
+            )
+        return _executor
+
+
+def _digest(raw_pin: str, encoded: str) -> bytes:
+    return hmac.new(
+        settings.SECRET_KEY.encode(), f"{encoded}:{raw_pin}".encode(), hashlib.sha256
+    ).digest()
+
+
+def _cached(account_pk, encoded: str, raw_pin: str) -> bool:
+    if settings.PIN_VERIFY_CACHE_SECONDS <= 0:
+        return False
+    with _verified_lock:
+        entry = _verified.get((account_pk, encoded))
+    if not entry:
+        return False
+    digest, expires = entry
+    return expires > time.monotonic() and hmac.compare_digest(
+        digest, _digest(raw_pin, encoded)
+    )
+
+
+def _remember(account_pk, encoded: str, raw_pin: str) -> None:
+    if settings.PIN_VERIFY_CACHE_SECONDS <= 0:
+        return
+    with _verified_lock:
+        if len(_verified) >= _VERIFIED_MAX:
+            _verified.clear()
+        _verified[(account_pk, encoded)] = (
+            _digest(raw_pin, encoded),
+            time.monotonic() + settings.PIN_VERIFY_CACHE_SECONDS,
+        )
+
+
+def _unlocked(now) -> Q:
+    return Q(pin_locked_until__isnull=True) | Q(pin_locked_until__lte=now)
+
+
+def _lock_out(account: Account, **filters) -> datetime | None:
+    """Lock the account if `filters` still match; returns the lock expiry."""
+    locked_until = timezone.now() + timedelta(
+        minutes=settings.ACCOUNT_PIN_LOCKOUT_MINUTES
+    )
+    locked = Account.objects.filter(pk=account.pk, **filters).update(
+        failed_pin_attempts=0, pin_locked_until=locked_until
+    )
+    if not locked:
+        return None
+    print(f"[PIN] Account locked • account={account.pk} • until={locked_until}")
+    return locked_until
+
+
+def _claim_attempt(account: Account) -> None:
+    """
+    Count the attempt on the row before the hash runs. The instance may
+    have been loaded before a lockout, and concurrent guesses would all
+    pass a check of it; the conditional UPDATE lets through at most
+    ACCOUNT_PIN_MAX_ATTEMPTS, however many are in flight.
+    """
+    now = timezone.now()
+    claimed = Account.objects.filter(
+        _unlocked(now),
+        pk=account.pk,
+        failed_pin_attempts__lt=settings.ACCOUNT_PIN_MAX_ATTEMPTS,
+    ).update(failed_pin_attempts=F("failed_pin_attempts") + 1)
+    if claimed:
+        return
+
+    locked_until = (
+        Account.objects.filter(pk=account.pk)
+        .values_list("pin_locked_until", flat=True)
+        .first()
+    )
+    if not locked_until or locked_until <= now:
+        # Not locked yet: the remaining attempts are all in flight
+        locked_until = _lock_out(
+            account,
+            pin_locked_until=locked_until,
+            failed_pin_attempts__gte=settings.ACCOUNT_PIN_MAX_ATTEMPTS,
+        )
+        if locked_until is None:
+            # Another request moved the row first; go by what it did
+            return _claim_attempt(account)
+    raise PinLockedError(locked_until)
+
+
+def _record_failure(account: Account) -> None:
+    # _claim_attempt() counted the attempt; lock once they are used up.
+    _lock_out(
+        account, failed_pin_attempts__gte=settings.ACCOUNT_PIN_MAX_ATTEMPTS
+    )
+
+
+def _upgrade_hash(account: Account, raw_pin: str) -> None:
+    """Re-hash PINs stored with another hasher/iteration count."""
+    encoded = account.account_pin
+    try:
+        current = identify_hasher(encoded)
+    except ValueError:
+        return
+    target = pin_hasher()
+    if current.algorithm == target.algorithm and not target.must_update(encoded):
+        return
+    # Only if nobody changed the PIN meanwhile; keep the instance in step
+    # so pin_unchanged() still matches the row.
+    upgraded = hash_pin(raw_pin)
+    if Account.objects.filter(pk=account.pk, account_pin=encoded).update(
+        account_pin=upgraded
+    ):
+        account.account_pin = upgraded
+
+
+def verify_account_pin(account: Account, raw_pin: str) -> bool:
+    """
+    Check `raw_pin` against `account` without holding any row lock.
+    Raises PinLockedError while the account is locked out.
+    """
+    _claim_attempt(account)
+
+    encoded = account.account_pin or ""
+    ok = _cached(account.pk, encoded, raw_pin)
+    if not ok:
+        ok = _pool().submit(check_password, raw_pin, encoded).result()
+        print(f"[PIN] Verify • account={account.pk} • ok={ok}")
+    if not ok:
+        _record_failure(account)
+        return False
+
+    # Clears this attempt and any earlier failures
+    Account.objects.filter(pk=account.pk).update(failed_pin_attempts=0)
+    _upgrade_hash(account, raw_pin)
+    _remember(account.pk, account.account_pin, raw_pin)
+    return True
+
+
+def pin_unchanged(verified: Account, locked: Account) -> bool:
+    """True if the PIN hash is the one checked before the lock was taken."""
+    return verified.account_pin == locked.account_pin
@@ -0,0 +1,101 @@
+"""
+Cached read model behind /api/user/me/ and the login response: the
+serialized user + account + KYC status, one document per user in Redis.
+
+Writes never update the document in place; they delete it after their
+transaction commits and the next read rebuilds it. Every cache call is
+best effort: if Redis is down, reads fall through to the database.
+"""
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = "profile:v1"
+HITS_KEY = f"{KEY_PREFIX}:stats:hits"
+MISSES_KEY = f"{KEY_PREFIX}:stats:misses"
+
+
+def profile_key(user_id) -> str:
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+def _count(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        # First use: the counter does not exist yet
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def _safe(func, *args, default=None):
+    try:
+        return func(*args)
+    except Exception as e:
+        # Not logged to the "db" logger: an outage would write a row per request
+        print(f"[ProfileCache] {func.__name__} failed • {e}")
+        return default
+
+
+def build_profile(user) -> dict:
+    """Serialize the profile document from the database."""
+    from apps.users.serializers import UserDetailsSerializer
+
+    return {
+        "is_active": user.is_active and not user.is_deleted,
+        "data": UserDetailsSerializer(user).data,
+    }
+
+
+def load_user(user_id):
+    from apps.users.models import User
+
+    return (
+        User.objects.select_related("user_accounts", "kyc_profile")
+        .filter(pk=user_id)
+        .first()
+    )
+
+
+def get_profile(user_id) -> dict | None:
+    """
+    Profile document for `user_id`, from Redis when possible.
+    Returns None if the user does not exist.
+    """
+    key = profile_key(user_id)
+    doc = _safe(cache.get, key)
+    if doc is not None:
+        _safe(_count, HITS_KEY)
+        return doc
+
+    _safe(_count, MISSES_KEY)
+    user = load_user(user_id)
+    if user is None:
+        return None
+    doc = build_profile(user)
+    _safe(cache.set, key, doc, settings.PROFILE_CACHE_TTL)
+    return doc
+
+
+def invalidate_profiles(user_ids: Iterable) -> None:
+    """
+    Drop cached documents once the surrounding transaction commits, so a
+    reader can never re-cache the pre-commit state after the delete.
+    """
+    keys = [profile_key(user_id) for user_id in set(user_ids) if user_id]
+    if not keys:
+        return
+    transaction.on_commit(lambda: _safe(cache.delete_many, keys))
+
+
+def stats() -> dict:
+    hits = _safe(cache.get, HITS_KEY, default=None) or 0
+    misses = _safe(cache.get, MISSES_KEY, default=None) or 0
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
@@ -2,9 +2,25 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from apps.notifications.service.notification_service import send_notification
 from apps.accounts.models import Account
+from apps.accounts.service.account_number_service import register_account_numbers
+from apps.accounts.service.profile_cache_service import invalidate_profiles
+from apps.transactions.service.ledger_service import account_balances
 from django.utils import timezone
 
 
+@receiver(post_save, sender=Account)
+def sync_account_numbers(sender, instance: Account, created, **kwargs):
+    """Keep the AccountNumber lookup rows in step with the account."""
+    changed = instance.changed_fields
+    if created or "checking_acc_number" in changed or "savings_acc_number" in changed:
+        register_account_numbers(instance)
+
+
+@receiver(post_save, sender=Account)
+def invalidate_account_profile(sender, instance: Account, **kwargs):
+    invalidate_profiles([instance.user_id])
+
+
 @receiver(post_save, sender=Account)
 def notify_account_changes(sender, instance: Account, created, **kwargs):
     """
@@ -14,18 +30,21 @@ def notify_account_changes(sender, instance: Account, created, **kwargs):
 
     if created:
         content = f"Your account {instance.account_name} has been successfully created."
+    elif not instance.changed_fields:
+        # Only the tracked account details are worth a notification
+        return
     else:
-        # For updates, you could customize based on which fields changed
         content = f"Your account {instance.account_name} has been updated."
 
+    balances = account_balances(instance)
     mail_options = {
         "title": title,
         "content": {
             "user": instance.user,
             "current_year": timezone.now().year,
             "account_name": instance.account_name,
-            "checking_balance": instance.checking_balance,
-            "savings_balance": instance.savings_balance,
+            "checking_balance": balances["checking"],
+            "savings_balance": balances["savings"],
         },
         "recipient": instance.user.email,
         "template": "account_update",  # TODO: create template
@@ -1,3 +1,426 @@
-from django.test import TestCase
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import F
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.accounts.admin import AccountAdmin
+from apps.accounts.hashers import hash_pin, pin_hasher
+from apps.accounts.models import Account, AccountNumber
+from apps.accounts.serializers import AccountSerializer
+from apps.accounts.service.account_lock_service import lock_accounts
+from apps.accounts.service.account_number_service import (
+    _candidate,
+    claim_numbers,
+    is_valid_number,
+    luhn_check_digit,
+    register_account_numbers,
+    replenish,
+)
+from apps.accounts.service.job_handlers import reset_balance
+from apps.accounts.service.pin_service import PinLockedError, verify_account_pin
+from apps.transactions.models import (
+    LedgerDirection,
+    LedgerEntry,
+    Transaction,
+    TxCategory,
+    TxMethod,
+)
+from apps.transactions.service.ledger_service import (
+    available_balance,
+    post_entries,
+    roll_up,
+)
+from apps.users.models import User
+
+
+def run_with_lock_retry(fn, attempts=200):
+    """
+    SQLite has no row locks: concurrent writers get "database is locked"
+    and must retry. Postgres never takes this branch, so a real deadlock
+    still surfaces as a failure there.
+    """
+    try:
+        for _ in range(attempts):
+            try:
+                return fn()
+            except OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+                time.sleep(random.uniform(0, 0.005))
+        raise AssertionError("gave up waiting for the database lock")
+    finally:
+        connection.close()
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class LockAccountsConcurrencyTests(TransactionTestCase):
+    workers = 8
+    rounds = 200
+
+    def setUp(self):
+        self.accounts = []
+        for n in range(2):
+            user = User.objects.create_user(
+                email=f"lock{n}@example.com",
+                username=f"lock{n}",
+                password="password",
+            )
+            self.accounts.append(
+                Account.objects.create(
+                    user=user,
+                    account_name=f"Lock {n}",
+                    checking_acc_number=f"1000000000{n}",
+                    savings_acc_number=f"2000000000{n}",
+                    account_pin="1234",
+                    checking_balance=Decimal("1000.00"),
+                )
+            )
+
+    def _move_one(self, source_id, destination_id):
+        def work():
+            with transaction.atomic():
+                # Callers pass ids in opposite orders; the helper must not care.
+                locked = lock_accounts(source_id, destination_id)
+                self.assertEqual(list(locked), sorted(locked))
+                Account.objects.filter(pk=source_id).update(
+                    checking_balance=F("checking_balance") - 1
+                )
+                Account.objects.filter(pk=destination_id).update(
+                    checking_balance=F("checking_balance") + 1
+                )
+
+        run_with_lock_retry(work)
+
+    # SQLite ignores FOR UPDATE and serialises writers on the whole file,
+    # so this would pass there without exercising the lock order.
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_opposing_locks_do_not_deadlock(self):
+        a, b = (account.pk for account in self.accounts)
+        pairs = [(a, b) if i % 2 else (b, a) for i in range(self.rounds)]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for future in [pool.submit(self._move_one, *pair) for pair in pairs]:
+                future.result(timeout=60)
+
+        balances = dict(Account.objects.values_list("pk", "checking_balance"))
+        self.assertEqual(balances[a], Decimal("1000.00"))
+        self.assertEqual(balances[b], Decimal("1000.00"))
+
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_lock_is_one_ordered_select_for_update(self):
+        ids = sorted((account.pk for account in self.accounts), reverse=True)
+        lock = (
+            "FOR NO KEY UPDATE"
+            if connection.features.has_select_for_no_key_update
+            else "FOR UPDATE"
+        )
+
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            locked = lock_accounts(*ids)
+
+        self.assertEqual(list(locked), sorted(ids))
+        self.assertEqual(len(queries), 1)
+        self.assertIn("ORDER BY", queries[0]["sql"])
+        self.assertIn(lock, queries[0]["sql"])
+
+    def test_lock_accounts_requires_atomic_block(self):
+        with self.assertRaises(RuntimeError):
+            lock_accounts(self.accounts[0].pk)
+
+    def test_lock_accounts_reports_missing_rows(self):
+        with transaction.atomic(), self.assertRaises(Account.DoesNotExist):
+            lock_accounts(self.accounts[0].pk, "00000000-0000-0000-0000-000000000000")
+
+
+class LuhnCheckDigitTests(SimpleTestCase):
+    def test_known_check_digit(self):
+        self.assertEqual(luhn_check_digit("7992739871"), "3")
+        self.assertTrue(is_valid_number("79927398713"))
+
+    def test_single_digit_typos_are_rejected(self):
+        for position in range(11):
+            number = list("79927398713")
+            number[position] = str((int(number[position]) + 1) % 10)
+            with self.subTest(position=position):
+                self.assertFalse(is_valid_number("".join(number)))
+
+    def test_wrong_length_is_rejected(self):
+        self.assertFalse(is_valid_number("7992739871"))
+
+    def test_generated_numbers_are_valid(self):
+        for _ in range(200):
+            number = _candidate()
+            self.assertTrue(is_valid_number(number), number)
+            self.assertNotEqual(number[0], "0")
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    ACCOUNT_NUMBER_POOL_SIZE=4,
+)
+class AccountNumberPoolTests(TestCase):
+    def free(self):
+        return AccountNumber.objects.filter(account__isnull=True).count()
+
+    def open_account(self, n):
+        user = User.objects.create_user(
+            email=f"pool{n}@example.com", username=f"pool{n}", password="password"
+        )
+        with transaction.atomic():
+            checking, savings = claim_numbers(2)
+            return Account.objects.create(
+                user=user,
+                account_name=f"Pool {n}",
+                checking_acc_number=checking,
+                savings_acc_number=savings,
+                account_pin="1234",
+            )
+
+    def test_replenish_tops_the_pool_up(self):
+        self.assertEqual(replenish(), 4)
+        self.assertEqual(replenish(), 0)
+        self.assertEqual(self.free(), 4)
+
+    def test_claimed_numbers_are_assigned_to_the_account(self):
+        replenish()
+        account = self.open_account(0)
+
+        rows = dict(
+            AccountNumber.objects.filter(account=account).values_list(
+                "number", "account_type"
+            )
+        )
+        self.assertEqual(
+            rows,
+            {
+                account.checking_acc_number: "checking",
+                account.savings_acc_number: "savings",
+            },
+        )
+        self.assertEqual(self.free(), 2)
+
+    def test_empty_pool_is_refilled_inline(self):
+        first = self.open_account(0)
+        second = self.open_account(1)
+
+        numbers = {
+            first.checking_acc_number,
+            first.savings_acc_number,
+            second.checking_acc_number,
+            second.savings_acc_number,
+        }
+        self.assertEqual(len(numbers), 4)
+        self.assertTrue(all(is_valid_number(number) for number in numbers))
+
+    def test_number_of_another_account_is_not_taken(self):
+        owner = self.open_account(0)
+        other = self.open_account(1)
+        other.checking_acc_number = owner.checking_acc_number
+
+        with self.assertRaises(IntegrityError):
+            register_account_numbers(other)
+
+        row = AccountNumber.objects.get(number=owner.checking_acc_number)
+        self.assertEqual(row.account_id, owner.pk)
+        self.assertTrue(
+            AccountNumber.objects.filter(number=other.savings_acc_number).exists()
+        )
+
+
+PIN_HASHERS = [
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+    "apps.accounts.hashers.PinPBKDF2PasswordHasher",
+]
+
+
+@override_settings(PASSWORD_HASHERS=PIN_HASHERS, ACCOUNT_PIN_HASH_ITERATIONS=1000)
+class PinHasherTests(SimpleTestCase):
+    def test_pins_use_the_pin_hasher_and_its_iterations(self):
+        encoded = hash_pin("1234")
+
+        self.assertTrue(encoded.startswith("pin_pbkdf2_sha256$1000$"))
+        self.assertTrue(check_password("1234", encoded))
+        self.assertFalse(check_password("4321", encoded))
+
+    def test_falls_back_to_the_default_hasher(self):
+        with self.settings(PASSWORD_HASHERS=PIN_HASHERS[:1]):
+            self.assertEqual(pin_hasher().algorithm, "md5")
+
+    def test_iteration_change_needs_an_update(self):
+        encoded = hash_pin("1234")
+
+        with self.settings(ACCOUNT_PIN_HASH_ITERATIONS=2000):
+            self.assertTrue(pin_hasher().must_update(encoded))
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=PIN_HASHERS,
+    ACCOUNT_PIN_HASH_ITERATIONS=1000,
+    ACCOUNT_PIN_MAX_ATTEMPTS=3,
+    ACCOUNT_PIN_LOCKOUT_MINUTES=15,
+    PIN_VERIFY_CACHE_SECONDS=0,
+)
+class PinLockoutTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email="pin@example.com", username="pin", password="password"
+        )
+        self.account = Account.objects.create(
+            user=user,
+            account_name="Pin",
+            checking_acc_number="30000000001",
+            savings_acc_number="40000000001",
+            account_pin="1234",
+        )
+
+    def row(self):
+        return Account.objects.values("failed_pin_attempts", "pin_locked_until").get(
+            pk=self.account.pk
+        )
+
+    def test_wrong_pins_lock_the_account(self):
+        for _ in range(3):
+            self.assertFalse(verify_account_pin(self.account, "0000"))
+
+        self.assertIsNotNone(self.row()["pin_locked_until"])
+        with self.assertRaises(PinLockedError):
+            verify_account_pin(self.account, "1234")
+
+    def test_lockout_is_read_from_the_row_not_the_instance(self):
+        # Loaded before another request locked the account
+        stale = Account.objects.get(pk=self.account.pk)
+        for _ in range(3):
+            verify_account_pin(self.account, "0000")
+
+        self.assertIsNone(stale.pin_locked_until)
+        with self.assertRaises(PinLockedError):
+            verify_account_pin(stale, "1234")
+
+    def test_attempts_in_flight_use_up_the_budget(self):
+        # Three guesses claimed their attempt and are still hashing
+        Account.objects.filter(pk=self.account.pk).update(failed_pin_attempts=3)
+
+        with self.assertRaises(PinLockedError):
+            verify_account_pin(self.account, "1234")
+        self.assertIsNotNone(self.row()["pin_locked_until"])
+
+    def test_correct_pin_clears_failures(self):
+        verify_account_pin(self.account, "0000")
+        verify_account_pin(self.account, "0000")
+
+        self.assertTrue(verify_account_pin(self.account, "1234"))
+        self.assertEqual(self.row()["failed_pin_attempts"], 0)
+
+    def test_expired_lock_allows_attempts_again(self):
+        Account.objects.filter(pk=self.account.pk).update(
+            pin_locked_until=timezone.now() - timedelta(minutes=1)
+        )
+
+        self.assertTrue(verify_account_pin(self.account, "1234"))
+
+    def test_pin_from_another_hasher_is_upgraded(self):
+        legacy = make_password("1234", hasher="md5")
+        Account.objects.filter(pk=self.account.pk).update(account_pin=legacy)
+        self.account.account_pin = legacy
+
+        self.assertTrue(verify_account_pin(self.account, "1234"))
+
+        self.account.refresh_from_db()
+        self.assertEqual(
+            identify_hasher(self.account.account_pin).algorithm, "pin_pbkdf2_sha256"
+        )
+
+
+class PendingLegsMixin:
+    """Snapshot 100.00 / 10.00 with 50.00 / 5.00 of credits not rolled up."""
+
+    def setUp(self):
+        user = User.objects.create_user(
+            email="reset@example.com", username="reset", password="password"
+        )
+        self.account = Account.objects.create(
+            user=user,
+            account_name="Reset",
+            checking_acc_number="50000000001",
+            savings_acc_number="60000000001",
+            account_pin="1234",
+            checking_balance=Decimal("100.00"),
+            savings_balance=Decimal("10.00"),
+        )
+        tx = Transaction.objects.create(
+            category=TxCategory.DEPOSIT,
+            method=TxMethod.WIRE,
+            account_type="checking",
+            amount=Decimal("50.00"),
+            destination_account=self.account,
+            initiated_by=user,
+        )
+        post_entries(
+            tx,
+            [
+                (self.account, "checking", LedgerDirection.CREDIT, Decimal("50.00")),
+                (self.account, "savings", LedgerDirection.CREDIT, Decimal("5.00")),
+            ],
+        )
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class ResetBalanceTests(PendingLegsMixin, TestCase):
+    def test_pending_legs_are_not_added_back_after_a_reset(self):
+        reset_balance([self.account.pk], "checking_balance")
+
+        self.account.refresh_from_db()
+        self.assertEqual(available_balance(self.account, "checking"), Decimal("0.00"))
+
+        roll_up()
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.checking_balance, Decimal("0.00"))
+        # The other balance and its pending leg are left alone
+        self.assertEqual(self.account.savings_balance, Decimal("15.00"))
+        self.assertFalse(LedgerEntry.objects.filter(rolled_up=False).exists())
+
+    def test_unknown_field_is_rejected(self):
+        with self.assertRaises(ValueError):
+            reset_balance([self.account.pk], "account_pin")
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class AvailableBalanceDisplayTests(PendingLegsMixin, TestCase):
+    def test_serializer_shows_available_balances(self):
+        data = AccountSerializer(self.account).data
+
+        self.assertEqual(data["checking_balance"], "150.00")
+        self.assertEqual(data["savings_balance"], "15.00")
+
+    def test_admin_cannot_edit_balances(self):
+        readonly = AccountAdmin(Account, admin.site).get_readonly_fields(None)
+
+        self.assertIn("checking_balance", readonly)
+        self.assertIn("savings_balance", readonly)
@@ -3,8 +3,12 @@ import uuid
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
 from asgiref.sync import sync_to_async
-from django.db import IntegrityError
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from apps.chat.models import Chat, Room
+from apps.chat.service.message_buffer import chat_buffer
+from apps.chat.service.receipt_service import mark_seen_up_to
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from apps.notifications.service.notification_service import (
@@ -18,74 +22,54 @@ logger = logging.getLogger(__name__)
 """ DB Helpers """
 
 
-def _mark_seen_sync(slug: str):
+mark_seen = sync_to_async(mark_seen_up_to, thread_sensitive=False)
+
+
+def load_room_sync(room_id, user_id):
+    """The room with both participants loaded, if `user_id` is one of them."""
     try:
-        chat = Chat.objects.get(slug=slug)
-        chat.has_seen = True
-        chat.save(update_fields=["has_seen"])
-        return chat
-    except Chat.DoesNotExist:
-        logger.warning(f"[WS][SEEN] Message with slug {slug} not found")
+        room = Room.objects.select_related("sender", "receiver").get(id=room_id)
+    except (Room.DoesNotExist, ValidationError):
+        return None
+    if user_id not in (room.sender_id, room.receiver_id):
+        return None
+    return room
 
 
-mark_seen = sync_to_async(_mark_seen_sync, thread_sensitive=False)
+load_room = sync_to_async(load_room_sync, thread_sensitive=False)
 
 
-def create_new_message_sync(sender_id, receiver_id, message, room_id, slug):
-    print("sender_id", sender_id)
-    print("receiver_id", receiver_id)
+def create_new_message_sync(room, sender, receiver, message, slug) -> bool:
+    """
+    One INSERT. The room and both users come from the connection, so
+    nothing is looked up first (and the post_save push reads them from the
+    instance). The post_save room update commits with the row, as in the
+    buffered path. Returns True once the message is stored.
+    """
     try:
-        room = Room.objects.get(id=room_id)
-        sender = User.objects.get(id=sender_id)
-        receiver = User.objects.get(id=receiver_id)
-
-        if slug:
-            existing = Chat.objects.filter(slug=slug).first()
-            if existing:
-                print(
-                    f"[DB] slug already exists; returning existing id={existing.id}"
-                )
-                return existing
-
-        chat = Chat.objects.create(
-            room_id=room,
-            slug=slug,
-            sender=sender,
-            receiver=receiver,
-            text=message,
-        )
-        return chat
-
-    except Room.DoesNotExist:
-        logger.error(f"Room {room_id} not found")
-    except User.DoesNotExist as e:
-        logger.error(f"User not found: {e}")
+        with transaction.atomic():
+            Chat.objects.create(
+                room_id=room,
+                slug=slug,
+                sender=sender,
+                receiver=receiver,
+                text=message,
+            )
+        return True
     except IntegrityError as e:
+        if slug and Chat.objects.filter(slug=slug).exists():
+            # Client resent a message we already stored (slug is unique)
+            print(f"[DB] slug already exists; not storing again slug={slug}")
+            return True
         logger.error(f"IntegrityError occurred: {e}")
     except Exception as e:
         logger.exception(f"Unexpected error creating message: {e}")
+    return False
 
 
 create_message = sync_to_async(create_new_message_sync, thread_sensitive=False)
 
 
-def handle_read_receipt_sync(slug):
-    try:
-        chat = Chat.objects.get(slug=slug)
-        chat.has_seen = True
-        chat.save()
-        return chat
-    except Chat.DoesNotExist:
-        logger.warning(f"Message with slug {slug} not found")
-    except Exception as e:
-        logger.exception(f"Error updating read receipt: {e}")
-
-
-handle_update_status = sync_to_async(
-    handle_read_receipt_sync, thread_sensitive=False
-)
-
-
 """ Consumer """
 
 
@@ -105,6 +89,18 @@ class ChatRoomConsumer(AsyncWebsocketConsumer):
 
             self.room_name = self.scope["url_route"]["kwargs"]["room_name"]
             self.room_group_name = f"chat_{self.room_name}"
+
+            # Membership is checked once; the participants are kept on the
+            # connection for every message that follows.
+            room = await load_room(self.room_name, user.id)
+            if room is None:
+                print(f"[WS][AUTH] User {user.id} is not in room {self.room_name}")
+                await self.close(code=4403)  # 4403: Forbidden (custom)
+                return
+            self.room = room
+            self.user = room.sender if room.sender_id == user.id else room.receiver
+            self.peer = room.receiver if self.user is room.sender else room.sender
+
             await self.channel_layer.group_add(
                 self.room_group_name, self.channel_name
             )
@@ -116,8 +112,9 @@ class ChatRoomConsumer(AsyncWebsocketConsumer):
             await self.close()
 
     async def disconnect(self, close_code):
-        self.room_name = self.scope["url_route"]["kwargs"]["room_name"]
-        self.room_group_name = f"chat_{self.room_name}"
+        if not hasattr(self, "room"):
+            return  # rejected in connect(); never joined the group
+        await chat_buffer.drain_owner(self.channel_name)
         await self.channel_layer.group_discard(
             self.room_group_name, self.channel_name
         )
@@ -126,53 +123,57 @@ class ChatRoomConsumer(AsyncWebsocketConsumer):
         data = json.loads(text_data)
         print("Received data", data)
 
+        if data.get("read_receipt"):
+            # The message may still be buffered; write it before marking
+            await chat_buffer.drain_room(self.room.pk)
+            # One UPDATE up to this message and one high-water-mark event
+            event = await mark_seen(
+                room_id=self.room.pk,
+                reader_id=self.user.pk,
+                slug=data.get("slug"),
+                unstored_ok=settings.CHAT_WRITE_BEHIND,
+            )
+            if event and event["count"]:
+                await self.channel_layer.group_send(self.room_group_name, event)
+            return
+
         # 🚨 Always use scope user for sender (security)
-        sender_id = data["sender"]["id"]
-        receiver_id = data["receiver"]
-        slug = data["slug"]
-        text = data["text"]
+        sender_id = str(self.user.pk)
+        receiver_id = str(self.peer.pk)
+        slug = data.get("slug")
+        text = data.get("text")
         date = data.get("date")
-        read_receipt = data.get("read_receipt")
-        if read_receipt:
-            # Handle receipts separately (no DB save loop)
-            await mark_seen(slug=slug)
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "broadcast_message",
-                    "event": "read_receipt",
-                    "slug": slug,
-                    "sender": sender_id,
-                    "receiver": receiver_id,
-                    "has_seen": True,
-                    "date": date,
-                },
-            )
 
+        if not text:
+            print("[WS][VALIDATION] Empty text")
             return
-
-        if not receiver_id or not text:
-            print("[WS][VALIDATION] Missing receiver or empty text")
+        if data.get("receiver") and str(data["receiver"]) != receiver_id:
+            print("[WS][VALIDATION] Receiver is not in this room")
             return
 
         # 🛑 FIX: Save once here (only sender's consumer runs `receive`)
-        try:
-            await create_message(
-                sender_id=sender_id,
-                receiver_id=receiver_id,
+        if settings.CHAT_WRITE_BEHIND:
+            # Written by the buffer's next flush; the DB is not awaited here
+            chat = Chat(
+                room_id=self.room,
+                slug=slug,
+                sender=self.user,
+                receiver=self.peer,
+                text=text,
+            )
+            await chat_buffer.add(chat, owner=self.channel_name)
+            date = date or chat.date.isoformat()
+        else:
+            stored = await create_message(
+                room=self.room,
+                sender=self.user,
+                receiver=self.peer,
                 message=text,
-                room_id=self.room_name,
                 slug=slug,
             )
-            # receiver = User.objects.filter(id=receiver_id).first()
-            # send_push_notification(
-            #     "", "You have a new message", True, receiver
-            # )
-            # add notification logic here
-
-        except Exception:
-            # Already logged in helper
-            return
+            if not stored:
+                # Already logged in helper
+                return
 
         # 📣 Single one-way broadcast to group (no second DB write)
         await self.channel_layer.group_send(
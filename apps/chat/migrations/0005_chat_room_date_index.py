@@ -0,0 +1,21 @@
+# Generated by Django 5.0 on 2026-10-17 21:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0004_alter_chat_created_at_alter_room_created_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chat",
+            index=models.Index(
+                fields=["room_id", "date", "id"], name="chat_chat_room_id_d8bc49_idx"
+            ),
+        ),
+    ]
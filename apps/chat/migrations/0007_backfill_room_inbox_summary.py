@@ -0,0 +1,63 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 2000
+PREVIEW_LENGTH = 120
+
+
+def backfill(apps, schema_editor):
+    Room = apps.get_model("chat", "Room")
+    Chat = apps.get_model("chat", "Chat")
+
+    latest = Chat.objects.filter(room_id=OuterRef("pk")).order_by("-date", "-id")
+
+    def unread(participant):
+        return Subquery(
+            Chat.objects.filter(
+                room_id=OuterRef("pk"),
+                receiver_id=OuterRef(participant),
+                has_seen=False,
+            )
+            .order_by()
+            .values("room_id")
+            .annotate(n=Count("id"))
+            .values("n")
+        )
+
+    rooms = Room.objects.annotate(
+        latest_at=Subquery(latest.values("date")[:1]),
+        latest_text=Subquery(latest.values("text")[:1]),
+        unread_sender=Coalesce(unread("sender_id"), 0),
+        unread_receiver=Coalesce(unread("receiver_id"), 0),
+    ).iterator(chunk_size=BATCH_SIZE)
+
+    fields = [
+        "last_message_at",
+        "last_message_preview",
+        "sender_unread",
+        "receiver_unread",
+    ]
+    batch = []
+    for room in rooms:
+        room.last_message_at = room.latest_at or room.created
+        room.last_message_preview = (room.latest_text or "")[:PREVIEW_LENGTH]
+        room.sender_unread = room.unread_sender
+        room.receiver_unread = room.unread_receiver
+        batch.append(room)
+        if len(batch) >= BATCH_SIZE:
+            Room.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Room.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0006_room_inbox_summary"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
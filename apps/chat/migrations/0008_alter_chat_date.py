@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-17 21:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0007_backfill_room_inbox_summary"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="chat",
+            name="date",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,34 @@
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill(apps, schema_editor):
+    Chat = apps.get_model("chat", "Chat")
+    Chat.objects.update(stored_at=F("date"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0008_alter_chat_date"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chat",
+            name="stored_at",
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="chat",
+            index=models.Index(
+                fields=["room_id", "stored_at", "id"],
+                name="chat_chat_room_id_9af4b1_idx",
+            ),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 from cortanae.generic_utils.models_utils import BaseModelMixin
 
@@ -15,10 +16,29 @@ class Room(BaseModelMixin):
         User, related_name="reciepent", on_delete=models.CASCADE
     )
     created = models.DateTimeField(auto_now_add=True)
+    # Inbox summary, kept current by room_service as messages are sent/seen
+    last_message_at = models.DateTimeField(default=timezone.now)
+    last_message_preview = models.CharField(max_length=255, blank=True, default="")
+    sender_unread = models.PositiveIntegerField(default=0)
+    receiver_unread = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # One per branch of the inbox OR-filter, newest activity first
+            models.Index(fields=["sender", "-last_message_at", "-id"]),
+            models.Index(fields=["receiver", "-last_message_at", "-id"]),
+        ]
 
     def __str__(self):
         return f"{self.id}-{self.sender}-{self.receiver}"
 
+    def unread_for(self, user_id) -> int:
+        if user_id == self.sender_id:
+            return self.sender_unread
+        if user_id == self.receiver_id:
+            return self.receiver_unread
+        return 0
+
     
 
 class Chat(BaseModelMixin):
@@ -33,9 +53,20 @@ class Chat(BaseModelMixin):
     )
     text = models.TextField()
     slug = models.CharField(max_length=300, unique=True, blank=True, null=True)
-    date = models.DateTimeField(auto_now_add=True)
+    # Set when the message is received, not when a buffered batch is written
+    date = models.DateTimeField(default=timezone.now)
+    # When the row was written; "since" deltas follow this, not `date`,
+    # so a message written late (write-behind) is still picked up.
+    stored_at = models.DateTimeField(auto_now_add=True)
     has_seen = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # History pages and "since" deltas are range scans within a room
+            models.Index(fields=["room_id", "date", "id"]),
+            models.Index(fields=["room_id", "stored_at", "id"]),
+        ]
+
     def __str__(self):
         return "%s - %s" % (self.id, self.date)
     
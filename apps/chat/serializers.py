@@ -7,6 +7,7 @@ class RoomSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
     receiver = UserSerializer(read_only=True)
     room_id = serializers.SerializerMethodField(read_only=True)
+    unread_count = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Room
@@ -17,12 +18,18 @@ class RoomSerializer(serializers.ModelSerializer):
             # add the rest of your Room model fields explicitly
             "created_at",
             "updated_at",
-            # e.g. "name", "last_message", etc.
+            "last_message_at",
+            "last_message_preview",
+            "unread_count",
         )
 
     def get_room_id(self, obj):
         return obj.id
 
+    def get_unread_count(self, obj):
+        request = self.context.get("request")
+        return obj.unread_for(request.user.id) if request else 0
+
 
 class ChatSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
@@ -31,3 +38,15 @@ class ChatSerializer(serializers.ModelSerializer):
     class Meta:
         model = Chat
         fields = "__all__"
+
+
+class ChatMessageSerializer(serializers.ModelSerializer):
+    """History payload: participants as ids, no nested user objects."""
+
+    room_id = serializers.UUIDField(source="room_id_id", read_only=True)
+    sender = serializers.UUIDField(source="sender_id", read_only=True)
+    receiver = serializers.UUIDField(source="receiver_id", read_only=True)
+
+    class Meta:
+        model = Chat
+        fields = ("id", "room_id", "sender", "receiver", "text", "slug", "date", "has_seen")
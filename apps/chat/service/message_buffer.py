@@ -0,0 +1,250 @@
+"""
+Write-behind persistence for chat messages.
+
+The consumer broadcasts a message and hands it to the process's buffer;
+the buffer bulk-inserts once it holds CHAT_BUFFER_MAX_MESSAGES messages or
+CHAT_BUFFER_FLUSH_MS after the first one arrived, so the database is off
+the message latency path. Slugs stay idempotent: the INSERT ignores
+conflicts and only rows that were actually written get room updates and
+pushes.
+
+A failed flush falls back to row-by-row inserts and whatever could not be
+stored stays buffered and is retried with backoff; only messages whose
+room has been deleted are dropped. The buffer lives in memory: it is
+drained when a socket disconnects, on ASGI lifespan shutdown and at
+interpreter exit, but a hard kill loses whatever is still buffered, so
+write-behind is opt-in (CHAT_WRITE_BEHIND).
+"""
+import asyncio
+import atexit
+from collections import OrderedDict
+from typing import Callable
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from apps.chat.models import Chat, Room
+from apps.chat.service.room_service import record_messages
+from apps.notifications.service.notification_service import send_push_notification
+
+import logging
+
+db_logger = logging.getLogger("db")
+
+RETRY_MAX_SECONDS = 30
+# Longest a disconnect, read receipt or shutdown waits on a flush
+DRAIN_TIMEOUT_SECONDS = 5
+
+
+def notify_receivers(chats: list[Chat]) -> None:
+    """One push per sender/receiver pair, carrying the latest message."""
+    latest = OrderedDict()
+    for chat in sorted(chats, key=lambda c: c.date):
+        latest[(chat.sender_id, chat.receiver_id)] = chat
+    for chat in latest.values():
+        send_push_notification(
+            title=chat.sender.username,
+            body=chat.text,
+            single_user=True,
+            user=chat.receiver,
+        )
+
+
+def _insert(batch: list[Chat]) -> list[Chat]:
+    with transaction.atomic():
+        # Lock the rooms before inserting: stored_at is then taken in commit
+        # order within a room, so a `since` cursor cannot pass a row that is
+        # still being written.
+        list(
+            Room.objects.select_for_update()
+            .filter(pk__in={c.room_id_id for c in batch})
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        Chat.objects.bulk_create(batch, ignore_conflicts=True)
+        # ignore_conflicts reports nothing back; our client-side pks tell
+        # which rows made it in.
+        written = set(
+            Chat.objects.filter(pk__in=[c.pk for c in batch]).values_list("pk", flat=True)
+        )
+        created = [c for c in batch if c.pk in written]
+        if created:
+            record_messages(created)
+            transaction.on_commit(lambda: notify_receivers(created))
+    return created
+
+
+def _room_exists(chat: Chat) -> bool:
+    try:
+        return Room.objects.filter(pk=chat.room_id_id).exists()
+    except Exception:
+        return True  # can't tell (database down): keep the message
+
+
+def persist_messages(chats: list[Chat]) -> tuple[list[Chat], list[Chat]]:
+    """
+    Insert a batch in one statement, skipping slugs that are already
+    stored. If the statement fails, rows are inserted one at a time so a
+    bad row only holds back itself. Returns (written, failed); failed
+    messages should be retried.
+    """
+    unique = {}
+    for chat in chats:
+        unique.setdefault(chat.slug or chat.pk, chat)
+    batch = list(unique.values())
+
+    try:
+        return _insert(batch), []
+    except Exception as e:
+        print(f"[CHAT][FLUSH] Batch of {len(batch)} failed, inserting one by one • {e}")
+
+    written, failed = [], []
+    for chat in batch:
+        try:
+            written += _insert([chat])
+            continue
+        except Exception as e:
+            error = e
+        if not _room_exists(chat):
+            # The room (or one of its users) was deleted; the message
+            # would have been deleted with it.
+            db_logger.warning(f"[CHAT][FLUSH] Dropped message for deleted room • slug={chat.slug}")
+            continue
+        db_logger.error(f"[CHAT][FLUSH] Message not stored, will retry • slug={chat.slug} • {error}")
+        failed.append(chat)
+    return written, failed
+
+
+def _persist_in_thread(chats: list[Chat]) -> tuple[list[Chat], list[Chat]]:
+    try:
+        return persist_messages(chats)
+    finally:
+        # Flush threads keep their own connections; drop them as a request would.
+        close_old_connections()
+
+
+_persist = sync_to_async(_persist_in_thread, thread_sensitive=False)
+
+
+class MessageBuffer:
+    def __init__(self):
+        self._messages: list[Chat] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._timer_loop = None
+        self._flushing: dict[asyncio.Task, list[Chat]] = {}
+
+    def __len__(self):
+        return len(self._messages)
+
+    async def add(self, chat: Chat, owner: str | None = None) -> None:
+        """Buffer `chat`; `owner` (a channel name) lets drain() pick it out."""
+        chat._buffer_owner = owner
+        self._messages.append(chat)
+        if len(self._messages) >= settings.CHAT_BUFFER_MAX_MESSAGES:
+            self._start_flush()
+        else:
+            self._schedule()
+
+    def _schedule(self, delay: float | None = None) -> None:
+        loop = asyncio.get_running_loop()
+        if self._timer is None or self._timer_loop is not loop:
+            if delay is None:
+                delay = settings.CHAT_BUFFER_FLUSH_MS / 1000
+            self._timer = loop.call_later(delay, self._start_flush)
+            self._timer_loop = loop
+
+    def _take(self, match: Callable[[Chat], bool] | None = None) -> list[Chat]:
+        if match is None:
+            batch, self._messages = self._messages, []
+        else:
+            batch = [c for c in self._messages if match(c)]
+            self._messages = [c for c in self._messages if not match(c)]
+        if not self._messages and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _start_flush(self, match: Callable[[Chat], bool] | None = None) -> None:
+        batch = self._take(match)
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._flush(batch))
+        self._flushing[task] = batch
+        task.add_done_callback(lambda t: self._flushing.pop(t, None))
+
+    async def _flush(self, batch: list[Chat]) -> None:
+        try:
+            created, failed = await _persist(batch)
+        except Exception as e:
+            created, failed = [], batch
+            db_logger.error(f"[CHAT][FLUSH] Failed • {len(batch)} message(s) • {e}")
+        print(f"[CHAT][FLUSH] Stored {len(created)}/{len(batch)} message(s)")
+        if failed:
+            self._requeue(failed)
+
+    def _requeue(self, failed: list[Chat]) -> None:
+        """Put unsaved messages back; retries back off up to RETRY_MAX_SECONDS."""
+        attempts = 0
+        for chat in failed:
+            chat._flush_attempts = getattr(chat, "_flush_attempts", 0) + 1
+            attempts = max(attempts, chat._flush_attempts)
+        self._messages[:0] = failed
+        delay = min(settings.CHAT_BUFFER_FLUSH_MS / 1000 * 2**attempts, RETRY_MAX_SECONDS)
+        self._schedule(delay)
+
+    async def drain(
+        self,
+        match: Callable[[Chat], bool] | None = None,
+        timeout: float = DRAIN_TIMEOUT_SECONDS,
+    ) -> bool:
+        """
+        Write the buffered messages `match` selects (all when None) and wait
+        for flushes holding any of them, for at most `timeout` seconds.
+        One pass: messages that fail stay buffered for the retry timer.
+        Returns False if the wait timed out.
+        """
+        self._start_flush(match)
+        tasks = [
+            task
+            for task, batch in self._flushing.items()
+            if match is None or any(match(c) for c in batch)
+        ]
+        if not tasks:
+            return True
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        return not pending
+
+    async def drain_owner(self, owner: str) -> bool:
+        return await self.drain(lambda c: c._buffer_owner == owner)
+
+    async def drain_room(self, room_id) -> bool:
+        return await self.drain(lambda c: c.room_id_id == room_id)
+
+    def holds_room(self, room_id) -> bool:
+        return any(c.room_id_id == room_id for c in list(self._messages)) or any(
+            c.room_id_id == room_id for batch in list(self._flushing.values()) for c in batch
+        )
+
+    def drain_sync(self) -> None:
+        """drain() for interpreter exit, when no event loop is running."""
+        batch = self._take()
+        if batch:
+            created, failed = persist_messages(batch)
+            print(f"[CHAT][FLUSH] Stored {len(created)}/{len(batch)} message(s) at exit")
+            for chat in failed:
+                db_logger.error(f"[CHAT][FLUSH] Lost at exit • slug={chat.slug} • room={chat.room_id_id}")
+
+
+chat_buffer = MessageBuffer()
+atexit.register(chat_buffer.drain_sync)
+
+
+def flush_room(room_id) -> None:
+    """
+    For sync callers (HTTP views): write this process's buffered messages
+    for the room before reading it. Under ASGI this runs on the server's
+    event loop; elsewhere nothing is ever buffered.
+    """
+    if settings.CHAT_WRITE_BEHIND and chat_buffer.holds_room(room_id):
+        async_to_sync(chat_buffer.drain_room)(room_id)
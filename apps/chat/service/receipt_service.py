@@ -0,0 +1,55 @@
+"""
+Read receipts as a high-water mark.
+
+Opening a room marks everything the reader received up to one message as
+seen with a single UPDATE, and the room gets one "read_receipt" event
+carrying that message's (date, slug). Clients mark every message they sent
+at or before that point as seen locally.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from apps.chat.models import Chat
+from apps.chat.service.room_service import mark_read
+
+
+def room_group_name(room_id) -> str:
+    return f"chat_{room_id}"
+
+
+def mark_seen_up_to(
+    room_id, reader_id, slug: str | None = None, unstored_ok: bool = False
+) -> dict | None:
+    """
+    Mark the reader's unseen messages in the room up to and including the
+    message `slug` (the newest message when None) as seen. Returns the
+    read_receipt event to publish, or None if the message does not exist.
+
+    With `unstored_ok` (write-behind, where `slug` may still be buffered in
+    another process), an unknown slug marks up to the newest stored message.
+    """
+    chats = Chat.objects.filter(room_id=room_id)
+    newest = chats.order_by("-date", "-id")
+    anchor = (newest.filter(slug=slug) if slug else newest).first()
+    if anchor is None and slug and unstored_ok:
+        anchor = newest.first()
+    if anchor is None:
+        return None
+
+    with transaction.atomic():
+        updated = (
+            chats.filter(receiver_id=reader_id, has_seen=False)
+            .filter(Q(date__lt=anchor.date) | Q(date=anchor.date, id__lte=anchor.id))
+            .update(has_seen=True)
+        )
+        mark_read(room_id, reader_id, updated)
+    print(f"[CHAT][SEEN] room={room_id} • reader={reader_id} • marked={updated}")
+    return {
+        "type": "broadcast_message",
+        "event": "read_receipt",
+        "reader": str(reader_id),
+        "slug": anchor.slug,
+        "date": anchor.date.isoformat(),
+        "has_seen": True,
+        "count": updated,
+    }
@@ -0,0 +1,73 @@
+"""
+Inbox summary on Room: last message time and preview, and an unread
+counter per participant. Each change is a single UPDATE with F()
+expressions, so concurrent senders and readers never overwrite each other.
+"""
+from collections import Counter, defaultdict
+from typing import Iterable
+
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.db.models.functions import Greatest
+
+from apps.chat.models import Chat, Room
+
+PREVIEW_LENGTH = 120
+
+
+def _add_per_participant(field: str, column: str, counts: Counter):
+    """F(column) + the count for whichever user sits in `field`."""
+    return F(column) + Case(
+        *(When(**{field: user_id}, then=Value(n)) for user_id, n in counts.items()),
+        default=Value(0),
+    )
+
+
+def record_messages(chats: Iterable[Chat]) -> None:
+    """
+    Fold new messages into their rooms: one UPDATE per room. The preview
+    only moves forward, so late or out-of-order batches never replace a
+    newer last message.
+    """
+    by_room = defaultdict(list)
+    for chat in chats:
+        by_room[chat.room_id_id].append(chat)
+
+    for room_id, messages in by_room.items():
+        latest = max(messages, key=lambda c: (c.date, str(c.pk)))
+        unread = Counter(c.receiver_id for c in messages)
+        newer = When(last_message_at__lte=latest.date, then=Value(latest.date))
+        Room.objects.filter(pk=room_id).update(
+            last_message_at=Case(newer, default=F("last_message_at")),
+            last_message_preview=Case(
+                When(
+                    last_message_at__lte=latest.date,
+                    then=Value(latest.text[:PREVIEW_LENGTH]),
+                ),
+                default=F("last_message_preview"),
+            ),
+            sender_unread=_add_per_participant("sender_id", "sender_unread", unread),
+            receiver_unread=_add_per_participant("receiver_id", "receiver_unread", unread),
+        )
+
+
+def _decrement(column: str, count: int):
+    """F(column) - count, floored at zero."""
+    return Greatest(F(column) - count, Value(0))
+
+
+def mark_read(room_id, reader_id, count: int) -> None:
+    """Take `count` newly seen messages off the reader's unread counter."""
+    if not count:
+        return
+    Room.objects.filter(pk=room_id).update(
+        sender_unread=Case(
+            When(sender_id=reader_id, then=_decrement("sender_unread", count)),
+            default=F("sender_unread"),
+            output_field=PositiveIntegerField(),
+        ),
+        receiver_unread=Case(
+            When(receiver_id=reader_id, then=_decrement("receiver_unread", count)),
+            default=F("receiver_unread"),
+            output_field=PositiveIntegerField(),
+        ),
+    )
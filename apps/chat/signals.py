@@ -1,12 +1,12 @@
 from django.db.models.signals import post_save
+from django.db import transaction
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from apps.notifications.service.notification_service import (
     send_push_notification,
 )
 from .models import Chat
-import logging
-db_logger = logging.getLogger("db")
+from .service.room_service import record_messages
 
 User = get_user_model()
 
@@ -14,13 +14,14 @@ User = get_user_model()
 @receiver(post_save, sender=Chat)
 def send_signal_on_new_message(sender, created, instance, **kwargs):
     if created:
-        db_logger.info(
-            f"[WS][SIGNAL] New message from {instance.sender} to {instance.receiver}"
+        record_messages([instance])
+        # Queued after commit on the push pool; saving the message never
+        # waits on FCM.
+        transaction.on_commit(
+            lambda: send_push_notification(
+                title=instance.sender.username,
+                body=instance.text,
+                single_user=True,
+                user=instance.receiver,
+            )
         )
-        send_push_notification(
-            title = instance.sender.username,
-            body=instance.text,
-            single_user=True,
-            user= instance.receiver
-        )
-        db_logger.info(f"[WS][SIGNAL] Push notification sent to {instance.receiver}")
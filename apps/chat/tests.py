@@ -1,3 +1,463 @@
-from django.test import TestCase
+import asyncio
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.chat.consumers import create_new_message_sync
+from apps.chat.models import Chat, Room
+from apps.chat.routing import websocket_urlpatterns
+from apps.chat.service import message_buffer
+from apps.chat.service.message_buffer import MessageBuffer, persist_messages
+from apps.chat.service.room_service import mark_read, record_messages
+from apps.users.models import User
+
+CHAT_TEST_SETTINGS = dict(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    FCM_PUSH_ASYNC=False,
+)
+
+
+class ChatFixtureMixin:
+    def setUp(self):
+        self.alice = User.objects.create_user(
+            email="alice@example.com", username="alice", password="password"
+        )
+        self.bob = User.objects.create_user(
+            email="bob@example.com", username="bob", password="password"
+        )
+        self.room = Room.objects.create(sender=self.alice, receiver=self.bob)
+
+    def message(self, slug, room=None, **fields):
+        fields.setdefault("text", f"text {slug}")
+        return Chat(
+            room_id=room or self.room,
+            sender=self.alice,
+            receiver=self.bob,
+            slug=slug,
+            **fields,
+        )
+
+    def stored(self):
+        return sorted(Chat.objects.values_list("slug", flat=True))
+
+
+# Flushes run in worker threads, so the rows must be committed to be seen.
+@override_settings(
+    **CHAT_TEST_SETTINGS,
+    CHAT_WRITE_BEHIND=True,
+    CHAT_BUFFER_MAX_MESSAGES=3,
+    CHAT_BUFFER_FLUSH_MS=20,
+)
+class MessageBufferTests(ChatFixtureMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.buffer = MessageBuffer()
+
+    async def _settle(self):
+        """Wait until the timer has fired and every flush has finished."""
+        for _ in range(200):
+            if not len(self.buffer) and not self.buffer._flushing:
+                return
+            await asyncio.sleep(0.01)
+        self.fail("buffer did not flush")
+
+    def test_flushes_when_full(self):
+        async def scenario():
+            await self.buffer.add(self.message("a"))
+            await self.buffer.add(self.message("b"))
+            self.assertEqual(len(self.buffer), 2)
+            await self.buffer.add(self.message("c"))
+            self.assertEqual(len(self.buffer), 0)
+            await self.buffer.drain()
+
+        asyncio.run(scenario())
+        self.assertEqual(self.stored(), ["a", "b", "c"])
+
+    def test_flushes_after_interval(self):
+        async def scenario():
+            await self.buffer.add(self.message("a"))
+            await self._settle()
+
+        asyncio.run(scenario())
+        self.assertEqual(self.stored(), ["a"])
+
+    def test_duplicate_slugs_are_stored_and_counted_once(self):
+        Chat.objects.create(
+            room_id=self.room, sender=self.alice, receiver=self.bob, text="a", slug="a"
+        )
+
+        async def scenario():
+            for slug in ("a", "b", "b"):
+                await self.buffer.add(self.message(slug))
+            await self.buffer.drain()
+
+        asyncio.run(scenario())
+        self.assertEqual(self.stored(), ["a", "b"])
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.receiver_unread, 2)
+
+    @override_settings(CHAT_BUFFER_FLUSH_MS=10_000)
+    def test_drain_owner_writes_only_that_connections_messages(self):
+        async def scenario():
+            await self.buffer.add(self.message("mine"), owner="socket-1")
+            await self.buffer.add(self.message("theirs"), owner="socket-2")
+            self.assertTrue(await self.buffer.drain_owner("socket-1"))
+            self.assertEqual(len(self.buffer), 1)
+
+        asyncio.run(scenario())
+        self.assertEqual(self.stored(), ["mine"])
+
+    def test_drain_wait_is_bounded(self):
+        async def slow_persist(batch):
+            await asyncio.sleep(5)
+            return batch, []
+
+        async def scenario():
+            with mock.patch.object(message_buffer, "_persist", slow_persist):
+                await self.buffer.add(self.message("a"))
+                start = time.monotonic()
+                finished = await self.buffer.drain(timeout=0.05)
+                return finished, time.monotonic() - start
+
+        finished, waited = asyncio.run(scenario())
+        self.assertFalse(finished)
+        self.assertLess(waited, 1)
+
+    def test_failed_rows_stay_buffered_and_are_retried(self):
+        real_insert = message_buffer._insert
+
+        def flaky_insert(batch):
+            if any(chat.slug == "bad" for chat in batch):
+                raise DatabaseError("boom")
+            return real_insert(batch)
+
+        async def scenario():
+            with mock.patch.object(message_buffer, "_insert", flaky_insert):
+                await self.buffer.add(self.message("good"))
+                await self.buffer.add(self.message("bad"))
+                await self.buffer.drain()
+                # Only the bad row is held back, and it is kept for a retry
+                self.assertEqual(len(self.buffer), 1)
+            await self.buffer.drain()
+            self.assertEqual(len(self.buffer), 0)
+
+        asyncio.run(scenario())
+        self.assertEqual(self.stored(), ["bad", "good"])
+
+    def test_messages_for_deleted_rooms_are_dropped(self):
+        other = Room.objects.create(sender=self.bob, receiver=self.alice)
+        orphan = self.message("orphan", room=other)
+        Room.objects.filter(pk=other.pk).delete()
+
+        written, failed = persist_messages([self.message("kept"), orphan])
+
+        self.assertEqual([chat.slug for chat in written], ["kept"])
+        self.assertEqual(failed, [])
+        self.assertEqual(self.stored(), ["kept"])
+
+
+@override_settings(**CHAT_TEST_SETTINGS)
+# The consumer's DB helpers run in worker threads, so rows must be committed.
+@override_settings(**CHAT_TEST_SETTINGS, CHAT_WRITE_BEHIND=False)
+class ChatRoomConsumerTests(ChatFixtureMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.carol = User.objects.create_user(
+            email="carol@example.com", username="carol", password="password"
+        )
+
+    async def connect(self, user, room=None):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f"/ws/chat/{room or self.room.pk}/"
+        )
+        communicator.scope["user"] = user
+        connected, code = await communicator.connect()
+        return communicator, connected, code
+
+    def test_non_member_is_rejected(self):
+        async def scenario():
+            _, connected, code = await self.connect(self.carol)
+            self.assertFalse(connected)
+            self.assertEqual(code, 4403)
+
+        asyncio.run(scenario())
+
+    def test_unknown_room_is_rejected(self):
+        async def scenario():
+            _, connected, code = await self.connect(self.alice, room="not-a-room")
+            self.assertFalse(connected)
+            self.assertEqual(code, 4403)
+
+        asyncio.run(scenario())
+
+    def test_member_message_is_stored_and_broadcast(self):
+        async def scenario():
+            alice, connected, _ = await self.connect(self.alice)
+            self.assertTrue(connected)
+            bob, connected, _ = await self.connect(self.bob)
+            self.assertTrue(connected)
+
+            # The sender comes from the connection, not the payload
+            await bob.send_json_to(
+                {"text": "hi", "slug": "m1", "sender": str(self.carol.pk)}
+            )
+            for communicator in (alice, bob):
+                event = await communicator.receive_json_from(timeout=5)
+                self.assertEqual(event["slug"], "m1")
+                self.assertEqual(event["sender"], str(self.bob.pk))
+                self.assertEqual(event["receiver"], str(self.alice.pk))
+            await alice.disconnect()
+            await bob.disconnect()
+
+        asyncio.run(scenario())
+
+        chat = Chat.objects.get(slug="m1")
+        self.assertEqual((chat.sender_id, chat.receiver_id), (self.bob.pk, self.alice.pk))
+
+    def test_receiver_outside_the_room_is_ignored(self):
+        async def scenario():
+            alice, _, _ = await self.connect(self.alice)
+            await alice.send_json_to(
+                {"text": "hi", "slug": "m1", "receiver": str(self.carol.pk)}
+            )
+            self.assertTrue(await alice.receive_nothing(timeout=0.5))
+            await alice.disconnect()
+
+        asyncio.run(scenario())
+
+        self.assertFalse(Chat.objects.exists())
+
+
+@override_settings(**CHAT_TEST_SETTINGS)
+class UpdateHasSeenTests(ChatFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for slug in ("one", "two"):
+            self.message(slug).save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.bob)
+        self.url = f"/api/chats/update_has_seen/{self.room.id}/{self.alice.id}/"
+
+    def test_unknown_message_is_404(self):
+        response = self.client.post(self.url, {"up_to": "later"}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(CHAT_WRITE_BEHIND=True)
+    def test_unstored_message_marks_up_to_newest_stored_under_write_behind(self):
+        # "later" may still be buffered in another process
+        response = self.client.post(self.url, {"up_to": "later"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 2)
+        self.assertFalse(Chat.objects.filter(has_seen=False).exists())
+
+
+@override_settings(**CHAT_TEST_SETTINGS)
+class ChatHistoryPaginationTests(ChatFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.start = timezone.now() - timedelta(hours=1)
+        for n in range(5):
+            self.message(f"m{n}", date=self.start + timedelta(minutes=n)).save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+        self.url = f"/api/chats/room/{self.room.id}/{self.bob.id}/"
+
+    def get(self, url=None, **params):
+        response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def slugs(self, data):
+        return [chat["slug"] for chat in data["old_chats"]]
+
+    def test_pages_walk_back_and_are_shown_oldest_first(self):
+        first = self.get(page_size=2)
+        older = self.get(first["next"])
+        oldest = self.get(older["next"])
+
+        self.assertEqual(self.slugs(first), ["m3", "m4"])
+        self.assertEqual(self.slugs(older), ["m1", "m2"])
+        self.assertEqual(self.slugs(oldest), ["m0"])
+        self.assertIsNone(oldest["next"])
+
+    def test_only_the_newest_page_has_latest(self):
+        first = self.get(page_size=2)
+        older = self.get(first["next"])
+
+        self.assertIsNotNone(first["latest"])
+        self.assertIsNone(older["latest"])
+
+    def test_since_latest_returns_only_later_writes(self):
+        latest = self.get()["latest"]
+        self.assertEqual(self.slugs(self.get(since=latest)), [])
+
+        # Written last but dated first, as a buffered message can be
+        self.message("late", date=self.start - timedelta(minutes=5)).save()
+        self.message("new").save()
+        delta = self.get(since=latest)
+
+        self.assertEqual(self.slugs(delta), ["late", "new"])
+        self.assertEqual(self.slugs(self.get(since=delta["latest"])), [])
+
+    def test_since_pages_follow_write_order(self):
+        latest = self.get()["latest"]
+        for n in range(3):
+            self.message(f"n{n}").save()
+
+        first = self.get(since=latest, page_size=2)
+        rest = self.get(first["next"])
+
+        self.assertEqual(self.slugs(first) + self.slugs(rest), ["n0", "n1", "n2"])
+        self.assertIsNone(rest["next"])
+
+    def test_malformed_since_is_404(self):
+        response = self.client.get(self.url, {"since": "garbage"})
+
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(**CHAT_TEST_SETTINGS)
+class RoomInboxTests(ChatFixtureMixin, TestCase):
+    def reply(self, slug, **fields):
+        chat = self.message(slug, **fields)
+        chat.sender, chat.receiver = self.bob, self.alice
+        return chat
+
+    def refresh(self):
+        self.room.refresh_from_db()
+        return self.room
+
+    def test_unread_counts_go_to_each_receiver(self):
+        record_messages([self.message("a"), self.message("b"), self.reply("c")])
+
+        room = self.refresh()
+        self.assertEqual(room.unread_for(self.bob.pk), 2)
+        self.assertEqual(room.unread_for(self.alice.pk), 1)
+
+    def test_mark_read_is_floored_at_zero(self):
+        record_messages([self.message("a"), self.message("b"), self.reply("c")])
+
+        mark_read(self.room.pk, self.bob.pk, 5)
+
+        room = self.refresh()
+        self.assertEqual(room.unread_for(self.bob.pk), 0)
+        self.assertEqual(room.unread_for(self.alice.pk), 1)
+
+    def test_an_older_batch_does_not_move_the_preview_back(self):
+        now = timezone.now()
+        record_messages([self.message("new", date=now, text="newest")])
+        record_messages([self.message("old", date=now - timedelta(minutes=1), text="late")])
+
+        room = self.refresh()
+        self.assertEqual(room.last_message_preview, "newest")
+        self.assertEqual(room.last_message_at, now)
+        self.assertEqual(room.unread_for(self.bob.pk), 2)
+
+    @override_settings(**CHAT_TEST_SETTINGS)
+    def test_direct_write_updates_the_room_with_the_message(self):
+        self.assertTrue(create_new_message_sync(self.room, self.alice, self.bob, "hi", "d1"))
+
+        room = self.refresh()
+        self.assertEqual(room.last_message_preview, "hi")
+        self.assertEqual(room.unread_for(self.bob.pk), 1)
+
+    @override_settings(**CHAT_TEST_SETTINGS)
+    def test_direct_write_is_undone_if_the_room_update_fails(self):
+        with mock.patch(
+            "apps.chat.signals.record_messages", side_effect=DatabaseError("boom")
+        ):
+            stored = create_new_message_sync(self.room, self.alice, self.bob, "hi", "d1")
+
+        self.assertFalse(stored)
+        self.assertFalse(Chat.objects.exists())
+        self.assertEqual(self.refresh().unread_for(self.bob.pk), 0)
+
+    def test_inbox_lists_rooms_by_latest_activity(self):
+        carol = User.objects.create_user(
+            email="carol@example.com", username="carol", password="password"
+        )
+        rooms = [self.room] + [
+            Room.objects.create(sender=user, receiver=self.alice)
+            for user in (carol, self.bob)
+        ]
+        now = timezone.now()
+        for minutes, room in zip((5, 1, 3), rooms):
+            Room.objects.filter(pk=room.pk).update(
+                last_message_at=now - timedelta(minutes=minutes)
+            )
+        client = APIClient()
+        client.force_authenticate(self.alice)
+
+        seen, url = [], "/api/chats/?page_size=2"
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row["room_id"] for row in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(seen, [rooms[i].pk for i in (1, 2, 0)])
+
+
+class InboxBackfillMigrationTests(TransactionTestCase):
+    """0007 fills the inbox summary of rooms that predate it."""
+
+    before = [("chat", "0006_room_inbox_summary")]
+    after = [("chat", "0007_backfill_room_inbox_summary")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        super().tearDown()
+
+    def test_backfill(self):
+        alice, bob = (
+            User.objects.create_user(
+                email=f"{name}@example.com", username=name, password="password"
+            ).pk
+            for name in ("alice", "bob")
+        )
+        old = self.migrate(self.before)
+        Room = old.get_model("chat", "Room")
+        Chat = old.get_model("chat", "Chat")
+        room = Room.objects.create(sender_id=alice, receiver_id=bob)
+        empty = Room.objects.create(sender_id=bob, receiver_id=alice)
+        now = timezone.now()
+        for n, (sender, receiver, seen) in enumerate(
+            [(alice, bob, False), (alice, bob, True), (bob, alice, False), (alice, bob, False)]
+        ):
+            chat = Chat.objects.create(
+                room_id=room,
+                sender_id=sender,
+                receiver_id=receiver,
+                text=f"message {n}" + "!" * 200,
+                has_seen=seen,
+            )
+            # `date` is still auto_now_add at 0006
+            Chat.objects.filter(pk=chat.pk).update(date=now + timedelta(minutes=n))
+
+        new = self.migrate(self.after)
+
+        Room = new.get_model("chat", "Room")
+        room = Room.objects.get(pk=room.pk)
+        self.assertEqual(room.last_message_at, now + timedelta(minutes=3))
+        self.assertEqual(room.last_message_preview, ("message 3" + "!" * 200)[:120])
+        self.assertEqual((room.sender_unread, room.receiver_unread), (1, 2))
+        empty = Room.objects.get(pk=empty.pk)
+        self.assertEqual(empty.last_message_at, empty.created)
+        self.assertEqual((empty.sender_unread, empty.receiver_unread), (0, 0))
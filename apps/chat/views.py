@@ -2,12 +2,16 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
 from django.db.models import Q
 from apps.chat.models import Room, Chat
-from .serializers import RoomSerializer, ChatSerializer
+from .serializers import RoomSerializer, ChatMessageSerializer
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from apps.users.models import User
+from apps.chat.service.message_buffer import flush_room
+from apps.chat.service.receipt_service import mark_seen_up_to, room_group_name
+from cortanae.generic_utils.pagination_utils import ChatHistoryPagination, InboxPagination
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes, OpenApiExample ,OpenApiResponse
@@ -15,26 +19,41 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes,
 
 class RoomListAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = InboxPagination
     
     @extend_schema(
         tags=["Chat"],
         summary="List my chat rooms",
-        description="Returns all rooms where the authenticated user is either the sender or the receiver.",
+        description=(
+            "Rooms where the authenticated user is either the sender or the receiver, "
+            "most recent activity first, with the last message and the caller's unread count. "
+            "Follow `next` for older rooms."
+        ),
+        parameters=[
+            OpenApiParameter(name="cursor", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name="page_size", type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False),
+        ],
         responses=OpenApiResponse(
             response=RoomSerializer(many=True),
             examples=[
                 OpenApiExample(
                     name="RoomsExample",
                     summary="Typical list response",
-                    value=[
-                        {
-                            "room_id": "e7f9b554-0f0d-3dbd-e8b1-ae226206aa67",
-                            "sender": {"id": "e7f9b554-0f0d-3dbd-e8b1-ae226206aa67", "first_name": "Tester", "last_name": ""},
-                            "receiver": {"id": "e7f9b554-0f0d-3dbd-e8b1-ae226206aa67", "first_name": "Admin", "last_name": ""},
-                            "created": "2025-08-20T13:00:00Z",
-                            "updated": "2025-08-28T20:40:12Z"
-                        }
-                    ]
+                    value={
+                        "next": None,
+                        "results": [
+                            {
+                                "room_id": "e7f9b554-0f0d-3dbd-e8b1-ae226206aa67",
+                                "sender": {"id": "e7f9b554-0f0d-3dbd-e8b1-ae226206aa67", "first_name": "Tester", "last_name": ""},
+                                "receiver": {"id": "e7f9b554-0f0d-3dbd-e8b1-ae226206aa67", "first_name": "Admin", "last_name": ""},
+                                "created_at": "2025-08-20T13:00:00Z",
+                                "updated_at": "2025-08-28T20:40:12Z",
+                                "last_message_at": "2025-08-28T20:40:12Z",
+                                "last_message_preview": "Your card has been shipped",
+                                "unread_count": 2
+                            }
+                        ],
+                    },
                 )
             ],  
         ),
@@ -43,31 +62,56 @@ class RoomListAPIView(APIView):
     def get(self, request, *args, **kwargs):
         all_rooms = Room.objects.filter(
             Q(sender=request.user) | Q(receiver=request.user)
-        ).order_by("-created")
+        ).select_related("sender", "receiver")
 
-        serializer = RoomSerializer(all_rooms, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(all_rooms, request, view=self)
+        serializer = RoomSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
 
 
 class RoomAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = ChatHistoryPagination
 
+    @extend_schema(
+        tags=["Chat"],
+        summary="Room message history",
+        description=(
+            "Newest page of the room's messages, oldest first. Follow `next` for "
+            "older pages; pass `latest` back as `since` to fetch only newer messages."
+        ),
+        parameters=[
+            OpenApiParameter(name="cursor", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name="since", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name="page_size", type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False),
+        ],
+    )
     def get(self, request, room_id, receiver_id, *args, **kwargs):
         try:
-            room_instance = Room.objects.get(id=room_id)
+            room_instance = Room.objects.select_related("sender", "receiver").get(id=room_id)
         except Room.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        chats = Chat.objects.filter(room_id=room_instance).order_by("date")
+        flush_room(room_instance.pk)
+        paginator = self.pagination_class()
+        chats = paginator.paginate_queryset(
+            Chat.objects.filter(room_id=room_instance), request, view=self
+        )
+        chat_serializer = ChatMessageSerializer(chats, many=True)
 
-        chat_serializer = ChatSerializer(chats, many=True)
+        # The receiver is normally one of the room's participants
+        receiver = next(
+            (u for u in (room_instance.sender, room_instance.receiver) if u.pk == receiver_id),
+            None,
+        ) or get_object_or_404(User, pk=receiver_id)
 
         context = {
             "old_chats": chat_serializer.data,
+            "next": paginator.get_next_link(),
+            "latest": paginator.get_latest_cursor(),
             "my_name": request.user.first_name,
-            "receiver_name": get_object_or_404(
-                User, pk=receiver_id
-            ).first_name,
+            "receiver_name": receiver.first_name,
             "room_id": room_id,
         }
         return Response(context, status=status.HTTP_200_OK)
@@ -112,7 +156,7 @@ class GetORCreateChatRoomView(APIView):
         if not room:
             room = Room.objects.create(sender=request.user, receiver=receiver)
 
-        serializer = RoomSerializer(room, many=False)
+        serializer = RoomSerializer(room, many=False, context={"request": request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -120,44 +164,46 @@ class GetORCreateChatRoomView(APIView):
 class UpdateHasSeenAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @extend_schema(
+        tags=["Chat"],
+        summary="Mark messages seen",
+        description=(
+            "Marks the caller's received messages in the room as seen, up to and "
+            "including `up_to` (a message slug; defaults to the newest message), and "
+            "sends one read_receipt event to the room."
+        ),
+    )
     def post(self, request, room_id, receiver_id):
         try:
-            try:
-                room_instance = Room.objects.get(id=room_id)
-            except Room.DoesNotExist:
+            if not Room.objects.filter(id=room_id).exists():
                 return Response(status=status.HTTP_404_NOT_FOUND)
 
-            channel_layer = get_channel_layer()
-            room_group_name = "chat_%s" % room_id
-
-            # Your logic to validate the room and receiver goes here
-            chats = Chat.objects.filter(
-                room_id=room_instance, has_seen=False
-            ).order_by("-date")
-            receiver_chats = chats.filter(
-                Q(sender=receiver_id) | Q(receiver=receiver_id)
+            up_to = request.data.get("up_to")
+            flush_room(room_id)
+            event = mark_seen_up_to(
+                room_id, request.user.id, up_to, unstored_ok=settings.CHAT_WRITE_BEHIND
             )
-            print("receiver_chats", receiver_chats)
-            for chat in receiver_chats:
-                message = {
-                    "type": "chatroom_message",
-                    "text": chat.text,
-                    "receiver": str(chat.receiver.id),
-                    "date": chat.date.isoformat(),
-                    "has_seen": chat.has_seen,
-                    "sender": str(chat.sender.id),
-                    "slug": chat.slug,
-                    "read_receipt": "read_receipt",
-                }
-                chat.has_seen = True  # Update 'has_seen' as needed
-                chat.save()
-                # Send message to the WebSocket consumer
-                async_to_sync(channel_layer.group_send)(
-                    room_group_name, message
+            if event is None:
+                if up_to:
+                    return Response(
+                        {"detail": "Message not found"},
+                        status=status.HTTP_404_NOT_FOUND,
+                    )
+                return Response(
+                    {"detail": "No messages to mark", "up_to": None, "count": 0},
+                    status=status.HTTP_200_OK,
+                )
+            if event["count"]:
+                async_to_sync(get_channel_layer().group_send)(
+                    room_group_name(room_id), event
                 )
 
             return Response(
-                {"detail": "Read receipt sent successfully"},
+                {
+                    "detail": "Read receipt sent successfully",
+                    "up_to": event["slug"],
+                    "count": event["count"],
+                },
                 status=status.HTTP_200_OK,
             )
 
@@ -0,0 +1,68 @@
+from django.contrib import admin, messages
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
+
+from .models import AdminJob
+from .service.job_service import enqueue_job, requeue_failed, throughput
+
+
+def queue_admin_job(modeladmin, request, name, queryset, label, params=None):
+    """Queue a job from an admin action and link its progress page."""
+    job = enqueue_job(name, queryset, label=label, params=params, user=request.user)
+    url = reverse("admin:jobs_adminjob_change", args=[job.pk])
+    modeladmin.message_user(
+        request,
+        format_html('Queued "{}" for {} row(s). <a href="{}">Track progress</a>', label, job.total, url),
+        level=messages.SUCCESS,
+    )
+    print(f"[ADMIN] Queued job {name} • id={job.id} • total={job.total} • by={request.user}")
+    return job
+
+
+@admin.register(AdminJob)
+class AdminJobAdmin(admin.ModelAdmin):
+    list_display = ("label", "status", "progress", "throughput_display", "created_by", "created_at", "finished_at")
+    list_filter = ("status", "name", "created_at")
+    search_fields = ("id", "label", "name")
+    ordering = ("-created_at",)
+    fields = (
+        "label", "name", "status", "progress", "throughput_display", "params",
+        "created_by", "created_at", "started_at", "heartbeat_at", "finished_at", "errors_display",
+    )
+    readonly_fields = fields
+    actions = ("requeue_jobs",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Progress")
+    def progress(self, obj: AdminJob):
+        pct = int(100 * obj.done / obj.total) if obj.total else 100
+        return format_html(
+            '<div style="width:160px;background:#eee;border-radius:4px;">'
+            '<div style="width:{}%;background:#2aa198;color:white;padding:0 4px;border-radius:4px;">{}%</div>'
+            "</div>{} ok • {} failed • {} total",
+            pct, pct, obj.processed, obj.failed, obj.total,
+        )
+
+    @admin.display(description="Rows / sec")
+    def throughput_display(self, obj: AdminJob):
+        rate = throughput(obj)
+        return f"{rate:.1f}" if rate is not None else "-"
+
+    @admin.display(description="Errors")
+    def errors_display(self, obj: AdminJob):
+        if not obj.errors:
+            return "-"
+        return format_html_join(
+            "", "<p><code>{}</code> ({} row(s)) {}</p>",
+            ((", ".join(e.get("ids", [])), e.get("count", 0), e.get("error", "")) for e in obj.errors),
+        )
+
+    @admin.action(description="Re-run failed chunks of selected jobs")
+    def requeue_jobs(self, request, queryset):
+        updated = requeue_failed(queryset)
+        self.message_user(request, f"{updated} job(s) re-queued.")
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.jobs.service.job_service import run_pending
+
+
+class Command(BaseCommand):
+    help = "Run queued admin jobs (bulk admin actions) in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.ADMIN_JOB_POLL_INTERVAL,
+            help="Seconds to sleep when no job is queued.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run what is queued now and exit.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("[JOBS] Worker started")
+        while True:
+            count = run_pending()
+            if count:
+                self.stdout.write(f"[JOBS] Ran {count} job(s)")
+            if options["once"]:
+                break
+            time.sleep(options["poll_interval"])
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 21:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="adminjob",
+            name="failed_chunks",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
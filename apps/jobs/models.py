@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.db import models
+
+from cortanae.generic_utils.models_utils import BaseModelMixin
+
+
+class JobStatus(models.TextChoices):
+    QUEUED = "queued", "Queued"
+    RUNNING = "running", "Running"
+    DONE = "done", "Done"
+    FAILED = "failed", "Failed"
+
+
+class AdminJob(BaseModelMixin):
+    """
+    A long admin operation over a set of rows, run in chunks by
+    `manage.py run_admin_jobs` instead of inside the admin request.
+    """
+
+    name = models.CharField(max_length=100)  # handler key, see job_service.register
+    label = models.CharField(max_length=255)
+    params = models.JSONField(default=dict, blank=True)
+    object_ids = models.JSONField(default=list, blank=True)
+    chunk_size = models.PositiveIntegerField(default=200)
+    status = models.CharField(
+        max_length=16, choices=JobStatus.choices, default=JobStatus.QUEUED
+    )
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    # Offsets into object_ids of the chunks that failed; a requeued job
+    # re-runs just these
+    failed_chunks = models.JSONField(default=list, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="admin_jobs",
+    )
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Bumped after every chunk; a running job whose heartbeat goes stale
+    # is picked up again by another worker.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.label} • {self.status} • {self.done}/{self.total}"
+
+    @property
+    def done(self) -> int:
+        return self.processed + self.failed
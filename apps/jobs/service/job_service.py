@@ -0,0 +1,184 @@
+"""
+Admin jobs: an admin action stores the selected ids in an AdminJob row and
+returns at once; `manage.py run_admin_jobs` works through them in chunks,
+recording progress after each one.
+"""
+from datetime import timedelta
+from typing import Any, Callable, Iterable
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.jobs.models import AdminJob, JobStatus
+
+import logging
+
+db_logger = logging.getLogger("db")
+
+HANDLERS: dict[str, Callable[..., Any]] = {}
+
+# Keep the newest errors only; a job over thousands of bad rows must not
+# grow an unbounded JSON column.
+MAX_ERRORS = 50
+
+
+def register(name: str):
+    """
+    Decorator registering the function that runs one chunk of a job.
+    It is called as handler(ids, **params) and may raise to fail the chunk.
+    """
+
+    def decorator(func):
+        HANDLERS[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue_job(
+    name: str,
+    objects: Iterable,
+    label: str,
+    params: dict[str, Any] | None = None,
+    user=None,
+    chunk_size: int | None = None,
+) -> AdminJob:
+    """Queue `name` over `objects` (a queryset or primary keys)."""
+    if name not in HANDLERS:
+        raise LookupError(f"No job handler registered for '{name}'")
+    if hasattr(objects, "values_list"):
+        objects = objects.order_by().values_list("pk", flat=True)
+    ids = [str(pk) for pk in objects]
+    job = AdminJob.objects.create(
+        name=name,
+        label=label,
+        params=params or {},
+        object_ids=ids,
+        total=len(ids),
+        chunk_size=chunk_size or settings.ADMIN_JOB_CHUNK_SIZE,
+        created_by=user if getattr(user, "pk", None) else None,
+    )
+    print(f"[JOBS] Queued {name} • id={job.id} • total={job.total}")
+    return job
+
+
+def claim_job() -> AdminJob | None:
+    """Take the oldest queued job, or a running one whose worker went quiet."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.ADMIN_JOB_STALE_SECONDS)
+    with transaction.atomic():
+        job = (
+            AdminJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=JobStatus.QUEUED)
+                | Q(status=JobStatus.RUNNING, heartbeat_at__lt=stale)
+            )
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = JobStatus.RUNNING
+        job.started_at = job.started_at or now
+        job.heartbeat_at = now
+        job.save(update_fields=["status", "started_at", "heartbeat_at", "updated_at"])
+    return job
+
+
+def _record_error(job: AdminJob, ids: list[str], exc: Exception) -> None:
+    job.errors = (job.errors + [{"ids": ids[:5], "count": len(ids), "error": str(exc)}])[
+        -MAX_ERRORS:
+    ]
+    db_logger.error(f"[JOBS] {job.name} chunk failed • id={job.id} • {exc}")
+
+
+def run_job(job: AdminJob) -> AdminJob:
+    """
+    Process the remaining chunks of a claimed job. Picks up after the last
+    recorded chunk, so a job taken over from a dead worker is not redone.
+    Once every chunk has run, a requeued job re-runs only the chunks that
+    failed; the ones that went through are never repeated.
+    """
+    handler = HANDLERS.get(job.name)
+    if handler is None:
+        job.errors = [{"error": f"No job handler registered for '{job.name}'"}]
+        job.status = JobStatus.FAILED
+        job.finished_at = timezone.now()
+        job.save(update_fields=["errors", "status", "finished_at", "updated_at"])
+        return job
+
+    retrying = job.done >= job.total
+    if retrying:
+        starts = list(job.failed_chunks)
+    else:
+        starts = range(job.done, job.total, job.chunk_size)
+
+    for start in starts:
+        ids = job.object_ids[start : start + job.chunk_size]
+        ok = failed = 0
+        try:
+            with transaction.atomic():
+                handler(ids, **job.params)
+            ok = len(ids)
+            if retrying:
+                failed = -len(ids)
+                job.failed_chunks.remove(start)
+        except Exception as e:
+            if not retrying:
+                failed = len(ids)
+                job.failed_chunks.append(start)
+            _record_error(job, ids, e)
+        finally:
+            close_old_connections()
+
+        AdminJob.objects.filter(pk=job.pk).update(
+            processed=F("processed") + ok,
+            failed=F("failed") + failed,
+            errors=job.errors,
+            failed_chunks=job.failed_chunks,
+            heartbeat_at=timezone.now(),
+        )
+        job.processed += ok
+        job.failed += failed
+        print(f"[JOBS] {job.name} • id={job.id} • {job.done}/{job.total}")
+
+    job.status = JobStatus.FAILED if job.failed else JobStatus.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "finished_at", "updated_at"])
+    return job
+
+
+def requeue_failed(jobs) -> int:
+    """
+    Queue failed jobs (a queryset) again. Jobs that ran to the end re-run
+    only their failed chunks (see run_job); handlers such as balance
+    resets are not safe to repeat. Returns how many were queued.
+    """
+    return jobs.filter(status=JobStatus.FAILED).update(
+        status=JobStatus.QUEUED,
+        errors=[],
+        finished_at=None,
+        updated_at=timezone.now(),
+    )
+
+
+def run_pending(limit: int | None = None) -> int:
+    """Run queued jobs one after another. Returns how many were run."""
+    count = 0
+    while limit is None or count < limit:
+        job = claim_job()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def throughput(job: AdminJob) -> float | None:
+    """Rows per second since the job started."""
+    if not job.started_at:
+        return None
+    elapsed = ((job.finished_at or timezone.now()) - job.started_at).total_seconds()
+    return job.done / elapsed if elapsed > 0 else None
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from apps.jobs.models import AdminJob, JobStatus
+from apps.jobs.service import job_service
+from apps.jobs.service.job_service import (
+    claim_job,
+    enqueue_job,
+    requeue_failed,
+    run_pending,
+)
+
+
+# run_job() recycles the connection between chunks, as the worker does,
+# so the rows have to be committed
+@override_settings(ADMIN_JOB_STALE_SECONDS=60)
+class AdminJobTests(TransactionTestCase):
+    ids = ["a", "b", "bad", "c", "d", "e"]
+
+    def setUp(self):
+        self.calls = []
+        self.broken = True
+        handlers = mock.patch.dict(job_service.HANDLERS, {"test.record": self.record})
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    def record(self, ids, **params):
+        self.calls.append(list(ids))
+        if self.broken and "bad" in ids:
+            raise ValueError("bad row")
+
+    def run_job(self):
+        job = enqueue_job("test.record", self.ids, label="Record", chunk_size=2)
+        run_pending()
+        job.refresh_from_db()
+        return job
+
+    def test_runs_every_chunk(self):
+        self.broken = False
+
+        job = self.run_job()
+
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual((job.processed, job.failed), (6, 0))
+        self.assertEqual(self.calls, [["a", "b"], ["bad", "c"], ["d", "e"]])
+
+    def test_failed_chunk_is_recorded_and_the_rest_still_run(self):
+        job = self.run_job()
+
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual((job.processed, job.failed), (4, 2))
+        self.assertEqual(job.failed_chunks, [2])
+        self.assertEqual(job.errors[0]["ids"], ["bad", "c"])
+        self.assertIn("bad row", job.errors[0]["error"])
+
+    def test_requeue_reruns_only_the_failed_chunks(self):
+        job = self.run_job()
+        self.calls.clear()
+        self.broken = False
+
+        self.assertEqual(requeue_failed(AdminJob.objects.all()), 1)
+        run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual(self.calls, [["bad", "c"]])
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual((job.processed, job.failed), (6, 0))
+        self.assertEqual(job.failed_chunks, [])
+
+    def test_chunk_failing_again_keeps_the_job_failed(self):
+        job = self.run_job()
+
+        requeue_failed(AdminJob.objects.all())
+        run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual((job.processed, job.failed), (4, 2))
+        self.assertEqual(job.failed_chunks, [2])
+
+    def test_only_failed_jobs_are_requeued(self):
+        self.broken = False
+        self.run_job()
+
+        self.assertEqual(requeue_failed(AdminJob.objects.all()), 0)
+
+    def test_stale_job_resumes_after_its_last_chunk(self):
+        self.broken = False
+        job = enqueue_job("test.record", self.ids, label="Record", chunk_size=2)
+        AdminJob.objects.filter(pk=job.pk).update(
+            status=JobStatus.RUNNING,
+            processed=2,
+            heartbeat_at=timezone.now() - timedelta(minutes=5),
+        )
+
+        self.assertEqual(run_pending(), 1)
+
+        self.assertEqual(self.calls, [["bad", "c"], ["d", "e"]])
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.DONE)
+
+    def test_running_job_with_a_fresh_heartbeat_is_left_alone(self):
+        job = enqueue_job("test.record", self.ids, label="Record")
+        AdminJob.objects.filter(pk=job.pk).update(
+            status=JobStatus.RUNNING, heartbeat_at=timezone.now()
+        )
+
+        self.assertIsNone(claim_job())
+
+    def test_unknown_handler_is_rejected(self):
+        with self.assertRaises(LookupError):
+            enqueue_job("test.missing", self.ids, label="Missing")
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import KYC
+from apps.jobs.admin import queue_admin_job
 
 
 # ---------- Reusable base admin ----------
@@ -91,8 +92,12 @@ class KYCAdmin(BaseStampedAdmin):
 
     # ---- Quick status actions with debug prints ----
     def _bulk_status_update(self, request, queryset, status_value):
-        count = queryset.update(status=status_value)
-        print(f"[ADMIN][KYC] Set status='{status_value}' for {count} record(s) by {request.user}")
+        # Runs in `manage.py run_admin_jobs`; see service/job_handlers.py
+        queue_admin_job(
+            self, request, "kyc.set_status", queryset,
+            label=f"Set KYC status to {status_value}",
+            params={"status": status_value},
+        )
 
     def mark_approved(self, request, queryset):
         self._bulk_status_update(request, queryset, "approved")
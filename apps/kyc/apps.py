@@ -7,3 +7,4 @@ class KycConfig(AppConfig):
 
     def ready(self):
         import apps.kyc.signals
+        import apps.kyc.service.job_handlers
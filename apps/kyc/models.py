@@ -2,11 +2,11 @@ from django.db import models
 from django.conf import settings
 from django_countries.fields import CountryField
 from cloudinary.models import CloudinaryField
-from cortanae.generic_utils.models_utils import BaseModelMixin
+from cortanae.generic_utils.models_utils import BaseModelMixin, TrackedFieldsMixin
 from apps.users.models import User
 
 
-class KYC(BaseModelMixin):
+class KYC(TrackedFieldsMixin, BaseModelMixin):
     ACCOUNT_TYPE = [("savings", "Savings"), ("checking", "Checking")]
     EMPLOYMENT_TYPE = [("unemployed", "Unemployed"), ("employed", "Employed")]
     DOCUMENT_TYPE = [
@@ -15,6 +15,7 @@ class KYC(BaseModelMixin):
         ("driver_license", "Driver license"),
     ]
     STATUS = [("pending", "Pending"), ("approved", "Approved"), ("rejected", "Rejected")]
+    tracked_fields = ("status", "error_message")
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="kyc_profile")
 
@@ -0,0 +1,14 @@
+"""Admin job handlers for KYC; run by `manage.py run_admin_jobs`."""
+from apps.accounts.service.profile_cache_service import invalidate_profiles
+from apps.jobs.service.job_service import register
+from apps.kyc.models import KYC
+
+
+@register("kyc.set_status")
+def set_status(ids, status):
+    records = KYC.objects.filter(pk__in=ids)
+    user_ids = list(records.values_list("user_id", flat=True))
+    count = records.update(status=status)
+    # update() skips post_save, so drop the cached profiles here
+    invalidate_profiles(user_ids)
+    print(f"[JOBS][KYC] Set status='{status}' for {count} record(s)")
@@ -2,15 +2,21 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from apps.notifications.service.notification_service import send_notification
 from apps.kyc.models import KYC
+from apps.accounts.service.profile_cache_service import invalidate_profiles
 from django.utils import timezone
 
 
+@receiver(post_save, sender=KYC)
+def invalidate_kyc_profile(sender, instance: KYC, **kwargs):
+    invalidate_profiles([instance.user_id])
+
+
 @receiver(post_save, sender=KYC)
 def notify_kyc_status_change(sender, instance: KYC, created, **kwargs):
     """
     Notify user when their KYC status changes.
     """
-    if created:
+    if created or not instance.has_changed("status"):
         return
 
     title = "KYC Update"
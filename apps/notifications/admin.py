@@ -1,5 +1,10 @@
+import uuid
+
 from django.contrib import admin
-from .models import Notification, FCMDevice
+from django.utils import timezone
+from .models import Notification, FCMDevice, OutboxEvent, OutboxStatus
+from .service.notification_service import CHANNEL_BROADCAST
+from .service.outbox_service import enqueue_many
 
 # Register your models here.
 @admin.register(Notification)
@@ -9,5 +14,45 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ("title", "content", "user__username", "user__email")
     ordering = ("-created_at",)
     readonly_fields = ("id", "created_at", "updated_at", "read_at")
+    actions = ["broadcast_to_all_users"]
+
+    @admin.action(description="Broadcast selected to all users")
+    def broadcast_to_all_users(self, request, queryset):
+        # Run by the outbox worker; inserting 100k rows does not fit a request.
+        # The broadcast id makes a retried event skip rows already written.
+        enqueue_many(
+            [
+                (
+                    CHANNEL_BROADCAST,
+                    {
+                        "title": n.title,
+                        "content": n.content,
+                        "type": n.type,
+                        "broadcast_id": str(uuid.uuid4()),
+                    },
+                )
+                for n in queryset
+            ]
+        )
+        self.message_user(request, f"{queryset.count()} broadcast(s) queued.")
 
 admin.site.register(FCMDevice)
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "topic", "status", "attempts", "available_at", "processed_at", "created_at")
+    list_filter = ("status", "topic", "created_at")
+    search_fields = ("id", "topic")
+    ordering = ("-created_at",)
+    readonly_fields = ("id", "created_at", "updated_at", "processed_at", "last_error")
+    actions = ["retry_events"]
+
+    @admin.action(description="Retry selected events now")
+    def retry_events(self, request, queryset):
+        updated = queryset.exclude(status=OutboxStatus.DONE).update(
+            status=OutboxStatus.PENDING,
+            attempts=0,
+            available_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} event(s) re-queued.")
@@ -7,3 +7,4 @@ class NotificationsConfig(AppConfig):
     
     def ready(self):
         import apps.notifications.signals
+        import apps.notifications.service.channel_handlers
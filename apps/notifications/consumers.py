@@ -3,6 +3,8 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from django.contrib.auth.models import AnonymousUser
 import json
 
+from apps.notifications.service.broadcast_service import BROADCAST_GROUP
+
 
 class NotificationConsumer(AsyncWebsocketConsumer):
 
@@ -23,6 +25,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             await self.channel_layer.group_add(
                 self.group_name, self.channel_name
             )
+            # System/promotion broadcasts reach every client in one send
+            await self.channel_layer.group_add(
+                BROADCAST_GROUP, self.channel_name
+            )
             await self.accept()
 
         except Exception as e:
@@ -49,3 +55,6 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             await self.channel_layer.group_discard(
                 self.group_name, self.channel_name
             )
+            await self.channel_layer.group_discard(
+                BROADCAST_GROUP, self.channel_name
+            )
@@ -0,0 +1,92 @@
+import os
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from apps.accounts.models import Account
+from apps.users.models import User
+from cortanae.generic_utils.template_utils import clear_cache, get_template, prepare
+
+
+def _sample_content() -> dict:
+    """Unsaved objects shaped like the context the notification code builds."""
+    user = User(first_name="Ada", last_name="Lovelace", username="ada", email="ada@example.com")
+    source = Account(account_name="Ada Checking", checking_balance=Decimal("1200.00"))
+    destination = Account(account_name="Grace Savings", savings_balance=Decimal("90.00"))
+    return {
+        "user": user,
+        "current_year": timezone.now().year,
+        "amount": Decimal("250.00"),
+        "currency": "USD",
+        "reference": "TRX01HZX3Q8K4N2A0000",
+        "title": "Transfer Successful",
+        "message": "Your transfer of 250.00 has been completed.",
+        "account_name": source.account_name,
+        "account_type": "checking",
+        "source_account": source,
+        "destination_account": destination,
+        "beneficiary_name": "Grace Hopper",
+        "beneficiary_bank_name": "First Bank",
+        "new_balance": Decimal("950.00"),
+        "verification_url": "https://example.com/verify/abc",
+        "kyc_status": "approved",
+        "error_message": "",
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare email template renders/sec: render_to_string vs cached, minimal-context and pre-rendered paths."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="Renders per template and path.",
+        )
+        parser.add_argument(
+            "--template",
+            nargs="+",
+            help="Template names (default: every template in cortanae/templates).",
+        )
+
+    def _rate(self, func, iterations: int) -> float:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return iterations / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        names = options["template"] or sorted(
+            os.path.splitext(f)[0]
+            for f in os.listdir(os.path.join(settings.BASE_DIR, "cortanae", "templates"))
+            if f.endswith(".html")
+        )
+        iterations = options["iterations"]
+        content = _sample_content()
+        clear_cache()
+
+        self.stdout.write(f"{'template':34} {'before/s':>10} {'cached/s':>10} {'slots/s':>10} {'speedup':>8}")
+        totals = [0.0, 0.0, 0.0]
+        for name in names:
+            compiled = get_template(name)
+            prepared = prepare(name, content, ["user"])
+            before = self._rate(lambda: render_to_string(f"{name}.html", content), iterations)
+            cached = self._rate(lambda: compiled.render(content), iterations)
+            slots = self._rate(lambda: prepared.render({"user": content["user"]}), iterations)
+            for i, rate in enumerate((before, cached, slots)):
+                totals[i] += rate
+            self.stdout.write(
+                f"{name:34} {before:10.0f} {cached:10.0f} {slots:10.0f} {max(cached, slots) / before:7.1f}x"
+                + (" (slots fall back to full render)" if prepared.full_render else "")
+            )
+        n = len(names) or 1
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'mean':34} {totals[0] / n:10.0f} {totals[1] / n:10.0f} {totals[2] / n:10.0f}"
+            )
+        )
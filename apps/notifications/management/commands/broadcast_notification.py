@@ -0,0 +1,52 @@
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.models import NotificationType
+from apps.notifications.service.broadcast_service import broadcast
+
+
+class Command(BaseCommand):
+    help = "Send a system or promotion notification to every active user."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--title", required=True)
+        parser.add_argument("--content", required=True)
+        parser.add_argument(
+            "--type",
+            choices=[NotificationType.SYSTEM, NotificationType.PROMOTION],
+            default=NotificationType.SYSTEM,
+        )
+        parser.add_argument(
+            "--users",
+            nargs="+",
+            help="Only these user ids instead of everyone.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Notification rows inserted per statement.",
+        )
+        parser.add_argument(
+            "--broadcast-id",
+            help="Resume an interrupted broadcast; users who have it are skipped.",
+        )
+        parser.add_argument(
+            "--no-push",
+            action="store_true",
+            help="Skip the FCM push; in-app and websocket only.",
+        )
+
+    def handle(self, *args, **options):
+        broadcast_id = options["broadcast_id"] or str(uuid.uuid4())
+        self.stdout.write(f"Broadcast id: {broadcast_id}")
+        created = broadcast(
+            options["title"],
+            options["content"],
+            type=options["type"],
+            user_ids=options["users"],
+            push=not options["no_push"],
+            chunk_size=options["chunk_size"],
+            broadcast_id=broadcast_id,
+        )
+        self.stdout.write(self.style.SUCCESS(f"{created} notification(s) created"))
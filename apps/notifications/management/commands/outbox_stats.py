@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.service.outbox_service import stats
+
+
+def _ms(value):
+    return f"{value:.0f}" if value is not None else "-"
+
+
+class Command(BaseCommand):
+    help = "Per-topic outbox throughput and latency (notify.* are the delivery channels)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes",
+            type=float,
+            default=15,
+            help="Window of events to report on.",
+        )
+        parser.add_argument(
+            "--topics",
+            nargs="+",
+            help='Only these topics; "notify.*" matches a prefix.',
+        )
+
+    def handle(self, *args, **options):
+        report = stats(timedelta(minutes=options["minutes"]), options["topics"])
+        self.stdout.write(
+            f"{'topic':32} {'done':>7} {'failed':>7} {'pending':>8} {'/min':>8} {'avg ms':>8} {'p95 ms':>8}"
+        )
+        for topic, row in sorted(report.items()):
+            self.stdout.write(
+                f"{topic:32} {row['done']:7} {row['failed']:7} {row['pending']:8} "
+                f"{row['per_minute']:8.1f} {_ms(row['avg_latency_ms']):>8} {_ms(row['p95_latency_ms']):>8}"
+            )
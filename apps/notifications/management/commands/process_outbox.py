@@ -0,0 +1,72 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.notifications.service.outbox_service import drain
+from cortanae.generic_utils.mail_send import mail_service
+
+
+class Command(BaseCommand):
+    help = "Drain the transactional outbox (notifications, mail, push)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.OUTBOX_WORKERS,
+            help="Events processed concurrently.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.OUTBOX_BATCH_SIZE,
+            help="Events leased per database round trip.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=settings.OUTBOX_MAX_ATTEMPTS,
+            help="Attempts before an event is marked failed.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.OUTBOX_POLL_INTERVAL,
+            help="Seconds to sleep when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--topics",
+            nargs="+",
+            help='Only these topics; "notify.*" matches a prefix. '
+            "Run one worker per channel to give each its own concurrency.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain what is due now and exit.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"[OUTBOX] Worker started • workers={options['workers']} • batch={options['batch_size']}"
+            f" • topics={','.join(options['topics'] or ['*'])}"
+        )
+        try:
+            while True:
+                succeeded, failed = drain(
+                    workers=options["workers"],
+                    batch_size=options["batch_size"],
+                    max_attempts=options["max_attempts"],
+                    topics=options["topics"],
+                )
+                if succeeded or failed:
+                    self.stdout.write(
+                        f"[OUTBOX] Processed • ok={succeeded} • failed={failed}"
+                    )
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+        finally:
+            # Say QUIT on the pooled SMTP sessions instead of dropping them
+            mail_service.close()
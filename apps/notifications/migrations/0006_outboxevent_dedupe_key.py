@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 21:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0005_outboxevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxevent",
+            name="dedupe_key",
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 from django.contrib.auth import get_user_model
 from cortanae.generic_utils.models_utils import BaseModelMixin
@@ -28,6 +29,9 @@ class Notification(BaseModelMixin):
         default=NotificationType.choices,
         max_length=30,
     )
+    # Set on rows written by one broadcast run, so a rerun skips users
+    # who already have it
+    broadcast_id = models.UUIDField(null=True, blank=True)
 
     class Meta:
         ordering = ["-created_at"]
@@ -35,6 +39,11 @@ class Notification(BaseModelMixin):
             models.Index(fields=["user", "is_read"]),
             models.Index(fields=["type"]),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["broadcast_id", "user"], name="unique_broadcast_user"
+            )
+        ]
 
     def __str__(self):
         return f"[{self.type}] {self.title} → {self.user.username}"
@@ -54,3 +63,42 @@ class FCMDevice(models.Model):
     
     def __str__(self):
         return f"{self.user} - {self.token}"
+
+
+class OutboxStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    DONE = "done", "Done"
+    FAILED = "failed", "Failed"
+
+
+class OutboxEvent(BaseModelMixin):
+    """
+    Transactional outbox: side effects (notifications, mail, push) are
+    written as rows in the same DB transaction as the change that caused
+    them and executed later by `manage.py process_outbox`.
+    """
+
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    # Events sharing a key are queued once: the first one wins
+    dedupe_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    status = models.CharField(
+        max_length=16,
+        choices=OutboxStatus.choices,
+        default=OutboxStatus.PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    # Not picked up before this time; doubles as a lease while a worker
+    # is processing the event and as the retry backoff after a failure.
+    available_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["available_at"]
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} • {self.status} • attempts={self.attempts}"
@@ -0,0 +1,141 @@
+"""
+System and promotion announcements to every user: notification rows are
+inserted in chunks, websocket clients get one group message and devices
+one FCM topic send, instead of one row, one group_send and one push per
+user.
+"""
+import uuid
+from typing import Iterable
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from apps.notifications.models import Notification, NotificationType
+from apps.notifications.service.push_service import FAILED, SENT, push_dispatcher
+
+User = get_user_model()
+
+# Every NotificationConsumer joins this group on connect
+BROADCAST_GROUP = "broadcast"
+
+
+def _user_id_chunks(user_ids: Iterable | None, chunk_size: int):
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        for start in range(0, len(user_ids), chunk_size):
+            yield user_ids[start : start + chunk_size]
+        return
+    # Keyset walk so 100k users are never loaded at once
+    users = User.objects.filter(is_active=True).order_by("pk")
+    last = None
+    while True:
+        page = users if last is None else users.filter(pk__gt=last)
+        chunk = list(page.values_list("pk", flat=True)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+def create_notifications(
+    title: str,
+    content: str,
+    type: str = NotificationType.SYSTEM,
+    user_ids: Iterable | None = None,
+    chunk_size: int | None = None,
+    broadcast_id: uuid.UUID | str | None = None,
+) -> int:
+    """
+    bulk_create one row per user (every active user when user_ids is None).
+    bulk_create skips post_save, so no per-row websocket or push is queued.
+    Rows carry `broadcast_id`; rerunning with the same id (an outbox retry,
+    a second worker after a lease expired) skips users who already have
+    the row. Returns how many rows the broadcast has.
+    """
+    chunk_size = chunk_size or settings.NOTIFICATION_BROADCAST_CHUNK_SIZE
+    broadcast_id = broadcast_id or uuid.uuid4()
+    covered = 0
+    for chunk in _user_id_chunks(user_ids, chunk_size):
+        with transaction.atomic():
+            Notification.objects.bulk_create(
+                [
+                    Notification(
+                        user_id=user_id,
+                        title=title,
+                        content=content,
+                        type=type,
+                        broadcast_id=broadcast_id,
+                    )
+                    for user_id in chunk
+                ],
+                ignore_conflicts=True,
+            )
+        covered += len(chunk)
+        print(f"[BROADCAST] Inserted notifications for {covered} user(s)")
+    return Notification.objects.filter(broadcast_id=broadcast_id).count()
+
+
+def send_websocket(
+    title: str, content: str, type: str, user_ids: Iterable | None = None
+) -> None:
+    """One group message for everyone, or one per user for a targeted send."""
+    if user_ids is None:
+        groups = [BROADCAST_GROUP]
+    else:
+        groups = [f"user_{user_id}" for user_id in user_ids]
+    message = {
+        "type": "send_notification",  # matches the consumer method
+        "message": content,
+        "title": title,
+        "id": None,  # each user has their own row; clients refetch
+        "notification_type": type,
+    }
+    group_send = async_to_sync(get_channel_layer().group_send)
+    for group in groups:
+        group_send(group, message)
+
+
+def send_push(title: str, content: str, user_ids: Iterable | None = None) -> dict:
+    """
+    Targeted broadcasts go to the users' tokens; everyone-broadcasts use the
+    FCM topic when one is configured.
+    """
+    topic = settings.FCM_BROADCAST_TOPIC
+    if user_ids is None and topic:
+        sent = push_dispatcher.send_to_topic(topic, title, content)
+        return {"topic": topic, "sent": sent}
+    outcome = push_dispatcher.send_to_users(user_ids, title, content)
+    return {"sent": len(outcome[SENT]), "failed": len(outcome[FAILED])}
+
+
+def broadcast(
+    title: str,
+    content: str,
+    type: str = NotificationType.SYSTEM,
+    user_ids: Iterable | None = None,
+    push: bool = True,
+    chunk_size: int | None = None,
+    broadcast_id: uuid.UUID | str | None = None,
+) -> int:
+    """
+    Announce to every active user (or `user_ids`). Pass the same
+    `broadcast_id` to resume an interrupted run. Returns the broadcast's
+    row count.
+    """
+    if user_ids is not None:
+        user_ids = list(user_ids)
+    created = create_notifications(
+        title, content, type, user_ids, chunk_size, broadcast_id
+    )
+    # Rows are committed by now. A failed live delivery is logged rather
+    # than raised: a retry would re-push to everyone it did reach.
+    try:
+        send_websocket(title, content, type, user_ids)
+        if push:
+            print(f"[BROADCAST] Push • {send_push(title, content, user_ids)}")
+    except Exception as e:
+        print(f"[BROADCAST] Live delivery failed • {e.__class__.__name__} • {e}")
+    return created
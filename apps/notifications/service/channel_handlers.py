@@ -0,0 +1,75 @@
+"""
+Per-channel delivery handlers for notifications; run by
+`manage.py process_outbox`, optionally one worker per channel
+(--topics notify.websocket / notify.push / notify.email).
+"""
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from apps.notifications.models import Notification
+from apps.notifications.service.broadcast_service import broadcast
+from apps.notifications.service.notification_service import (
+    CHANNEL_BROADCAST,
+    CHANNEL_EMAIL,
+    CHANNEL_PUSH,
+    CHANNEL_WEBSOCKET,
+)
+from apps.notifications.service.outbox_service import register
+from apps.notifications.service.push_service import FAILED, SENT, push_dispatcher
+from cortanae.generic_utils.mail_send import mail_service
+
+
+def _load(notification_id) -> Notification | None:
+    notification = Notification.objects.filter(pk=notification_id).first()
+    if notification is None:
+        print(f"[OUTBOX] Notification {notification_id} no longer exists; skipping.")
+    return notification
+
+
+@register(CHANNEL_WEBSOCKET)
+def deliver_websocket(notification_id):
+    notification = _load(notification_id)
+    if notification is None:
+        return
+    async_to_sync(get_channel_layer().group_send)(
+        f"user_{notification.user_id}",
+        {
+            "type": "send_notification",  # matches the consumer method
+            "message": str(notification.content),
+            "title": str(notification.title),
+            "id": str(notification.id),
+            "notification_type": notification.title,
+        },
+    )
+
+
+@register(CHANNEL_PUSH)
+def deliver_push(notification_id):
+    notification = _load(notification_id)
+    if notification is None:
+        return
+    outcome = push_dispatcher.send_to_users(
+        [notification.user_id], notification.title, notification.content
+    )
+    # Retry only when nothing got through; a partial retry would re-notify
+    # the devices that already received it.
+    if outcome[FAILED] and not outcome[SENT]:
+        raise RuntimeError(f"Push failed for {len(outcome[FAILED])} device(s)")
+
+
+@register(CHANNEL_EMAIL)
+def deliver_email(notification_id, title, content, recipient, template, message=""):
+    error = mail_service.mail_send(
+        title=title,
+        content=content,
+        recipient=recipient,
+        template=template,
+        message=message,
+    )
+    if isinstance(error, Exception):
+        raise error
+
+
+@register(CHANNEL_BROADCAST)
+def deliver_broadcast(title, content, type, push=True, broadcast_id=None):
+    broadcast(title, content, type, push=push, broadcast_id=broadcast_id)
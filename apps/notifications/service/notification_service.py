@@ -1,95 +1,100 @@
-from apps.notifications.models import Notification
-from pyfcm.errors import (
-    AuthenticationError,
-    FCMNotRegisteredError,
-    FCMSenderIdMismatchError,
-    FCMServerError,
-    InvalidDataError,
-)
-from apps.notifications.models import FCMDevice, Notification
-from pyfcm import FCMNotification
-from cortanae.generic_utils.mail_send import mail_service
-import os
-from cortanae.settings import BASE_DIR
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
 from django.contrib.auth import get_user_model
-from django.conf import settings
-from apps.users.models import User
+from django.db import models, transaction
 
-from cortanae.generic_utils.mail_send import mail_service
+from apps.notifications.models import Notification
+from apps.notifications.service.outbox_service import enqueue
+from apps.notifications.service.push_service import push_dispatcher
+from apps.users.models import User
 
 User = get_user_model()
 
-import logging
-db_logger = logging.getLogger("db")
+# Delivery channels, each an outbox topic with its own worker pool and
+# retries: `manage.py process_outbox --topics notify.email` etc. The in-app
+# channel is the Notification row itself.
+CHANNEL_WEBSOCKET = "notify.websocket"
+CHANNEL_PUSH = "notify.push"
+CHANNEL_EMAIL = "notify.email"
+# Everyone-announcements; see service/broadcast_service.py
+CHANNEL_BROADCAST = "notify.broadcast"
+
+# Model attributes the email templates read (fields, properties and
+# methods such as get_full_name); nothing else leaves the DB.
+EMAIL_MODEL_ATTRIBUTES = (
+    "first_name",
+    "last_name",
+    "username",
+    "email",
+    "full_name",
+    "get_full_name",
+    "account_name",
+    "bank_name",
+    "beneficiary_name",
+    "beneficiary_bank_name",
+)
+
+
+def _attribute(instance: models.Model, name: str) -> str:
+    value = getattr(instance, name)
+    if callable(value):
+        value = value()
+    return str(value or "")
+
+
+def email_context(value: Any) -> Any:
+    """
+    Reduce a template context to JSON for the outbox payload. Model
+    instances become dicts of EMAIL_MODEL_ATTRIBUTES with methods already
+    called, so {{ user.get_full_name }} renders the same from the dict.
+    """
+    if isinstance(value, models.Model):
+        return {
+            name: _attribute(value, name)
+            for name in EMAIL_MODEL_ATTRIBUTES
+            if hasattr(value, name)
+        }
+    if isinstance(value, dict):
+        return {key: email_context(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [email_context(item) for item in value]
+    if isinstance(value, (Decimal, datetime, date)):
+        return str(value)
+    return value
+
 
 def send_notification(user, content, title, type, mail_options=None):
-    Notification.objects.create(
-        user=user, title=title, content=content, type=type
-    )
+    """
+    Store the in-app notification and queue the other channels. The
+    Notification post_save receiver queues websocket and push; email is
+    queued here when the user has it enabled.
+    """
+    # One transaction: an outbox retry after a failed enqueue must not
+    # find the row (and its websocket/push events) already stored.
+    with transaction.atomic():
+        notification = Notification.objects.create(
+            user=user, title=title, content=content, type=type
+        )
 
-    if user.email_notifications and mail_options:
-        mail_service.mail_send(**mail_options)
+        if user.email_notifications and mail_options:
+            enqueue(
+                CHANNEL_EMAIL,
+                {
+                    "notification_id": str(notification.pk),
+                    **email_context(mail_options),
+                },
+            )
+    return notification
 
 
 def send_push_notification(
     title: str, body: str, single_user: bool, user: User | None
 ):
-    db_logger.info(f"[WS][PUSH] Sending push notification to {user}")
-    push_service = FCMNotification(
-        service_account_file=os.path.join(BASE_DIR, settings.SERVICE_FILE)
-    )
-    tokens = []
-    if user:
-        tokens = list(
-            FCMDevice.objects.filter(user=user).values_list("token", flat=True)
-        )
-    else:
-        tokens = list(FCMDevice.objects.values_list("token", flat=True))
-    if tokens and single_user:
-        for token in tokens:
-            try:
-                result = push_service.notify(
-                    fcm_token=token,
-                    notification_title=title,
-                    notification_body=body,
-                )
-                db_logger.info(f"[WS][PUSH] FCM response: {result}")
-                if result.get("name"):
-                    continue
-            except FCMServerError as e:
-                db_logger.error(f"[WS][PUSH] FCM server error for token {token}")
-                raise RuntimeError(
-                    "An error occured that the FCM server could not process"
-                ) from e
-            except AuthenticationError as e:
-                db_logger.warning(f"[WS][PUSH] Authentication error for token {token}")
-                raise PermissionError(
-                    "User Firebase account cannot be authenticated at the present time"
-                ) from e
-            except InvalidDataError as e:
-                db_logger.warning(f"[WS][PUSH] Invalid data for token {token}")
-                raise ValueError(
-                    "Data passed to method is not of the right structure"
-                ) from e
-            except FCMSenderIdMismatchError as e:
-                db_logger.warning(f"[WS][PUSH] Sender ID mismatch for token {token}")
-                raise PermissionError(
-                    "Credentials of sender not the same as authenticated sender on FCM"
-                ) from e
-            except FCMNotRegisteredError as e:
-                db_logger.warning(f"[WS][PUSH] Deleting invalid token {token}")
-                FCMDevice.objects.filter(token=token).delete()
-                raise ValueError(
-                    "Token missing or invalid. Confirm if the device is registered"
-                ) from e
-    if tokens and not single_user:
-        params_list = [
-            {
-                "registration_id": token,
-                "message_title": title,
-                "message_body": body,
-            }
-            for token in tokens
-        ]
-        return push_service.async_notify_multiple_devices(params_list)
-    return "no token"
+    """
+    Queue a push to `user`'s devices (every device when no user is given)
+    and return at once; see service/push_service.py.
+    """
+    user_ids = [user.pk] if user else None
+    return push_dispatcher.dispatch(user_ids, title, body)
@@ -0,0 +1,250 @@
+import threading
+import traceback
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q
+from django.utils import timezone
+
+from apps.notifications.models import OutboxEvent, OutboxStatus
+
+import logging
+
+db_logger = logging.getLogger("db")
+
+HANDLERS: dict[str, Callable[..., Any]] = {}
+
+
+def register(topic: str):
+    """Decorator registering the function that executes events of a topic."""
+
+    def decorator(func):
+        HANDLERS[topic] = func
+        return func
+
+    return decorator
+
+
+def enqueue(
+    topic: str, payload: dict[str, Any], dedupe_key: str | None = None
+) -> OutboxEvent | None:
+    """
+    Record a side effect to run later. Call it inside the DB transaction
+    that makes the change: if that transaction rolls back, so does the event.
+    With a dedupe_key, returns None if an event with that key already exists.
+    """
+    if dedupe_key is None:
+        event = OutboxEvent.objects.create(topic=topic, payload=payload)
+    else:
+        event, created = OutboxEvent.objects.get_or_create(
+            dedupe_key=dedupe_key, defaults={"topic": topic, "payload": payload}
+        )
+        if not created:
+            print(f"[OUTBOX] Skipped duplicate {topic} • key={dedupe_key}")
+            return None
+    print(f"[OUTBOX] Enqueued {topic} • id={event.id}")
+    return event
+
+
+def enqueue_many(events: list[tuple]) -> list[OutboxEvent]:
+    """
+    enqueue() for many (topic, payload) or (topic, payload, dedupe_key)
+    tuples in one INSERT. Duplicates by key are dropped.
+    """
+    rows = [
+        OutboxEvent(
+            topic=event[0],
+            payload=event[1],
+            dedupe_key=event[2] if len(event) > 2 else None,
+        )
+        for event in events
+    ]
+    created = OutboxEvent.objects.bulk_create(
+        rows, ignore_conflicts=any(row.dedupe_key for row in rows)
+    )
+    print(f"[OUTBOX] Enqueued {len(created)} event(s)")
+    return created
+
+
+def topic_filter(topics: list[str] | None) -> Q:
+    """Exact topic names, or prefixes written as "notify.*"."""
+    if not topics:
+        return Q()
+    query = Q(pk__in=[])
+    for topic in topics:
+        if topic.endswith("*"):
+            query |= Q(topic__startswith=topic[:-1])
+        else:
+            query |= Q(topic=topic)
+    return query
+
+
+def claim_batch(limit: int, topics: list[str] | None = None) -> list[OutboxEvent]:
+    """
+    Lease up to `limit` due events. Leased events are pushed into the
+    future by OUTBOX_LEASE_SECONDS, so a crashed worker's events become
+    due again instead of being lost. drain() renews the lease while the
+    batch is being processed; see extend_leases().
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxStatus.PENDING, available_at__lte=now)
+            .filter(topic_filter(topics))
+            .order_by("available_at")[:limit]
+        )
+        if events:
+            OutboxEvent.objects.filter(pk__in=[e.pk for e in events]).update(
+                available_at=lease_until
+            )
+    return events
+
+
+def extend_leases(events: list[OutboxEvent]) -> int:
+    """
+    Push the lease of `events` out by another OUTBOX_LEASE_SECONDS. Only
+    rows still on the attempt that was leased are touched, so an event
+    that has finished (done, failed or rescheduled) keeps its outcome.
+    """
+    by_attempts = defaultdict(list)
+    for event in events:
+        by_attempts[event.attempts].append(event.pk)
+    query = Q(pk__in=[])
+    for attempts, ids in by_attempts.items():
+        query |= Q(attempts=attempts, pk__in=ids)
+    lease_until = timezone.now() + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    return OutboxEvent.objects.filter(query, status=OutboxStatus.PENDING).update(
+        available_at=lease_until
+    )
+
+
+def _keep_leases(events: list[OutboxEvent], stop: threading.Event) -> None:
+    """Renew the batch's leases every third of the lease until `stop` is set."""
+    try:
+        while not stop.wait(settings.OUTBOX_LEASE_SECONDS / 3):
+            try:
+                extend_leases(events)
+            except Exception as e:
+                db_logger.error(f"[OUTBOX] Lease renewal failed • {e}")
+    finally:
+        connection.close()
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(2**attempts, 300))
+
+
+def process_event(event: OutboxEvent, max_attempts: int) -> bool:
+    """Run one event's handler and record the outcome. Returns success."""
+    attempts = event.attempts + 1
+    try:
+        handler = HANDLERS.get(event.topic)
+        if handler is None:
+            raise LookupError(f"No outbox handler registered for '{event.topic}'")
+        handler(**event.payload)
+        OutboxEvent.objects.filter(pk=event.pk).update(
+            attempts=attempts,
+            status=OutboxStatus.DONE,
+            processed_at=timezone.now(),
+            last_error=None,
+        )
+        return True
+    except Exception as e:
+        failed = attempts >= max_attempts
+        OutboxEvent.objects.filter(pk=event.pk).update(
+            attempts=attempts,
+            status=OutboxStatus.FAILED if failed else OutboxStatus.PENDING,
+            available_at=timezone.now() + _retry_delay(attempts),
+            last_error=traceback.format_exc(),
+        )
+        db_logger.error(
+            f"[OUTBOX] {event.topic} failed • id={event.id} • attempt={attempts} • {e}"
+        )
+        return False
+    finally:
+        # Worker threads keep their own connections; drop broken ones.
+        close_old_connections()
+
+
+def drain(
+    workers: int | None = None,
+    batch_size: int | None = None,
+    max_attempts: int | None = None,
+    topics: list[str] | None = None,
+) -> tuple[int, int]:
+    """
+    Process every currently due event (of `topics`, if given) with a pool
+    of `workers` threads. Returns (succeeded, failed). The leases of a
+    batch are renewed until all of it has run, so a slow handler or a long
+    queue behind the pool does not hand the events to a second worker.
+    """
+    workers = workers or settings.OUTBOX_WORKERS
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+
+    succeeded = failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            events = claim_batch(batch_size, topics)
+            if not events:
+                break
+            stop = threading.Event()
+            keeper = threading.Thread(
+                target=_keep_leases, args=(events, stop), daemon=True
+            )
+            keeper.start()
+            try:
+                for ok in pool.map(lambda e: process_event(e, max_attempts), events):
+                    if ok:
+                        succeeded += 1
+                    else:
+                        failed += 1
+            finally:
+                stop.set()
+                keeper.join()
+    return succeeded, failed
+
+
+def stats(since: timedelta, topics: list[str] | None = None) -> dict[str, dict]:
+    """
+    Per-topic counts, throughput and latency (queued -> processed) for
+    events created within `since`. Channel topics (notify.*) give the
+    per-channel figures.
+    """
+    start = timezone.now() - since
+    events = OutboxEvent.objects.filter(created_at__gte=start).filter(
+        topic_filter(topics)
+    )
+    latency = ExpressionWrapper(
+        F("processed_at") - F("created_at"), output_field=DurationField()
+    )
+    report = {}
+    for row in events.values("topic").annotate(
+        done=Count("id", filter=Q(status=OutboxStatus.DONE)),
+        failed=Count("id", filter=Q(status=OutboxStatus.FAILED)),
+        pending=Count("id", filter=Q(status=OutboxStatus.PENDING)),
+    ):
+        topic = row.pop("topic")
+        done = events.filter(topic=topic, status=OutboxStatus.DONE).annotate(
+            latency=latency
+        )
+        avg = done.aggregate(avg=Avg("latency"))["avg"]
+        p95 = None
+        if row["done"]:
+            p95 = done.order_by("latency").values_list("latency", flat=True)[
+                int(row["done"] * 0.95)
+            ]
+        minutes = since.total_seconds() / 60
+        report[topic] = {
+            **row,
+            "per_minute": row["done"] / minutes if minutes else 0,
+            "avg_latency_ms": avg.total_seconds() * 1000 if avg else None,
+            "p95_latency_ms": p95.total_seconds() * 1000 if p95 else None,
+        }
+    return report
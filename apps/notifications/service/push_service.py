@@ -0,0 +1,183 @@
+"""
+FCM push dispatch.
+
+One FCMNotification per process: credentials are read once and each sender
+thread keeps a pooled keep-alive HTTPS session. A user's devices are sent
+to concurrently, off the caller's thread, and tokens FCM reports as
+unregistered are deleted afterwards.
+"""
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable
+
+from django.conf import settings
+from django.db import close_old_connections
+from pyfcm import FCMNotification
+from pyfcm.errors import FCMNotRegisteredError, InvalidDataError
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
+
+from apps.notifications.models import FCMDevice
+
+import logging
+
+db_logger = logging.getLogger("db")
+
+SENT, INVALID, FAILED = "sent", "invalid", "failed"
+
+
+class PushClient(FCMNotification):
+    """
+    FCMNotification whose endpoint can be overridden (FCM_ENDPOINT), e.g.
+    to point at a local stub server. With an override and no service
+    account file, requests carry a placeholder bearer token.
+    """
+
+    def __init__(self, endpoint: str | None = None, service_account_file: str | None = None):
+        self._anonymous = bool(endpoint) and not service_account_file
+        retries = Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        super().__init__(
+            # BaseAPI insists on one of the two; unused when anonymous
+            service_account_file=service_account_file or "unused",
+            project_id=settings.FCM_PROJECT_ID,
+            adapter=HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=settings.FCM_PUSH_WORKERS,
+                max_retries=retries,
+            ),
+        )
+        if endpoint:
+            self._fcm_end_point = endpoint
+
+    def _get_access_token(self):
+        if self._anonymous:
+            return "local-stub"
+        return super()._get_access_token()
+
+
+def _is_invalid_token(exc: Exception) -> bool:
+    if isinstance(exc, FCMNotRegisteredError):
+        return True
+    # Malformed tokens come back as 400 INVALID_ARGUMENT
+    return isinstance(exc, InvalidDataError) and "registration token" in str(exc)
+
+
+class PushDispatcher:
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+        # Two pools: a dispatch job waits on its sends, so sharing one pool
+        # could fill it with waiting jobs and deadlock.
+        self._dispatch_pool = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="push-dispatch"
+        )
+        self._send_pool = ThreadPoolExecutor(
+            max_workers=settings.FCM_PUSH_WORKERS, thread_name_prefix="push-send"
+        )
+
+    @property
+    def client(self) -> PushClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    service_file = settings.SERVICE_FILE
+                    self._client = PushClient(
+                        endpoint=settings.FCM_ENDPOINT or None,
+                        service_account_file=(
+                            os.path.join(settings.BASE_DIR, service_file)
+                            if service_file
+                            else None
+                        ),
+                    )
+        return self._client
+
+    def _send_one(self, token: str, title: str, body: str, data: dict | None) -> str:
+        try:
+            result = self.client.notify(
+                fcm_token=token,
+                notification_title=title,
+                notification_body=body,
+                data_payload=data,
+                timeout=settings.FCM_TIMEOUT,
+            )
+            return SENT if result.get("name") else FAILED
+        except Exception as e:
+            if _is_invalid_token(e):
+                return INVALID
+            print(f"[PUSH] Send failed • {type(e).__name__} • {e}")
+            return FAILED
+
+    def send_to_tokens(
+        self, tokens: Iterable[str], title: str, body: str, data: dict | None = None
+    ) -> dict[str, list[str]]:
+        """Send to every token concurrently and prune the invalid ones."""
+        tokens = list(dict.fromkeys(tokens))
+        outcome = {SENT: [], INVALID: [], FAILED: []}
+        results = self._send_pool.map(
+            lambda token: self._send_one(token, title, body, data), tokens
+        )
+        for token, status in zip(tokens, results):
+            outcome[status].append(token)
+        if outcome[INVALID]:
+            self.prune(outcome[INVALID])
+        return outcome
+
+    def send_to_topic(
+        self, topic: str, title: str, body: str, data: dict | None = None
+    ) -> bool:
+        """One request; FCM fans it out to every device subscribed to `topic`."""
+        try:
+            result = self.client.notify(
+                topic_name=topic,
+                notification_title=title,
+                notification_body=body,
+                data_payload=data,
+                timeout=settings.FCM_TIMEOUT,
+            )
+            return bool(result.get("name"))
+        except Exception as e:
+            print(f"[PUSH] Topic send failed • topic={topic} • {type(e).__name__} • {e}")
+            return False
+
+    def prune(self, tokens: list[str]) -> int:
+        deleted, _ = FCMDevice.objects.filter(token__in=tokens).delete()
+        print(f"[PUSH] Pruned {deleted} invalid token(s)")
+        return deleted
+
+    def send_to_users(
+        self, user_ids: Iterable | None, title: str, body: str, data: dict | None = None
+    ) -> dict[str, list[str]]:
+        """Send to the devices of `user_ids`, or to every device when None."""
+        devices = FCMDevice.objects.all()
+        if user_ids is not None:
+            devices = devices.filter(user_id__in=list(user_ids))
+        tokens = list(devices.values_list("token", flat=True))
+        if not tokens:
+            return {SENT: [], INVALID: [], FAILED: []}
+        return self.send_to_tokens(tokens, title, body, data)
+
+    def _run(self, user_ids, title, body, data):
+        try:
+            outcome = self.send_to_users(user_ids, title, body, data)
+            db_logger.info(
+                f"[WS][PUSH] Sent={len(outcome[SENT])} • invalid={len(outcome[INVALID])} • failed={len(outcome[FAILED])}"
+            )
+            return outcome
+        finally:
+            close_old_connections()
+
+    def dispatch(
+        self, user_ids: Iterable | None, title: str, body: str, data: dict | None = None
+    ) -> Future | dict:
+        """
+        Queue a push without blocking the caller. With FCM_PUSH_ASYNC off
+        (tests, scripts) the push runs inline and the outcome is returned.
+        """
+        user_ids = list(user_ids) if user_ids is not None else None
+        if not settings.FCM_PUSH_ASYNC:
+            return self.send_to_users(user_ids, title, body, data)
+        return self._dispatch_pool.submit(self._run, user_ids, title, body, data)
+
+
+push_dispatcher = PushDispatcher()
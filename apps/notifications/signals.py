@@ -1,34 +1,17 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 
 from apps.notifications.service.notification_service import (
-    send_push_notification,
+    CHANNEL_PUSH,
+    CHANNEL_WEBSOCKET,
 )
-from .models import Notification, NotificationType
+from apps.notifications.service.outbox_service import enqueue_many
+from .models import Notification
 
 
 @receiver(post_save, sender=Notification)
 def send_notification_ws(sender, instance, created, **kwargs):
+    """Queue websocket and push delivery; see service/channel_handlers.py."""
     if created:
-        channel_layer = get_channel_layer()
-        group_name = f"user_{instance.user.id}"
-        print("Sending notification to group:", group_name)
-
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                "type": "send_notification",  # matches the consumer method
-                "message": str(instance.content),  # customize payload
-                "title": str(instance.title),
-                "id": str(instance.id),
-                "notification_type": instance.title,
-            },
-        )
-        send_push_notification(
-            instance.title,
-            instance.content,
-            True if NotificationType.SYSTEM else False,
-            instance.user,
-        )
+        payload = {"notification_id": str(instance.pk)}
+        enqueue_many([(CHANNEL_WEBSOCKET, payload), (CHANNEL_PUSH, payload)])
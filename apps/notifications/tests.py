@@ -1,3 +1,388 @@
-from django.test import TestCase
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.utils import timezone
+
+from apps.notifications.management.commands.benchmark_email_templates import (
+    _sample_content,
+)
+from apps.notifications.models import (
+    FCMDevice,
+    Notification,
+    OutboxEvent,
+    OutboxStatus,
+)
+from apps.notifications.service import outbox_service
+from apps.notifications.service.broadcast_service import (
+    broadcast,
+    create_notifications,
+)
+from apps.notifications.service.notification_service import (
+    CHANNEL_EMAIL,
+    email_context,
+    send_notification,
+)
+from apps.notifications.service.outbox_service import (
+    claim_batch,
+    drain,
+    enqueue,
+    extend_leases,
+    process_event,
+)
+from apps.notifications.service.push_service import (
+    FAILED,
+    INVALID,
+    SENT,
+    PushDispatcher,
+)
+from apps.users.models import User
+from cortanae.generic_utils.template_utils import clear_cache, prepare, render
+
+
+class StubFCMHandler(BaseHTTPRequestHandler):
+    """messages:send stand-in: tokens starting with "dead" are unregistered."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.headers["Authorization"], body))
+        token = body["message"]["token"]
+        if token.startswith("dead"):
+            status, payload = 404, {"error": {"status": "NOT_FOUND"}}
+        elif token.startswith("down"):
+            status, payload = 500, {"error": {"status": "INTERNAL"}}
+        else:
+            status, payload = 200, {"name": f"projects/stub/messages/{token}"}
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class PushDispatcherStubServerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubFCMHandler)
+        cls.server.requests = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.endpoint = f"http://127.0.0.1:{cls.server.server_port}/v1/messages:send"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.user = User.objects.create_user(
+            email="push@example.com", username="push", password="password"
+        )
+        for token in ("phone", "tablet", "dead-laptop", "down-watch"):
+            FCMDevice.objects.create(user=self.user, token=token)
+
+    def test_sends_to_every_device_and_prunes_unregistered_tokens(self):
+        with override_settings(
+            FCM_ENDPOINT=self.endpoint, SERVICE_FILE="", FCM_PUSH_ASYNC=False
+        ):
+            outcome = PushDispatcher().dispatch([self.user.pk], "Hi", "Body")
+
+        self.assertCountEqual(outcome[SENT], ["phone", "tablet"])
+        self.assertEqual(outcome[INVALID], ["dead-laptop"])
+        self.assertEqual(outcome[FAILED], ["down-watch"])
+        self.assertCountEqual(
+            FCMDevice.objects.values_list("token", flat=True),
+            ["phone", "tablet", "down-watch"],
+        )
+        self.assertTrue(
+            all(auth == "Bearer local-stub" for auth, _ in self.server.requests)
+        )
+        notification = self.server.requests[0][1]["message"]["notification"]
+        self.assertEqual(notification, {"title": "Hi", "body": "Body"})
+
+
+class EmailContextTests(SimpleTestCase):
+    """Queued emails are rendered from email_context(); it must not change the HTML."""
+
+    def test_templates_render_the_same_from_the_serialized_context(self):
+        content = _sample_content()
+        content["user"].first_name, content["user"].last_name = "Grace", "Hopper"
+        serialized = json.loads(json.dumps(email_context(content)))
+        directory = os.path.join(settings.BASE_DIR, "cortanae", "templates")
+
+        for name in sorted(f for f in os.listdir(directory) if f.endswith(".html")):
+            with self.subTest(template=name):
+                self.assertEqual(
+                    render_to_string(name, serialized), render_to_string(name, content)
+                )
+
+    def test_full_name_survives_serialization(self):
+        content = _sample_content()
+        content["user"].first_name, content["user"].last_name = "Grace", "Hopper"
+
+        html = render_to_string("kyc_status_update.html", email_context(content))
+
+        self.assertIn("Grace Hopper", html)
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class SendNotificationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="note@example.com", username="note", password="password"
+        )
+        self.user.email_notifications = True
+        self.mail = {
+            "title": "Hello",
+            "content": {"user": self.user},
+            "recipient": self.user.email,
+            "template": "transaction",
+            "message": "Hello",
+        }
+
+    def send(self):
+        return send_notification(
+            self.user, "Hello", "Hello", type="TRANSACTION", mail_options=self.mail
+        )
+
+    def test_row_and_email_are_stored_together(self):
+        notification = self.send()
+
+        self.assertEqual(Notification.objects.count(), 1)
+        email = OutboxEvent.objects.get(topic=CHANNEL_EMAIL)
+        self.assertEqual(email.payload["notification_id"], str(notification.pk))
+
+    def test_failed_enqueue_leaves_nothing_behind(self):
+        with mock.patch(
+            "apps.notifications.service.notification_service.enqueue",
+            side_effect=RuntimeError("outbox down"),
+        ), self.assertRaises(RuntimeError):
+            self.send()
+
+        # A retry of the source event starts from scratch
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+LOCMEM_TEMPLATES = {
+    "loop.html": "{% for account in accounts %}{{ account.account_name }} {% endfor %}{{ user.username }}",
+    "with.html": "{% with total=amount %}{{ total }} {{ currency }}{% endwith %} {{ user.username }}",
+    "base.html": "<h1>{{ title }}</h1>{% block body %}{% endblock %}",
+    "child.html": "{% extends 'base.html' %}{% block body %}{{ user.username }}{% endblock %}",
+    "part.html": "{{ reference }}",
+    "include.html": "{% include 'part.html' %} {{ user.username }}",
+}
+
+
+class TemplateRenderTests(SimpleTestCase):
+    """render() and prepare() trim the context; the HTML must not change."""
+
+    def setUp(self):
+        clear_cache()
+        self.addCleanup(clear_cache)
+        self.content = _sample_content()
+        self.content["accounts"] = [
+            self.content["source_account"],
+            self.content["destination_account"],
+        ]
+
+    def assertRendersAsDjango(self, names):
+        user = self.content["user"]
+        for name in names:
+            with self.subTest(template=name):
+                expected = render_to_string(name, self.content)
+                self.assertEqual(render(name, self.content), expected)
+                prepared = prepare(name, self.content, ["user"])
+                self.assertEqual(prepared.render({"user": user}), expected)
+
+    def test_every_email_template(self):
+        directory = os.path.join(settings.BASE_DIR, "cortanae", "templates")
+        self.assertRendersAsDjango(
+            sorted(f for f in os.listdir(directory) if f.endswith(".html"))
+        )
+
+    @override_settings(
+        TEMPLATES=[
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "OPTIONS": {
+                    "loaders": [
+                        ("django.template.loaders.locmem.Loader", LOCMEM_TEMPLATES)
+                    ]
+                },
+            }
+        ]
+    )
+    def test_tags_the_scan_does_not_follow(self):
+        self.assertRendersAsDjango(
+            ["loop.html", "with.html", "child.html", "include.html"]
+        )
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class BroadcastTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(
+                email=f"reader{n}@example.com", username=f"reader{n}", password="password"
+            )
+            for n in range(5)
+        ]
+        self.broadcast_id = uuid.uuid4()
+
+    def test_rerun_with_the_same_id_does_not_duplicate_rows(self):
+        # A crash after the first chunk, then the outbox retry
+        create_notifications(
+            "Hi",
+            "Body",
+            user_ids=[u.pk for u in self.users[:2]],
+            broadcast_id=self.broadcast_id,
+        )
+        created = create_notifications(
+            "Hi", "Body", chunk_size=2, broadcast_id=self.broadcast_id
+        )
+
+        self.assertEqual(created, 5)
+        self.assertEqual(Notification.objects.count(), 5)
+        self.assertEqual(Notification.objects.values("user").distinct().count(), 5)
+
+    def test_separate_broadcasts_each_reach_every_user(self):
+        self.assertEqual(broadcast("One", "Body", push=False), 5)
+        self.assertEqual(broadcast("Two", "Body", push=False), 5)
+
+        self.assertEqual(Notification.objects.count(), 10)
+
+
+class OutboxHandlersMixin:
+    """Test topics, registered for the duration of each test."""
+
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        handlers = mock.patch.dict(
+            outbox_service.HANDLERS,
+            {
+                "test.ok": lambda **payload: self.calls.append(payload),
+                "test.broken": self.broken,
+            },
+        )
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    @staticmethod
+    def broken(**payload):
+        raise RuntimeError("handler down")
+
+
+# process_event() runs in worker threads and recycles the connection
+# between events, so the rows are committed here as they are in production
+@override_settings(OUTBOX_LEASE_SECONDS=60)
+class OutboxTests(OutboxHandlersMixin, TransactionTestCase):
+    def test_claim_leases_events_once(self):
+        for n in range(3):
+            enqueue("test.ok", {"n": n})
+
+        first = claim_batch(2)
+        second = claim_batch(2)
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(claim_batch(2), [])
+        self.assertFalse(
+            OutboxEvent.objects.filter(available_at__lte=timezone.now()).exists()
+        )
+
+    def test_claim_honours_topics(self):
+        enqueue("test.ok", {})
+        enqueue("notify.test", {})
+
+        claimed = claim_batch(10, ["notify.*"])
+
+        self.assertEqual([event.topic for event in claimed], ["notify.test"])
+
+    def test_failed_event_is_retried_then_marked_failed(self):
+        enqueue("test.broken", {})
+
+        for attempt in (1, 2):
+            event = OutboxEvent.objects.get()
+            self.assertFalse(process_event(event, max_attempts=2))
+            event.refresh_from_db()
+            self.assertEqual(event.attempts, attempt)
+            self.assertIn("handler down", event.last_error)
+
+        self.assertEqual(event.status, OutboxStatus.FAILED)
+
+    def test_retry_waits_for_backoff(self):
+        enqueue("test.broken", {})
+        process_event(OutboxEvent.objects.get(), max_attempts=5)
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.status, OutboxStatus.PENDING)
+        self.assertGreater(event.available_at, timezone.now())
+        self.assertEqual(claim_batch(10), [])
+
+    def test_lease_is_extended_only_while_the_attempt_runs(self):
+        running = enqueue("test.ok", {})
+        finished = enqueue("test.broken", {})
+        events = claim_batch(10)
+        process_event(next(e for e in events if e.pk == finished.pk), max_attempts=5)
+        retry_at = OutboxEvent.objects.get(pk=finished.pk).available_at
+
+        with override_settings(OUTBOX_LEASE_SECONDS=600):
+            self.assertEqual(extend_leases(events), 1)
+
+        running.refresh_from_db()
+        self.assertGreater(
+            running.available_at, timezone.now() + timedelta(seconds=300)
+        )
+        self.assertEqual(OutboxEvent.objects.get(pk=finished.pk).available_at, retry_at)
+
+    @override_settings(OUTBOX_LEASE_SECONDS=0.3)
+    def test_drain_keeps_the_lease_of_a_slow_handler(self):
+        def slow(**payload):
+            time.sleep(0.5)  # outlives the first lease
+            self.calls.append(claim_batch(10))
+
+        outbox_service.HANDLERS["test.slow"] = slow
+        enqueue("test.slow", {})
+
+        self.assertEqual(drain(workers=1), (1, 0))
+        self.assertEqual(self.calls, [[]])
+
+    def test_drain_runs_every_due_event(self):
+        for n in range(5):
+            enqueue("test.ok", {"n": n})
+        enqueue("test.broken", {})
+
+        self.assertEqual(drain(workers=2, batch_size=2, max_attempts=1), (5, 1))
+
+        self.assertEqual(sorted(call["n"] for call in self.calls), list(range(5)))
+        self.assertEqual(OutboxEvent.objects.filter(status=OutboxStatus.DONE).count(), 5)
+        self.assertEqual(
+            OutboxEvent.objects.get(topic="test.broken").status, OutboxStatus.FAILED
+        )
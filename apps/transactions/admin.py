@@ -1,14 +1,15 @@
-from uuid import uuid4
 from decimal import Decimal
 
 from django import forms
-from django.contrib import admin, messages
+from django.contrib import admin
 from django.contrib.admin.widgets import AdminSplitDateTime
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.html import format_html
 
-from .models import Transaction, TransactionMeta, TransactionHistory, TxStatus
+from apps.jobs.admin import queue_admin_job
+
+from .models import LedgerEntry, Transaction, TransactionMeta, TransactionHistory, TxStatus
 
 
 # ---------------- Inlines ----------------
@@ -48,6 +49,18 @@ class TransactionMetaInline(admin.StackedInline):
         return "-"
 
 
+class LedgerEntryInline(admin.TabularInline):
+    """Read-only view of the debit/credit legs; the ledger is append-only."""
+    model = LedgerEntry
+    extra = 0
+    can_delete = False
+    fields = ("direction", "account", "account_type", "amount", "rolled_up", "created_at")
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 # ---------------- Admin ----------------
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
@@ -58,7 +71,7 @@ class TransactionAdmin(admin.ModelAdmin):
     - Reference autogeneration
     - Debug prints
     """
-    inlines = [TransactionMetaInline]
+    inlines = [TransactionMetaInline, LedgerEntryInline]
 
     list_display = (
         "reference", "category", "method",
@@ -128,20 +141,11 @@ class TransactionAdmin(admin.ModelAdmin):
 
     # -------- Save / Audit --------
     def save_model(self, request, obj: Transaction, form, change):
-        # Ensure reference exists
-        if not obj.reference:
-            obj.reference = uuid4().hex[:12].upper()
-
-        # Track previous status
-        previous_status = None
-        if change:
-            try:
-                previous_status = Transaction.objects.only("status").get(pk=obj.pk).status
-            except Transaction.DoesNotExist:
-                previous_status = None
-
-        print(f"[ADMIN] Saving Transaction • ref={obj.reference} • status={obj.status} • by={request.user}")
+        # Track previous status (snapshot taken when the admin loaded obj)
+        previous_status = obj.previous("status") if change else None
+
         super().save_model(request, obj, form, change)
+        print(f"[ADMIN] Saved Transaction • ref={obj.reference} • status={obj.status} • by={request.user}")
 
         # Log status change (optional)
         if previous_status and previous_status != obj.status:
@@ -154,21 +158,12 @@ class TransactionAdmin(admin.ModelAdmin):
 
     # -------- Bulk Actions --------
     def _bulk_set_status(self, request, queryset, new_status: str, label: str):
-        count = 0
-        for tx in queryset:
-            old = tx.status
-            if old == new_status:
-                continue
-            tx.status = new_status
-            tx.save(update_fields=["status", "updated_at"])
-            TransactionHistory.objects.create(
-                transaction=tx,
-                metadata={"from": old, "to": new_status, "action": "bulk_admin"},
-                note=f"{label} by {request.user}",
-            )
-            count += 1
-            print(f"[ADMIN] Bulk {label} • ref={tx.reference} • {old} -> {new_status}")
-        self.message_user(request, f"{count} transaction(s) marked as {label.lower()}.", level=messages.SUCCESS)
+        # Runs in `manage.py run_admin_jobs`; see service/job_handlers.py
+        queue_admin_job(
+            self, request, "transactions.set_status", queryset,
+            label=f"Mark transactions as {label.lower()}",
+            params={"status": new_status, "note": f"{label} by {request.user}"},
+        )
 
     @admin.action(description="Mark as Successful")
     def mark_successful(self, request, queryset):
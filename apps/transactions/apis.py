@@ -3,24 +3,28 @@ from django.shortcuts import get_object_or_404
 from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveAPIView
 from rest_framework.permissions import IsAuthenticated
 from apps.transactions.serializers import (
+    AccountActivitySerializer,
+    BatchTransferSerializer,
     DepositSerializer,
-    TransactionHistorySerializer,
     TransactionSerializer,
     TransferSerializer,
 )
-from .models import Transaction, TransactionHistory
+from .mixins import IdempotentCreateMixin
+from .models import AccountActivity, Transaction
 from rest_framework import status
 from rest_framework.response import Response
 
+from cortanae.generic_utils.pagination_utils import KeysetPagination
+
 # Create your views here.
 
 
-class DepositView(CreateAPIView):
+class DepositView(IdempotentCreateMixin, CreateAPIView):
     serializer_class = DepositSerializer
     queryset = Transaction.objects.all()
     permission_classes = [IsAuthenticated]
 
-    def post(self, request, *args, **kwargs):
+    def create(self, request, *args, **kwargs):
         response = super().create(request, *args, **kwargs)
         return Response(
             {"message": "Deposit successful", "data": response.data},
@@ -28,43 +32,56 @@ class DepositView(CreateAPIView):
         )
 
 
-class TransferView(CreateAPIView):
+class TransferView(IdempotentCreateMixin, CreateAPIView):
     serializer_class = TransferSerializer
     permission_classes = [IsAuthenticated]
     queryset = Transaction.objects.all()
 
 
-class UserTransactionsHistoryView(ListAPIView):
-    serializer_class = TransactionHistorySerializer
+class BatchTransferView(IdempotentCreateMixin, CreateAPIView):
+    """
+    POST /api/transaction/transfer/batch/
+    Pays many internal beneficiaries from one account in a single request
+    and returns a result per item.
+    """
+
+    serializer_class = BatchTransferSerializer
     permission_classes = [IsAuthenticated]
 
-    def get_queryset(self):
-        user = self.request.user
-        user_account = getattr(user, "user_accounts", None)
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Set by IdempotentCreateMixin; each row gets a key derived from it
+        result = serializer.save(
+            idempotency_key=getattr(request, "idempotency_key", None)
+        )
+        return Response(
+            {"message": "Batch transfer processed", "data": result},
+            status=(
+                status.HTTP_201_CREATED
+                if result["successful"]
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
 
-        base_q = Q(transaction__initiated_by=user)  # ✅ correct relation prefix
 
-        # Add account-based filters only if account exists
-        if user_account:
-            base_q |= Q(transaction__source_account=user_account) | Q(
-                transaction__destination_account=user_account
-            )
+class UserTransactionsHistoryView(ListAPIView):
+    """
+    Newest-first feed of the user's transactions, read from AccountActivity
+    with one range scan on (account, created_at DESC, id DESC).
+    """
 
-        qs = (
-            TransactionHistory.objects
-            .select_related("transaction")  # perf
-            .filter(base_q)
-            .order_by("-created_at")
-        )
+    serializer_class = AccountActivitySerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
-        # Debug logs
-        print(
-            "[DEBUG] UserTransactionsHistoryView",
-            f"user_id={getattr(user, 'id', None)}",
-            f"user_account_id={getattr(user_account, 'id', None)}",
-            f"count={qs.count()}",
+    def get_queryset(self):
+        user_account = getattr(self.request.user, "user_accounts", None)
+        if not user_account:
+            return AccountActivity.objects.none()
+        return self.serializer_class.setup_eager_loading(
+            AccountActivity.objects.filter(account=user_account)
         )
-        return qs
 
 
 class TransactionInformationView(RetrieveAPIView):
@@ -80,10 +97,12 @@ class TransactionInformationView(RetrieveAPIView):
         except AttributeError:
             return Transaction.objects.none()
 
-        return Transaction.objects.filter(
-            Q(initiated_by=user)
-            | Q(source_account=user_account)
-            | Q(destination_account=user_account)
+        return self.serializer_class.setup_eager_loading(
+            Transaction.objects.filter(
+                Q(initiated_by=user)
+                | Q(source_account=user_account)
+                | Q(destination_account=user_account)
+            )
         )
 
     def get_object(self):
@@ -7,3 +7,5 @@ class TransactionsConfig(AppConfig):
 
     def ready(self):
         import apps.transactions.signals
+        import apps.transactions.service.notification_handlers
+        import apps.transactions.service.job_handlers
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.transactions.service.idempotency_service import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses past their TTL."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(f"[Idempotency] Purged {deleted} expired record(s)")
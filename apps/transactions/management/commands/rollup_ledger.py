@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.transactions.service.ledger_service import roll_up
+
+
+class Command(BaseCommand):
+    help = "Fold pending ledger entries into Account balance snapshots."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep rolling up until interrupted.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep between passes when --loop is set.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = roll_up()
+            if count:
+                self.stdout.write(f"[Ledger] Rolled up {count} entries")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.transactions.models import Transaction, TxCategory, TxStatus
+from apps.transactions.service.transition_service import bulk_set_status
+
+
+class Command(BaseCommand):
+    help = "Move transactions to a new status in bulk (history, credits, notifications included)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("status", choices=TxStatus.values)
+        parser.add_argument(
+            "--reference",
+            nargs="+",
+            help="Only these transaction references.",
+        )
+        parser.add_argument(
+            "--category",
+            choices=TxCategory.values,
+            help="Only transactions of this category.",
+        )
+        parser.add_argument(
+            "--from-status",
+            choices=TxStatus.values,
+            default=TxStatus.PENDING,
+            help="Only transactions currently in this status (default: pending).",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            help="Transition at most this many transactions, oldest first.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Rows locked and updated per statement.",
+        )
+        parser.add_argument(
+            "--note",
+            help="Note stored on each history row.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many transactions match.",
+        )
+
+    def handle(self, *args, **options):
+        qs = Transaction.objects.filter(status=options["from_status"])
+        if options["reference"]:
+            qs = qs.filter(reference__in=options["reference"])
+        if options["category"]:
+            qs = qs.filter(category=options["category"])
+        ids = qs.order_by("created_at").values_list("pk", flat=True)
+        if options["limit"]:
+            ids = ids[: options["limit"]]
+        ids = list(ids)
+
+        if not ids:
+            raise CommandError("No transactions match.")
+        if options["dry_run"]:
+            self.stdout.write(f"{len(ids)} transaction(s) would be marked {options['status']}")
+            return
+
+        count, credited = bulk_set_status(
+            ids,
+            options["status"],
+            note=options["note"] or "Status changed by transition_transactions",
+            action="bulk_command",
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{count} transaction(s) marked {options['status']} • {credited} deposit(s) credited"
+            )
+        )
@@ -0,0 +1,50 @@
+# Generated by Django 5.0 on 2026-10-17 20:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_alter_account_created_at"),
+        ("transactions", "0009_idempotencyrecord"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["initiated_by", "-created_at"],
+                name="transaction_initiat_d55cee_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["source_account", "-created_at"],
+                name="transaction_source__12677f_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["destination_account", "-created_at"],
+                name="transaction_destina_7590a0_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transactionhistory",
+            index=models.Index(
+                fields=["transaction", "-created_at", "-id"],
+                name="transaction_transac_bddd1a_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transactionhistory",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="transaction_created_f767df_idx"
+            ),
+        ),
+    ]
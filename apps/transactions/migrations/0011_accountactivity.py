@@ -0,0 +1,108 @@
+# Generated by Django 5.0 on 2026-10-17 20:51
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_alter_account_created_at"),
+        ("transactions", "0010_history_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccountActivity",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "direction",
+                    models.CharField(
+                        choices=[("debit", "Debit"), ("credit", "Credit")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "category",
+                    models.CharField(
+                        choices=[
+                            ("deposit", "Deposit"),
+                            ("transfer_internal", "Transfer (Internal)"),
+                            ("transfer_external", "Transfer (External Wire)"),
+                            ("withdrawal", "Withdrawal"),
+                        ],
+                        max_length=24,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("successful", "Successful"),
+                            ("cancelled", "Cancelled"),
+                            ("failed", "Failed"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=14)),
+                (
+                    "account_type",
+                    models.CharField(
+                        blank=True,
+                        choices=[("savings", "Savings"), ("checking", "Checking")],
+                        max_length=30,
+                        null=True,
+                    ),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activities",
+                        to="accounts.account",
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activities",
+                        to="transactions.transaction",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Account Activity",
+                "verbose_name_plural": "Account Activities",
+                "ordering": ["-created_at", "-id"],
+                "indexes": [
+                    models.Index(
+                        fields=["account", "-created_at", "-id"],
+                        name="transaction_account_45b127_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="accountactivity",
+            constraint=models.UniqueConstraint(
+                fields=("transaction", "account", "direction"),
+                name="unique_account_activity",
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def backfill(apps, schema_editor):
+    Transaction = apps.get_model("transactions", "Transaction")
+    AccountActivity = apps.get_model("transactions", "AccountActivity")
+
+    rows = []
+    txs = Transaction.objects.only(
+        "id",
+        "source_account_id",
+        "destination_account_id",
+        "category",
+        "status",
+        "amount",
+        "account_type",
+        "created_at",
+    ).iterator(chunk_size=BATCH_SIZE)
+    for tx in txs:
+        legs = []
+        if tx.source_account_id:
+            legs.append((tx.source_account_id, "debit"))
+        if tx.destination_account_id:
+            legs.append((tx.destination_account_id, "credit"))
+        for account_id, direction in legs:
+            rows.append(
+                AccountActivity(
+                    account_id=account_id,
+                    transaction_id=tx.id,
+                    direction=direction,
+                    category=tx.category,
+                    status=tx.status,
+                    amount=tx.amount,
+                    account_type=tx.account_type,
+                    created_at=tx.created_at,
+                )
+            )
+        if len(rows) >= BATCH_SIZE:
+            AccountActivity.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    if rows:
+        AccountActivity.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0011_accountactivity"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
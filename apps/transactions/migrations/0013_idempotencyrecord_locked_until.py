@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 21:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0012_backfill_account_activity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencyrecord",
+            name="locked_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0 on 2026-10-17 21:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_backfill_account_numbers"),
+        ("transactions", "0013_idempotencyrecord_locked_until"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ledgerentry",
+            index=models.Index(
+                condition=models.Q(("rolled_up", False)),
+                fields=["account"],
+                name="ledger_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,81 @@
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.transactions.models import IdempotencyStatus
+from apps.transactions.service.idempotency_service import (
+    IDEMPOTENCY_HEADER,
+    MAX_KEY_LENGTH,
+    begin,
+    complete,
+    release,
+    request_fingerprint,
+    transaction_key,
+)
+
+
+class IdempotentCreateMixin:
+    """
+    Honours an `Idempotency-Key` header on POST.
+
+    The first request with a key runs normally and, if it succeeds, its
+    response is stored for IDEMPOTENCY_KEY_TTL_HOURS. Retries with the same
+    key get that response back without touching the serializer (no PIN
+    check, lock or upload). A retry that arrives while the first request is
+    still running gets 409; once IDEMPOTENCY_LEASE_SECONDS have passed
+    the first request is presumed dead and the retry runs instead. Failed
+    requests release the key.
+
+    Views whose perform_create() runs also get Transaction.idempotency_key
+    set, so the unique index backs the check up.
+    """
+
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return super().post(request, *args, **kwargs)
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        record, created = begin(request.user, key, request_fingerprint(request))
+        if not created:
+            return self._replay(record, key)
+
+        request.idempotency_key = transaction_key(request.user.pk, key)
+        try:
+            response = super().post(request, *args, **kwargs)
+        except Exception:
+            release(record)
+            raise
+
+        if status.is_success(response.status_code):
+            complete(record, response.status_code, response.data)
+        else:
+            release(record)
+        return response
+
+    def _replay(self, record, key):
+        if record.fingerprint != request_fingerprint(self.request):
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} was already used for a different request."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if record.status != IdempotencyStatus.COMPLETED:
+            return Response(
+                {"detail": "A request with this Idempotency-Key is still being processed."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        print(f"[Idempotency] Replaying response • user={record.user_id} • key={key}")
+        response = Response(record.response_body, status=record.response_status)
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+    def perform_create(self, serializer):
+        key = getattr(self.request, "idempotency_key", None)
+        if key:
+            serializer.save(idempotency_key=key)
+        else:
+            serializer.save()
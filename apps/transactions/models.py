@@ -3,10 +3,12 @@ from decimal import Decimal
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from cloudinary.models import CloudinaryField
 
-from cortanae.generic_utils.models_utils import BaseModelMixin
+from cortanae.generic_utils.models_utils import BaseModelMixin, TrackedFieldsMixin
 from apps.accounts.models import Account
+from apps.transactions.service.reference_service import insert_with_references
 
 from decimal import Decimal
 
@@ -31,7 +33,7 @@ class TxMethod(models.TextChoices):
     INTERNAL = "internal", "Internal"
 
 
-class Transaction(BaseModelMixin):
+class Transaction(TrackedFieldsMixin, BaseModelMixin):
     """
     Lean single-table design:
     - Use category to distinguish flows (deposit / transfer-int / transfer-ext / withdrawal)
@@ -44,6 +46,8 @@ class Transaction(BaseModelMixin):
         ("checking", "Checking"),
     ]
 
+    tracked_fields = ("status", "amount", "account_type", "created_at")
+
     reference = models.CharField(max_length=50, unique=True, blank=True)
     category = models.CharField(max_length=24, choices=TxCategory.choices)
     method = models.CharField(max_length=24, choices=TxMethod.choices)
@@ -102,11 +106,22 @@ class Transaction(BaseModelMixin):
         indexes = [
             models.Index(fields=["reference"]),
             models.Index(fields=["category", "status"]),
+            # One per branch of the user history OR-filter
+            models.Index(fields=["initiated_by", "-created_at"]),
+            models.Index(fields=["source_account", "-created_at"]),
+            models.Index(fields=["destination_account", "-created_at"]),
         ]
 
     def __str__(self):
         return f"{self.reference} • {self.category} • {self.amount} {self.currency} • {self.status}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.reference:
+            # The reference is drawn in pre_save; a collision draws another.
+            save = super().save
+            return insert_with_references(lambda: save(*args, **kwargs), [self])
+        return super().save(*args, **kwargs)
+
     @property
     def net_amount(self) -> Decimal:
         return self.amount - (self.fee_amount or Decimal("0.00"))
@@ -212,6 +227,162 @@ class TransactionHistory(BaseModelMixin):
         ordering = ["-created_at"]
         verbose_name = "Transaction History"
         verbose_name_plural = "Transaction Histories"  # ✅ Fix plural
+        indexes = [
+            # Keyset pagination: (created_at, id) DESC within a transaction set
+            models.Index(fields=["transaction", "-created_at", "-id"]),
+            models.Index(fields=["-created_at", "-id"]),
+        ]
 
     def __str__(self):
         return f"{self.transaction.reference}"
+
+
+class LedgerDirection(models.TextChoices):
+    DEBIT = "debit", "Debit"
+    CREDIT = "credit", "Credit"
+
+
+class LedgerEntry(BaseModelMixin):
+    """
+    Append-only debit/credit leg of a Transaction against one account balance.
+    - Account.checking_balance / savings_balance are a materialized snapshot
+    - Entries with rolled_up=False are not yet folded into that snapshot
+    - Live balance = snapshot + sum(signed amount of pending entries)
+    """
+
+    ACCOUNT_TYPE = Transaction.ACCOUNT_TYPE
+
+    transaction = models.ForeignKey(
+        Transaction, on_delete=models.CASCADE, related_name="ledger_entries"
+    )
+    account = models.ForeignKey(
+        Account, on_delete=models.PROTECT, related_name="ledger_entries"
+    )
+    account_type = models.CharField(choices=ACCOUNT_TYPE, max_length=30)
+    direction = models.CharField(
+        max_length=10, choices=LedgerDirection.choices
+    )
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    rolled_up = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ["created_at"]
+        verbose_name = "Ledger Entry"
+        verbose_name_plural = "Ledger Entries"
+        indexes = [
+            models.Index(fields=["account", "rolled_up"]),
+            # The rollup_ledger sweep: only the pending tail
+            models.Index(
+                fields=["account"],
+                condition=models.Q(rolled_up=False),
+                name="ledger_pending_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["transaction", "account", "account_type", "direction"],
+                name="unique_ledger_leg",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.direction} {self.amount} • {self.account_type} • {self.transaction.reference}"
+
+    @property
+    def signed_amount(self) -> Decimal:
+        if self.direction == LedgerDirection.DEBIT:
+            return -self.amount
+        return self.amount
+
+
+class AccountActivity(BaseModelMixin):
+    """
+    Per-account feed of transactions: one row per participating account
+    (source -> debit, destination -> credit), so an account's history is a
+    single range scan on (account, created_at DESC) instead of an OR across
+    initiator/source/destination.
+    - created_at mirrors Transaction.created_at
+    - status / amount / account_type are denormalized copies kept in sync
+      by apps.transactions.service.activity_service
+    """
+
+    ACCOUNT_TYPE = Transaction.ACCOUNT_TYPE
+
+    account = models.ForeignKey(
+        Account, on_delete=models.CASCADE, related_name="activities"
+    )
+    transaction = models.ForeignKey(
+        Transaction, on_delete=models.CASCADE, related_name="activities"
+    )
+    direction = models.CharField(
+        max_length=10, choices=LedgerDirection.choices
+    )
+    category = models.CharField(max_length=24, choices=TxCategory.choices)
+    status = models.CharField(max_length=16, choices=TxStatus.choices)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    account_type = models.CharField(
+        choices=ACCOUNT_TYPE, max_length=30, blank=True, null=True
+    )
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        verbose_name = "Account Activity"
+        verbose_name_plural = "Account Activities"
+        indexes = [
+            models.Index(fields=["account", "-created_at", "-id"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["transaction", "account", "direction"],
+                name="unique_account_activity",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.account_id} • {self.direction} {self.amount} • {self.status}"
+
+
+class IdempotencyStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    COMPLETED = "completed", "Completed"
+
+
+class IdempotencyRecord(BaseModelMixin):
+    """
+    Response stored against a client-supplied Idempotency-Key, so a retried
+    POST is answered from here instead of being executed twice.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_records",
+    )
+    key = models.CharField(max_length=100)
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(
+        max_length=10,
+        choices=IdempotencyStatus.choices,
+        default=IdempotencyStatus.PENDING,
+    )
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(
+        null=True, blank=True, encoder=DjangoJSONEncoder
+    )
+    expires_at = models.DateTimeField(db_index=True)
+    # While PENDING: the request running under the key holds it until
+    # then; afterwards a retry may take the key over
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Idempotency Record"
+        verbose_name_plural = "Idempotency Records"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="unique_idempotency_key_per_user"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} • {self.key} • {self.status}"
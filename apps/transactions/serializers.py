@@ -4,11 +4,29 @@ import datetime
 from django.db import transaction
 from django.views.generic import detail
 from rest_framework import serializers
-from django.db.models import Q
+from django.conf import settings
+from decimal import Decimal
 
 from apps.accounts.models import Account
+from apps.accounts.serializers import check_pin_or_raise
+from apps.accounts.service.account_lock_service import lock_account
+from apps.accounts.service.account_number_service import (
+    resolve_number,
+    resolve_numbers,
+)
+from apps.accounts.service.pin_service import pin_unchanged
 
+from .service.ledger_service import (
+    available_balance,
+    bulk_post,
+    post_transfer,
+    transfer_legs,
+)
+from .service.activity_service import bulk_record
+from .service.reference_service import generate_references, insert_with_references
+from .signals import notify_batch_transfer
 from .models import (
+    AccountActivity,
     Transaction,
     TransactionHistory,
     TransactionMeta,
@@ -327,56 +345,32 @@ class TransferSerializer(serializers.ModelSerializer):
         if account_type not in ("savings", "checking"):
             raise ValidationError({"detail": "Invalid account type."})
 
+        # Hash the PIN before taking the lock: the lock window then only
+        # covers the balance check and the inserts.
+        account_pin = validated_data.pop("account_pin")
+        check_pin_or_raise(user_account, account_pin, "Invalid account pin.")
+
         with transaction.atomic():
-            # Lock rows to avoid race conditions
-            ua_locked = Account.objects.select_for_update().get(
-                pk=user_account.pk
-            )
-            da_locked = Account.objects.select_for_update().get(
-                pk=dest_account.pk
-            )
+            # Only the payer's row is locked (to serialize debits); the payee
+            # is credited through an append-only ledger leg, so busy
+            # beneficiary accounts never become a lock hotspot.
+            ua_locked = lock_account(user_account.pk)
+            if not pin_unchanged(user_account, ua_locked):
+                raise ValidationError(
+                    {"detail": "Account pin changed, please retry."}
+                )
 
             # ✅ Strict balance check (use '>' so exact-balance-to-zero is allowed if you prefer ≥ change to >=)
-            if account_type == "savings" and not (
-                ua_locked.savings_balance > amount
-            ):
+            balance = available_balance(ua_locked, account_type)
+            if account_type == "savings" and not (balance > amount):
                 raise ValidationError(
                     {"detail": "Insufficient funds in savings."}
                 )
-            if account_type == "checking" and not (
-                ua_locked.checking_balance > amount
-            ):
+            if account_type == "checking" and not (balance > amount):
                 raise ValidationError(
                     {"detail": "Insufficient funds in checking."}
                 )
 
-            # Confirm PIN after locks (prevents TOCTOU)
-            account_pin = validated_data.pop("account_pin")
-            if not ua_locked.check_account_pin(account_pin):
-                raise ValidationError({"detail": "Invalid account pin."})
-
-            # 🔁 Move funds
-            if account_type == "savings":
-                ua_locked.savings_balance -= amount
-                if dest_type == "checking":
-                    da_locked.checking_balance += amount
-                else:
-                    da_locked.savings_balance += amount
-            else:  # checking
-                ua_locked.checking_balance -= amount
-                if dest_type == "checking":
-                    da_locked.checking_balance += amount
-                else:
-                    da_locked.savings_balance += amount
-
-            ua_locked.save(
-                update_fields=["savings_balance", "checking_balance"]
-            )
-            da_locked.save(
-                update_fields=["savings_balance", "checking_balance"]
-            )
-
-            print("At this point in the transaction")
             # Create transaction + meta
             tx = Transaction.objects.create(
                 **{
@@ -385,14 +379,25 @@ class TransferSerializer(serializers.ModelSerializer):
                     if k not in ("account_pin",)
                 },
                 source_account=ua_locked,
-                destination_account=da_locked,
+                destination_account=dest_account,
                 status=TxStatus.SUCCESSFUL,
                 initiated_by=self.context["request"].user,
             )
             TransactionMeta.objects.create(transaction=tx, **(meta_data or {}))
 
+            # 🔁 Move funds: debit + credit legs, rolled up after commit
+            post_transfer(
+                tx,
+                source=ua_locked,
+                source_type=account_type,
+                destination=dest_account,
+                destination_type=(
+                    "checking" if dest_type == "checking" else "savings"
+                ),
+            )
+
             print(
-                f"[InternalTransfer][OK] tx_id={tx.id} src={ua_locked.id} dest={da_locked.id} amt={amount}"
+                f"[InternalTransfer][OK] tx_id={tx.id} src={ua_locked.id} dest={dest_account.id} amt={amount}"
             )
             return tx
 
@@ -494,30 +499,13 @@ class TransferSerializer(serializers.ModelSerializer):
             print("[AccountLookup] Empty account_number provided.")
             return None
 
-        account = (
-            Account.objects.only(
-                "id",
-                "checking_acc_number",
-                "savings_acc_number",
-                "account_name",
-                "user_id",
-            )
-            .filter(
-                Q(checking_acc_number=normalized)
-                | Q(savings_acc_number=normalized)
-            )
-            .first()
-        )
-
-        if not account:
+        # One primary-key probe on the AccountNumber lookup table
+        resolved = resolve_number(normalized)
+        if not resolved:
             print(f"[AccountLookup] Not found for '{normalized}'.")
             return None
 
-        acct_type = (
-            "checking"
-            if account.checking_acc_number == normalized
-            else "savings"
-        )
+        acct_type, account = resolved
         print(
             f"[AccountLookup] Found {acct_type} account • id={account.id} • user_id={account.user_id}"
         )
@@ -590,35 +578,27 @@ class TransferSerializer(serializers.ModelSerializer):
         )  # remove non-model field if still present
         amount = validated_data.get("amount")
         if account_type in ("savings", "checking"):
+            # confirm pin before the lock (see handle_internal_transfer)
+            account_pin = validated_data.pop("account_pin")
+            check_pin_or_raise(user_account, account_pin, "Incorrect PIN")
+
             # lock & validate balance before creating tx
             with transaction.atomic():
-                ua_locked = Account.objects.select_for_update().get(
-                    pk=user_account.pk
-                )
-                if account_type == "savings" and not (
-                    ua_locked.savings_balance > amount
-                ):
+                ua_locked = lock_account(user_account.pk)
+                if not pin_unchanged(user_account, ua_locked):
+                    raise ValidationError(
+                        {"detail": "Account pin changed, please retry."}
+                    )
+                balance = available_balance(ua_locked, account_type)
+                if account_type == "savings" and not (balance > amount):
                     raise ValidationError(
                         {"detail": "Insufficient funds in savings."}
                     )
-                if account_type == "checking" and not (
-                    ua_locked.checking_balance > amount
-                ):
+                if account_type == "checking" and not (balance > amount):
                     raise ValidationError(
                         {"detail": "Insufficient funds in checking."}
                     )
-                # confirm pin
-                account_pin = validated_data.pop("account_pin")
-                if not ua_locked.check_account_pin(account_pin):
-                    raise ValidationError({"detail": "Incorrect PIN"})
-
                 # create transaction (PENDING) and meta
-                if account_type == "savings":
-                    ua_locked.savings_balance -= amount
-                elif account_type == "checking":
-                    ua_locked.checking_balance -= amount
-                ua_locked.save()
-                # FIX: integrity error comes from here
                 tx = Transaction.objects.create(
                     **{
                         k: v
@@ -632,6 +612,8 @@ class TransferSerializer(serializers.ModelSerializer):
                 TransactionMeta.objects.create(
                     transaction=tx, **(meta_data or {})
                 )
+                # Funds are held with a debit leg at creation time
+                post_transfer(tx, source=ua_locked, source_type=account_type)
                 print(f"[ExternalTransfer][OK] tx_id={tx.id} amount={amount}")
                 return tx
 
@@ -657,18 +639,302 @@ class TransferSerializer(serializers.ModelSerializer):
             raise ValidationError({"detail": f"Transfer failed: {str(e)}"})
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class BatchTransferItemSerializer(serializers.Serializer):
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    beneficiary_account_number = serializers.CharField(trim_whitespace=True)
+    beneficiary_name = serializers.CharField(
+        required=False, allow_blank=True, trim_whitespace=True
+    )
+    description = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_amount(self, value):
+        if value <= 0:
+            raise ValidationError("Amount cannot be lesser or equal to zero")
+        return value
+
+    def validate_beneficiary_account_number(self, value: str) -> str:
+        if not value.isdigit():
+            raise ValidationError(
+                "Beneficiary account number must be digits only."
+            )
+        return value
+
+
+class BatchTransferSerializer(serializers.Serializer):
+    """
+    Many internal transfers from one account in a single request:
+    - PIN verified once
+    - Beneficiaries resolved with one query
+    - One DB transaction, rows bulk-created
+    - Items that cannot be paid are reported back, the rest go through
+    """
+
+    account_type = serializers.ChoiceField(
+        choices=(("savings", "savings"), ("checking", "checking")),
+        required=True,
+    )
+    account_pin = serializers.CharField(write_only=True, required=True)
+    transfers = BatchTransferItemSerializer(many=True)
+
+    def validate_account_pin(self, value: str) -> str:
+        pin = (value or "").strip()
+        if not pin.isdigit():
+            raise ValidationError("Account pin must be digits only.")
+        return pin
+
+    def validate_transfers(self, value):
+        max_items = settings.BATCH_TRANSFER_MAX_ITEMS
+        if not value:
+            raise ValidationError("At least one transfer is required.")
+        if len(value) > max_items:
+            raise ValidationError(
+                f"A batch cannot contain more than {max_items} transfers."
+            )
+        return value
+
+    def resolve_beneficiaries(self, numbers) -> dict:
+        """Map account number -> (account_type, Account) in one query."""
+        return resolve_numbers(numbers)
+
+    def create(self, validated_data):
+        user = self.context["request"].user
+        if not hasattr(user, "user_accounts"):
+            raise ValidationError({"detail": "User does not have an account"})
+        user_account = user.user_accounts
+
+        account_type = validated_data["account_type"]
+        items = validated_data["transfers"]
+        key = validated_data.get("idempotency_key")
+        # One Transaction.idempotency_key per item, so the unique index
+        # backs up the Idempotency-Key lease for batches too
+        row_keys = [f"{key}:{index}" if key else None for index in range(len(items))]
+        beneficiaries = self.resolve_beneficiaries(
+            item["beneficiary_account_number"] for item in items
+        )
+        print(
+            f"[BatchTransfer] user={user.id} items={len(items)} resolved={len(beneficiaries)}"
+        )
+
+        results = [None] * len(items)
+        accepted = []
+        check_pin_or_raise(
+            user_account, validated_data["account_pin"], "Invalid account pin."
+        )
+        with transaction.atomic():
+            # Only the payer is locked; payees are credited by ledger legs.
+            ua_locked = lock_account(user_account.pk)
+            if not pin_unchanged(user_account, ua_locked):
+                raise ValidationError(
+                    {"detail": "Account pin changed, please retry."}
+                )
+            # A retry that took the key over after its lease ran out waits
+            # on the payer lock above and finds the first run's rows here.
+            if key and Transaction.objects.filter(idempotency_key__in=row_keys).exists():
+                raise ValidationError(
+                    {"detail": "This batch has already been processed."}
+                )
+
+            remaining = available_balance(ua_locked, account_type)
+            for index, item in enumerate(items):
+                number = item["beneficiary_account_number"]
+                dest_type, dest_account = beneficiaries.get(number, (None, None))
+                error = None
+                if not dest_account:
+                    error = "Beneficiary does not have an account with the bank."
+                elif dest_account.pk == ua_locked.pk:
+                    error = "Cannot transfer to your own account."
+                elif not (remaining > item["amount"]):
+                    error = f"Insufficient funds in {account_type}."
+
+                if error:
+                    results[index] = {
+                        "index": index,
+                        "beneficiary_account_number": number,
+                        "status": TxStatus.FAILED,
+                        "detail": error,
+                    }
+                    continue
+
+                remaining -= item["amount"]
+                accepted.append((index, item, dest_type, dest_account))
+
+            references = generate_references(len(accepted))
+            txs, metas, histories, entries = [], [], [], []
+            for (index, item, dest_type, dest_account), ref in zip(
+                accepted, references
+            ):
+                tx = Transaction(
+                    reference=ref,
+                    idempotency_key=row_keys[index],
+                    category=TxCategory.TRANSFER_INT,
+                    method=TxMethod.INTERNAL,
+                    account_type=account_type,
+                    amount=item["amount"],
+                    source_account=ua_locked,
+                    destination_account=dest_account,
+                    status=TxStatus.SUCCESSFUL,
+                    initiated_by=user,
+                )
+                txs.append(tx)
+                metas.append(
+                    TransactionMeta(
+                        transaction=tx,
+                        beneficiary_account_number=item[
+                            "beneficiary_account_number"
+                        ],
+                        beneficiary_name=item.get("beneficiary_name")
+                        or dest_account.account_name,
+                        description=item.get("description"),
+                    )
+                )
+                histories.append(
+                    TransactionHistory(
+                        transaction=tx,
+                        metadata={"action": "batch_transfer"},
+                    )
+                )
+                entries.extend(
+                    transfer_legs(
+                        tx,
+                        source=ua_locked,
+                        source_type=account_type,
+                        destination=dest_account,
+                        destination_type=dest_type,
+                    )
+                )
+                results[index] = {
+                    "index": index,
+                    "beneficiary_account_number": item[
+                        "beneficiary_account_number"
+                    ],
+                    "status": TxStatus.SUCCESSFUL,
+                    "reference": ref,
+                    "amount": str(item["amount"]),
+                }
+
+            # bulk_create skips the post_save signals: history, feed, ledger
+            # and the payer notification event are written here instead.
+            insert_with_references(lambda: Transaction.objects.bulk_create(txs), txs)
+            for (index, *_), tx in zip(accepted, txs):
+                # A reference collision re-draws the whole block
+                results[index]["reference"] = tx.reference
+            TransactionMeta.objects.bulk_create(metas)
+            TransactionHistory.objects.bulk_create(histories)
+            bulk_record(txs)
+            bulk_post(entries)
+
+            if txs:
+                total = sum((tx.amount for tx in txs), Decimal("0.00"))
+                notify_batch_transfer(user, len(txs), total)
+
+        print(
+            f"[BatchTransfer][OK] user={user.id} successful={len(txs)} failed={len(items) - len(txs)}"
+        )
+        return {
+            "account_type": account_type,
+            "successful": len(txs),
+            "failed": len(items) - len(txs),
+            "results": results,
+        }
+
+    def to_representation(self, instance):
+        return instance
+
+
+class AccountSummarySerializer(serializers.ModelSerializer):
+    """Counterparty view of an Account: never the PIN hash or balances."""
 
     class Meta:
-        model = Transaction
-        depth = 1
-        fields = "__all__"
+        model = Account
+        fields = ["id", "account_name", "bank_name"]
+
+
+class TransactionMetaReadSerializer(serializers.ModelSerializer):
+    payment_proof = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TransactionMeta
+        fields = [
+            "beneficiary_name",
+            "beneficiary_account_number",
+            "beneficiary_bank_name",
+            "description",
+            "payment_proof",
+        ]
+
+    def get_payment_proof(self, obj):
+        return obj.payment_proof.url if obj.payment_proof else None
 
 
 class TransactionHistorySerializer(serializers.ModelSerializer):
-    # transaction = TransactionSerializer(read_only=True)
+    reference = serializers.CharField(source="transaction.reference")
 
     class Meta:
         model = TransactionHistory
-        depth = 1
-        fields = "__all__"
+        fields = ["id", "transaction", "reference", "metadata", "note", "created_at"]
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("transaction")
+
+
+class TransactionSerializer(serializers.ModelSerializer):
+    source_account = AccountSummarySerializer(read_only=True)
+    destination_account = AccountSummarySerializer(read_only=True)
+    meta = TransactionMetaReadSerializer(read_only=True)
+    history = TransactionHistorySerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Transaction
+        fields = [
+            "id",
+            "reference",
+            "category",
+            "method",
+            "account_type",
+            "amount",
+            "currency",
+            "fee_amount",
+            "status",
+            "error_message",
+            "source_account",
+            "destination_account",
+            "initiated_by",
+            "meta",
+            "history",
+            "created_at",
+            "updated_at",
+        ]
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Everything the fields above read, in 2 queries for any number of rows."""
+        return queryset.select_related(
+            "source_account", "destination_account", "meta"
+        ).prefetch_related("history")
+
+
+class AccountActivitySerializer(serializers.ModelSerializer):
+    reference = serializers.CharField(source="transaction.reference")
+    method = serializers.CharField(source="transaction.method")
+    currency = serializers.CharField(source="transaction.currency")
+
+    class Meta:
+        model = AccountActivity
+        fields = [
+            "id",
+            "transaction",
+            "reference",
+            "direction",
+            "category",
+            "method",
+            "status",
+            "amount",
+            "currency",
+            "account_type",
+            "created_at",
+        ]
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("transaction")
@@ -0,0 +1,50 @@
+from typing import Iterable
+
+from apps.transactions.models import (
+    AccountActivity,
+    LedgerDirection,
+    Transaction,
+)
+
+# Transaction fields copied onto every AccountActivity row
+SYNCED_FIELDS = ("status", "amount", "account_type", "created_at")
+
+
+def build_activities(tx: Transaction) -> list[AccountActivity]:
+    """Unsaved feed rows for each account taking part in `tx`."""
+    legs = []
+    if tx.source_account_id:
+        legs.append((tx.source_account_id, LedgerDirection.DEBIT))
+    if tx.destination_account_id:
+        legs.append((tx.destination_account_id, LedgerDirection.CREDIT))
+    return [
+        AccountActivity(
+            account_id=account_id,
+            transaction=tx,
+            direction=direction,
+            category=tx.category,
+            status=tx.status,
+            amount=tx.amount,
+            account_type=tx.account_type,
+            created_at=tx.created_at,
+        )
+        for account_id, direction in legs
+    ]
+
+
+def bulk_record(txs: Iterable[Transaction]) -> list[AccountActivity]:
+    """Fan out feed rows for already-saved transactions in one INSERT."""
+    rows = [row for tx in txs for row in build_activities(tx)]
+    return AccountActivity.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def record_activity(tx: Transaction) -> list[AccountActivity]:
+    return bulk_record([tx])
+
+
+def sync_activity(tx: Transaction, fields: Iterable[str] = SYNCED_FIELDS) -> int:
+    """Copy changed transaction fields onto its feed rows."""
+    updates = {f: getattr(tx, f) for f in fields if f in SYNCED_FIELDS}
+    if not updates:
+        return 0
+    return AccountActivity.objects.filter(transaction=tx).update(**updates)
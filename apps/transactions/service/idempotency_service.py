@@ -0,0 +1,117 @@
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.transactions.models import IdempotencyRecord, IdempotencyStatus
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 100
+# Never part of a fingerprint: a 4-6 digit PIN is recovered from any
+# digest of it in moments.
+SECRET_FIELDS = {"account_pin", "new_account_pin", "password"}
+
+
+def transaction_key(user_id, key: str) -> str:
+    """Value stored in Transaction.idempotency_key (unique across users)."""
+    return hashlib.sha256(f"{user_id}:{key}".encode()).hexdigest()
+
+
+def request_fingerprint(request) -> str:
+    """
+    HMAC of the path and the non-file, non-secret fields of the request,
+    used to reject a key that is reused for a different payload. Uploaded
+    files are left out so they never have to be read; SECRET_FIELDS are
+    checked by the request itself and kept out of the stored value.
+    """
+    data = getattr(request, "data", {}) or {}
+    fields = {
+        k: v
+        for k, v in data.items()
+        if k not in SECRET_FIELDS and not isinstance(v, UploadedFile)
+    }
+    raw = json.dumps([request.path, fields], sort_keys=True, default=str)
+    return hmac.new(
+        settings.SECRET_KEY.encode(), raw.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def _take_over(record: IdempotencyRecord, fingerprint: str, lease: dict) -> bool:
+    """
+    Claim a PENDING record whose request outlived its lease, i.e. it
+    crashed or was killed. Conditional on the lease we read, so only one
+    retry wins.
+    """
+    claimed = IdempotencyRecord.objects.filter(
+        pk=record.pk,
+        status=IdempotencyStatus.PENDING,
+        locked_until=record.locked_until,
+    ).update(fingerprint=fingerprint, **lease)
+    if claimed:
+        record.fingerprint = fingerprint
+        for field, value in lease.items():
+            setattr(record, field, value)
+    return bool(claimed)
+
+
+def begin(user, key: str, fingerprint: str) -> tuple[IdempotencyRecord, bool]:
+    """
+    Claim `key` for `user`. Returns (record, created); when created is
+    False the record belongs to an earlier request with the same key.
+    A PENDING record whose lease (IDEMPOTENCY_LEASE_SECONDS) has run out
+    is taken over and returned as created.
+    """
+    now = timezone.now()
+    lease = {
+        "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+        "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+    }
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyRecord.objects.create(
+                    user=user, key=key, fingerprint=fingerprint, **lease
+                )
+            return record, True
+        except IntegrityError:
+            record = IdempotencyRecord.objects.filter(user=user, key=key).first()
+            if record is None:
+                # Deleted between our insert and this read; try again.
+                continue
+            if record.expires_at <= now:
+                record.delete()
+                continue
+            stale = record.status == IdempotencyStatus.PENDING and (
+                record.locked_until is None or record.locked_until <= now
+            )
+            if stale and _take_over(record, fingerprint, lease):
+                print(f"[Idempotency] Took over stale key • user={user.pk} • key={key}")
+                return record, True
+            return record, False
+    raise IntegrityError(f"Could not claim idempotency key '{key}'")
+
+
+def complete(record: IdempotencyRecord, status_code: int, body) -> None:
+    IdempotencyRecord.objects.filter(pk=record.pk).update(
+        status=IdempotencyStatus.COMPLETED,
+        response_status=status_code,
+        response_body=body,
+        locked_until=None,
+    )
+
+
+def release(record: IdempotencyRecord) -> None:
+    """Forget a key whose request failed, so the client may retry it."""
+    IdempotencyRecord.objects.filter(pk=record.pk).delete()
+
+
+def purge_expired() -> int:
+    deleted, _ = IdempotencyRecord.objects.filter(
+        expires_at__lte=timezone.now()
+    ).delete()
+    return deleted
@@ -0,0 +1,8 @@
+"""Admin job handlers for transactions; run by `manage.py run_admin_jobs`."""
+from apps.jobs.service.job_service import register
+from apps.transactions.service.transition_service import bulk_set_status
+
+
+@register("transactions.set_status")
+def set_status(ids, status, note=None):
+    bulk_set_status(ids, status, note=note, action="bulk_admin")
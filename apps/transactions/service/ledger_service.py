@@ -0,0 +1,242 @@
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+
+from apps.accounts.models import Account
+from apps.accounts.service.account_lock_service import lock_accounts
+from apps.accounts.service.profile_cache_service import invalidate_profiles
+from apps.transactions.models import LedgerDirection, LedgerEntry, Transaction
+
+import logging
+
+db_logger = logging.getLogger("db")
+
+BALANCE_FIELDS = {
+    "savings": "savings_balance",
+    "checking": "checking_balance",
+}
+
+_SIGNED_AMOUNT = Case(
+    When(direction=LedgerDirection.DEBIT, then=-F("amount")),
+    default=F("amount"),
+    output_field=DecimalField(max_digits=14, decimal_places=2),
+)
+
+
+def _balance_field(account_type: str) -> str:
+    try:
+        return BALANCE_FIELDS[account_type]
+    except KeyError:
+        raise ValueError(f"Unknown account_type '{account_type}'")
+
+
+def pending_delta(account_id, account_type: str) -> Decimal:
+    """Net of the entries not yet folded into the account snapshot."""
+    total = LedgerEntry.objects.filter(
+        account_id=account_id, account_type=account_type, rolled_up=False
+    ).aggregate(total=Sum(_SIGNED_AMOUNT))["total"]
+    return total or Decimal("0.00")
+
+
+def available_balance(account: Account, account_type: str) -> Decimal:
+    """
+    Live balance = materialized snapshot + pending ledger entries.
+    Callers that debit must hold the account row lock so two debits
+    cannot both pass the check.
+    """
+    snapshot = getattr(account, _balance_field(account_type)) or Decimal("0.00")
+    return snapshot + pending_delta(account.pk, account_type)
+
+
+def account_balances(account: Account) -> dict[str, Decimal]:
+    """available_balance() of every account type, from the loaded snapshot and one query."""
+    pending = dict(
+        LedgerEntry.objects.filter(account_id=account.pk, rolled_up=False)
+        .values("account_type")
+        .annotate(total=Sum(_SIGNED_AMOUNT))
+        .values_list("account_type", "total")
+    )
+    return {
+        account_type: (getattr(account, field) or Decimal("0.00"))
+        + (pending.get(account_type) or Decimal("0.00"))
+        for account_type, field in BALANCE_FIELDS.items()
+    }
+
+
+def available_balances(keys: Iterable[tuple]) -> dict[tuple, Decimal]:
+    """available_balance() for many (account_id, account_type) pairs in two queries."""
+    keys = set(keys)
+    account_ids = {account_id for account_id, _ in keys}
+    snapshots = {
+        row["id"]: row
+        for row in Account.objects.filter(pk__in=account_ids).values(
+            "id", *BALANCE_FIELDS.values()
+        )
+    }
+    pending = {
+        (row["account_id"], row["account_type"]): row["total"]
+        for row in LedgerEntry.objects.filter(
+            account_id__in=account_ids, rolled_up=False
+        )
+        .values("account_id", "account_type")
+        .annotate(total=Sum(_SIGNED_AMOUNT))
+    }
+    return {
+        (account_id, account_type): (
+            snapshots.get(account_id, {}).get(_balance_field(account_type))
+            or Decimal("0.00")
+        )
+        + (pending.get((account_id, account_type)) or Decimal("0.00"))
+        for account_id, account_type in keys
+    }
+
+
+def build_entries(
+    tx: Transaction, legs: Iterable[tuple[Account, str, str, Decimal]]
+) -> list[LedgerEntry]:
+    """
+    Unsaved entries for the legs of a transaction. Each leg is
+    (account, account_type, direction, amount).
+    """
+    entries = []
+    for account, account_type, direction, amount in legs:
+        _balance_field(account_type)
+        entries.append(
+            LedgerEntry(
+                transaction=tx,
+                account=account,
+                account_type=account_type,
+                direction=direction,
+                amount=amount,
+            )
+        )
+    return entries
+
+
+def transfer_legs(
+    tx: Transaction,
+    source: Account,
+    source_type: str,
+    destination: Account | None = None,
+    destination_type: str | None = None,
+    amount: Decimal | None = None,
+) -> list[LedgerEntry]:
+    """Debit the source and, for internal transfers, credit the destination."""
+    amount = tx.amount if amount is None else amount
+    legs = [(source, source_type, LedgerDirection.DEBIT, amount)]
+    if destination is not None:
+        legs.append(
+            (destination, destination_type, LedgerDirection.CREDIT, amount)
+        )
+    return build_entries(tx, legs)
+
+
+def bulk_post(entries: list[LedgerEntry]) -> list[LedgerEntry]:
+    """
+    Insert entries in one statement. Plain inserts: no account row is
+    touched, so concurrent credits never conflict. The snapshot catches
+    up in `manage.py rollup_ledger`, off the request path.
+    """
+    created = LedgerEntry.objects.bulk_create(entries)
+    print(f"[Ledger] Posted {len(created)} leg(s)")
+    # Cached profiles show available balances, which these legs just moved
+    invalidate_profiles(entry.account.user_id for entry in created)
+    return created
+
+
+def post_entries(
+    tx: Transaction, legs: Iterable[tuple[Account, str, str, Decimal]]
+) -> list[LedgerEntry]:
+    """Append the legs of a single transaction."""
+    return bulk_post(build_entries(tx, legs))
+
+
+def post_transfer(
+    tx: Transaction,
+    source: Account,
+    source_type: str,
+    destination: Account | None = None,
+    destination_type: str | None = None,
+    amount: Decimal | None = None,
+) -> list[LedgerEntry]:
+    """Post the legs built by transfer_legs()."""
+    return bulk_post(
+        transfer_legs(
+            tx, source, source_type, destination, destination_type, amount
+        )
+    )
+
+
+def post_credit(
+    tx: Transaction, account: Account, account_type: str, amount: Decimal
+) -> LedgerEntry | None:
+    """Credit an account once per transaction; returns None if already posted."""
+    already_posted = LedgerEntry.objects.filter(
+        transaction=tx,
+        account=account,
+        account_type=account_type,
+        direction=LedgerDirection.CREDIT,
+    ).exists()
+    if already_posted:
+        return None
+    return post_entries(
+        tx, [(account, account_type, LedgerDirection.CREDIT, amount)]
+    )[0]
+
+
+def roll_up_account(account_id) -> int:
+    """
+    Fold the pending entries of one account into its balance snapshot.
+    Returns the number of entries rolled up.
+    """
+    with transaction.atomic():
+        # Same lock order as the debit path: account row first, then entries.
+        lock_accounts(account_id)
+        entries = list(
+            LedgerEntry.objects.select_for_update()
+            .filter(account_id=account_id, rolled_up=False)
+            .values_list("id", "account_type", "direction", "amount")
+        )
+        if not entries:
+            return 0
+
+        deltas = {field: Decimal("0.00") for field in BALANCE_FIELDS.values()}
+        for _, account_type, direction, amount in entries:
+            sign = -1 if direction == LedgerDirection.DEBIT else 1
+            deltas[_balance_field(account_type)] += sign * amount
+
+        updates = {
+            field: F(field) + Value(delta)
+            for field, delta in deltas.items()
+            if delta
+        }
+        if updates:
+            Account.objects.filter(pk=account_id).update(**updates)
+        LedgerEntry.objects.filter(id__in=[e[0] for e in entries]).update(
+            rolled_up=True
+        )
+        # Available balances are unchanged, so cached profiles stay valid
+
+    print(f"[Ledger] Rolled up {len(entries)} entries • account={account_id}")
+    return len(entries)
+
+
+def roll_up(account_ids: Iterable | None = None) -> int:
+    """Roll up the given accounts, or every account with pending entries."""
+    if account_ids is None:
+        account_ids = (
+            LedgerEntry.objects.filter(rolled_up=False)
+            .values_list("account_id", flat=True)
+            .distinct()
+        )
+    total = 0
+    for account_id in sorted(set(account_ids), key=str):
+        try:
+            total += roll_up_account(account_id)
+        except Exception as e:
+            # Entries stay pending and are picked up by the next roll-up.
+            db_logger.error(f"[Ledger] Roll-up failed • account={account_id} • {e}")
+    return total
+
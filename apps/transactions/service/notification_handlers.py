@@ -0,0 +1,113 @@
+"""
+Outbox handlers for transaction side effects. They run inside
+`manage.py process_outbox`, never on the request path.
+"""
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.notifications.models import NotificationType
+from apps.notifications.service.notification_service import send_notification
+from apps.notifications.service.outbox_service import register
+from apps.transactions.models import Transaction, TxCategory
+from apps.transactions.signals import (
+    build_mail_options_for_transaction,
+    build_transaction_message,
+)
+
+User = get_user_model()
+
+
+def _load(transaction_id) -> Transaction | None:
+    tx = (
+        Transaction.objects.select_related(
+            "source_account__user", "destination_account__user", "meta"
+        )
+        .filter(pk=transaction_id)
+        .first()
+    )
+    if tx is None:
+        print(f"[OUTBOX] Transaction {transaction_id} no longer exists; skipping.")
+    return tx
+
+
+@register("transaction.notify")
+def notify_transaction_status(transaction_id, status):
+    tx = _load(transaction_id)
+    if tx is None:
+        return
+    # Describe the status the event was raised for, not the current one.
+    tx.status = status
+
+    built_message = build_transaction_message(tx)
+    if tx.category == TxCategory.DEPOSIT:
+        account = tx.destination_account
+    else:
+        account = tx.source_account
+    user_to_notify = account.user if account else None
+
+    if not user_to_notify:
+        print(f"[OUTBOX] No user to notify for transaction {tx.reference}")
+        return
+
+    mail_options = None
+    if user_to_notify.email_notifications:
+        mail_options = build_mail_options_for_transaction(tx, built_message)
+    send_notification(
+        user_to_notify,
+        built_message["message"],
+        built_message["title"],
+        type=NotificationType.TRANSACTION,
+        mail_options=mail_options,
+    )
+
+
+@register("transaction.deposit_credited")
+def notify_deposit_credited(transaction_id, new_balance):
+    tx = _load(transaction_id)
+    if tx is None or not tx.destination_account:
+        return
+
+    user = tx.destination_account.user
+    acc_label = (tx.account_type or "").upper()
+    content = f"{tx.amount} has been credited into your {acc_label} account. New balance: {new_balance}"
+    mail_options = (
+        {
+            "title": "Deposit Successful",
+            "content": {
+                "user": user,
+                "current_year": timezone.now().year,
+                "amount": tx.amount,
+                "currency": tx.currency,
+                "account_name": tx.destination_account.account_name,
+                "reference": tx.reference,
+                "new_balance": new_balance,
+                "account_type": acc_label,
+            },
+            "recipient": user.email,
+            "template": "deposit_successful",
+            "message": content,
+        }
+        if user.email_notifications
+        else None
+    )
+    send_notification(
+        user=user,
+        content=content,
+        title="Deposit Successful",
+        type=NotificationType.TRANSACTION,
+        mail_options=mail_options,
+    )
+
+
+@register("transaction.batch_notify")
+def notify_batch_transfer(user_id, count, total):
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return
+    send_notification(
+        user,
+        f"{count} payment(s) totalling {total} were successful.",
+        "Batch Payment Successful",
+        type=NotificationType.TRANSACTION,
+        mail_options=None,
+    )
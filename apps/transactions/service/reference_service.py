@@ -0,0 +1,136 @@
+"""
+Transaction references: "TRX" + 16 Crockford base32 characters.
+
+    10 chars  milliseconds since the Unix epoch (50 bits)
+     4 chars  node id (20 bits, settings.REFERENCE_NODE_ID)
+     2 chars  per-millisecond sequence (10 bits)
+
+A (millisecond, node, sequence) triple is handed out once per process,
+and references sort by creation time, which keeps inserts into the
+reference index append-only. Two processes on the same node id (a
+random draw that repeats, or forked workers sharing REFERENCE_NODE_ID)
+can still hand out the same reference in the same millisecond; inserts
+go through insert_with_references(), which draws fresh ones when the
+unique index rejects a row.
+"""
+import os
+import random
+import threading
+import time
+from typing import Callable, TypeVar
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+T = TypeVar("T")
+
+REFERENCE_PREFIX = "TRX"
+
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+_TIME_CHARS = 10
+_NODE_CHARS = 4
+_SEQ_CHARS = 2
+_NODE_MAX = 32**_NODE_CHARS
+_SEQ_MAX = 32**_SEQ_CHARS
+
+# Inserts tried before a reference collision is given up on
+REFERENCE_ATTEMPTS = 3
+
+_lock = threading.Lock()
+_last_ms = 0
+_seq = 0
+_random_node = random.SystemRandom().randrange(_NODE_MAX)
+
+
+def _encode(value: int, width: int) -> str:
+    chars = []
+    for _ in range(width):
+        value, rem = divmod(value, 32)
+        chars.append(CROCKFORD_ALPHABET[rem])
+    return "".join(reversed(chars))
+
+
+def _node_id() -> int:
+    node = getattr(settings, "REFERENCE_NODE_ID", None)
+    if node is None:
+        return _random_node
+    if not 0 <= node < _NODE_MAX:
+        raise ValueError(f"REFERENCE_NODE_ID must be in [0, {_NODE_MAX})")
+    return node
+
+
+def _reset_after_fork():
+    # Forked workers (gunicorn, celery) must not share the parent's node id.
+    global _random_node, _last_ms, _seq
+    _random_node = random.SystemRandom().randrange(_NODE_MAX)
+    _last_ms = 0
+    _seq = 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _reserve(count: int) -> list[tuple[int, int]]:
+    """Reserve `count` (millisecond, sequence) slots under the process lock."""
+    global _last_ms, _seq
+    slots = []
+    with _lock:
+        now = int(time.time() * 1000)
+        if now > _last_ms:
+            # Clock moved forward: start a fresh sequence. If it moved back,
+            # keep counting from the last millisecond we handed out.
+            _last_ms, _seq = now, 0
+        for _ in range(count):
+            if _seq >= _SEQ_MAX:
+                # Sequence exhausted: borrow the next millisecond.
+                _last_ms, _seq = _last_ms + 1, 0
+            slots.append((_last_ms, _seq))
+            _seq += 1
+    return slots
+
+
+def _format(ms: int, node: int, seq: int) -> str:
+    return (
+        REFERENCE_PREFIX
+        + _encode(ms, _TIME_CHARS)
+        + _encode(node, _NODE_CHARS)
+        + _encode(seq, _SEQ_CHARS)
+    )
+
+
+def generate_reference() -> str:
+    """Generate a unique, time-ordered uppercase transaction reference."""
+    return generate_references(1)[0]
+
+
+def generate_references(count: int) -> list[str]:
+    """
+    Pre-allocate a block of `count` references for a bulk insert, in
+    ascending order.
+    """
+    node = _node_id()
+    return [_format(ms, node, seq) for ms, seq in _reserve(count)]
+
+
+def insert_with_references(insert: Callable[[], T], objs: list) -> T:
+    """
+    Run `insert` (which writes `objs`) in a savepoint. If it fails because
+    one of their references is already stored, give every object a fresh
+    reference and try again; any other IntegrityError is raised.
+    """
+    for attempt in range(REFERENCE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return insert()
+        except IntegrityError:
+            model = type(objs[0])
+            taken = model._default_manager.filter(
+                reference__in=[obj.reference for obj in objs]
+            ).exists()
+            if not taken or attempt == REFERENCE_ATTEMPTS - 1:
+                raise
+            print(f"[REFERENCE] Collision on insert, retrying • attempt={attempt + 1}")
+            for obj, reference in zip(objs, generate_references(len(objs))):
+                obj.reference = reference
@@ -0,0 +1,183 @@
+"""
+Set-based status transitions for many transactions at once (admin bulk
+actions, `manage.py transition_transactions`).
+
+Rows are written with queryset.update()/bulk_create(), so the per-row
+Transaction signals do not fire; everything they would have done (history,
+feed rows, deposit credits, notifications) is done here in batches.
+"""
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.notifications.service.outbox_service import enqueue_many
+from apps.transactions.models import (
+    AccountActivity,
+    LedgerDirection,
+    LedgerEntry,
+    Transaction,
+    TransactionHistory,
+    TxCategory,
+    TxStatus,
+)
+from apps.transactions.service.ledger_service import (
+    BALANCE_FIELDS,
+    available_balances,
+    bulk_post,
+)
+from apps.transactions.signals import transaction_event_key
+
+SNAPSHOT_FIELDS = (
+    "id",
+    "reference",
+    "status",
+    "category",
+    "amount",
+    "account_type",
+    "destination_account_id",
+)
+
+
+def _creditable(tx: Transaction) -> bool:
+    return (
+        tx.category == TxCategory.DEPOSIT
+        and tx.destination_account_id is not None
+        and tx.account_type in BALANCE_FIELDS
+        and tx.amount is not None
+        and tx.amount > 0
+    )
+
+
+def _transition_chunk(
+    ids: list, new_status: str, note: str, action: str
+) -> tuple[int, int]:
+    with transaction.atomic():
+        # Lock in primary-key order so overlapping bulk runs cannot deadlock.
+        # The locked snapshot doubles as the "old row" half of UPDATE ...
+        # RETURNING, which the ORM does not expose.
+        txs = list(
+            Transaction.objects.select_for_update(of=("self",))
+            .filter(pk__in=ids)
+            .exclude(status=new_status)
+            .order_by("pk")
+            .only(*SNAPSHOT_FIELDS)
+        )
+        if not txs:
+            return 0, 0
+        tx_ids = [tx.pk for tx in txs]
+        now = timezone.now()
+
+        Transaction.objects.filter(pk__in=tx_ids).update(
+            status=new_status, updated_at=now
+        )
+        AccountActivity.objects.filter(transaction_id__in=tx_ids).update(
+            status=new_status
+        )
+
+        credits = []
+        if new_status == TxStatus.SUCCESSFUL:
+            already_credited = set(
+                LedgerEntry.objects.filter(
+                    transaction_id__in=tx_ids, direction=LedgerDirection.CREDIT
+                ).values_list("transaction_id", flat=True)
+            )
+            credits = [
+                tx for tx in txs if _creditable(tx) and tx.pk not in already_credited
+            ]
+
+        credited_ids = {tx.pk for tx in credits}
+        history = []
+        for tx in txs:
+            metadata = {"from": tx.status, "to": new_status, "action": action}
+            if tx.pk in credited_ids:
+                # Same marker the deposit signal checks before crediting
+                metadata.update(
+                    credit_posted=True,
+                    account_type=tx.account_type,
+                    amount=str(tx.amount),
+                )
+            history.append(
+                TransactionHistory(transaction=tx, metadata=metadata, note=note)
+            )
+        TransactionHistory.objects.bulk_create(history)
+
+        events = []
+        if credits:
+            # Running balance per account so each credit notice reports the
+            # balance right after its own deposit.
+            balances = available_balances(
+                {(tx.destination_account_id, tx.account_type) for tx in credits}
+            )
+            entries = []
+            for tx in credits:
+                key = (tx.destination_account_id, tx.account_type)
+                balances[key] += tx.amount
+                entries.append(
+                    LedgerEntry(
+                        transaction=tx,
+                        account_id=tx.destination_account_id,
+                        account_type=tx.account_type,
+                        direction=LedgerDirection.CREDIT,
+                        amount=tx.amount,
+                    )
+                )
+                events.append(
+                    (
+                        "transaction.deposit_credited",
+                        {
+                            "transaction_id": str(tx.pk),
+                            "new_balance": str(balances[key]),
+                        },
+                        transaction_event_key(tx.pk, new_status, now),
+                    )
+                )
+            # rollup_ledger folds these into one F() update per account
+            bulk_post(entries)
+        # After the credit events, so their shared keys drop the plain
+        # status notice for credited deposits (as with the per-row signals)
+        events.extend(
+            (
+                "transaction.notify",
+                {"transaction_id": str(tx.pk), "status": new_status},
+                transaction_event_key(tx.pk, new_status, now),
+            )
+            for tx in txs
+        )
+        enqueue_many(events)
+
+    return len(txs), len(credits)
+
+
+def bulk_set_status(
+    transactions: Iterable,
+    new_status: str,
+    note: str | None = None,
+    action: str = "bulk",
+    batch_size: int | None = None,
+) -> tuple[int, int]:
+    """
+    Move `transactions` (a queryset or primary keys) to `new_status`.
+    Rows already in that status are skipped. Each batch commits on its own.
+    Returns (transitioned, credited).
+    """
+    if new_status not in TxStatus.values:
+        raise ValueError(f"Unknown status '{new_status}'")
+    batch_size = batch_size or settings.BULK_TRANSITION_BATCH_SIZE
+    if hasattr(transactions, "values_list"):
+        transactions = transactions.order_by().values_list("pk", flat=True)
+    ids = list(transactions)
+    note = note or f"Status set to {new_status} in bulk"
+
+    transitioned = credited = 0
+    for start in range(0, len(ids), batch_size):
+        done, posted = _transition_chunk(
+            ids[start : start + batch_size], new_status, note, action
+        )
+        transitioned += done
+        credited += posted
+    print(
+        f"[TX] Bulk transition -> {new_status} • transitioned={transitioned} • credited={credited}"
+    )
+    return transitioned, credited
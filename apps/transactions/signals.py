@@ -1,33 +1,33 @@
 from django.db.models.signals import pre_save, post_save
 from django.dispatch import receiver
-from django.forms.models import model_to_dict
 from typing import Dict, Any
 from django.utils import timezone
 
-import string
-import uuid
-from random import choices
 from decimal import Decimal
 from django.db import transaction
-from django.db.models import F
 
-from apps.notifications.models import NotificationType
-from apps.notifications.service.notification_service import send_notification
+from apps.notifications.service.outbox_service import enqueue
 
 from .models import Transaction, TransactionHistory, TxCategory, TxStatus
+from .service.activity_service import record_activity, sync_activity
+from .service.reference_service import generate_reference
+from .service.ledger_service import (
+    BALANCE_FIELDS,
+    available_balance,
+    post_credit,
+)
 
 
-# # Store old values before save
-@receiver(pre_save, sender=Transaction)
-def store_old_transaction_state(sender, instance, **kwargs):
-    if instance.pk:  # Only if updating, not creating
-        try:
-            old_instance = sender.objects.get(pk=instance.pk)
-            instance._old_values = model_to_dict(old_instance)
-        except sender.DoesNotExist:
-            instance._old_values = {}
-    else:
-        instance._old_values = {}
+def transaction_event_key(transaction_id, status: str, changed_at) -> str:
+    """
+    One notification per status change. `changed_at` is the row's
+    updated_at as written by that change, so failed -> pending -> failed
+    is announced twice while the receivers of a single save share a key.
+    The deposit-credit event and the status event share it too; the credit
+    receiver runs first, so a credited deposit is announced once, with its
+    new balance.
+    """
+    return f"transaction:{transaction_id}:{status}:{changed_at.isoformat()}"
 
 
 @receiver(pre_save, sender=Transaction)
@@ -36,13 +36,7 @@ def create_transaction_reference(sender, instance, **kwargs):
     if instance.reference:
         return
 
-    candidate = "".join(choices(string.ascii_uppercase + string.digits, k=8))
-    ref = f"TRX{candidate}"
-
-    if Transaction.objects.filter(reference=ref).exists():
-        ref = f"TRX{uuid.uuid4().hex[:8].upper()}"
-
-    instance.reference = ref
+    instance.reference = generate_reference()
     print(f"[SIGNAL] Generated Transaction reference={instance.reference}")
 
 
@@ -54,6 +48,15 @@ def create_transaction_history(sender, instance, created, **kwargs):
         )
 
 
+@receiver(post_save, sender=Transaction)
+def update_account_activity(sender, instance, created, **kwargs):
+    """Keep the per-account feed (AccountActivity) in step with the row."""
+    if created:
+        record_activity(instance)
+    elif instance.changed_fields:
+        sync_activity(instance, instance.changed_fields)
+
+
 def _is_success_status(status: str) -> bool:
     # Support legacy "successful" alongside enum COMPLETED
     return status in {TxStatus.SUCCESSFUL, "successful"}
@@ -72,6 +75,10 @@ def credit_account_on_successful_deposit(
 
     if instance.category != TxCategory.DEPOSIT:
         return
+    # Only a new row or a status/amount/account_type change can make a
+    # deposit creditable
+    if not created and not instance.changed_fields:
+        return
     if not _is_success_status(instance.status):
         return
     if not instance.destination_account_id:
@@ -95,39 +102,23 @@ def credit_account_on_successful_deposit(
 
     amt: Decimal = instance.amount
 
-    with transaction.atomic():
-        # Lock account to avoid race conditions
-        acct = (
-            type(instance.destination_account)
-            .objects.select_for_update()
-            .get(pk=instance.destination_account_id)
+    if instance.account_type not in BALANCE_FIELDS:
+        print(
+            f"[SIG] Unknown account_type='{instance.account_type}'; skipping credit."
         )
+        return
 
-        if instance.account_type == "savings":
-            type(acct).objects.filter(pk=acct.pk).update(
-                savings_balance=F("savings_balance") + amt
-            )
-            new_balance = (
-                type(acct)
-                .objects.values_list("savings_balance", flat=True)
-                .get(pk=acct.pk)
-            )
-            acc_label = "SAVINGS"
-        elif instance.account_type == "checking":
-            type(acct).objects.filter(pk=acct.pk).update(
-                checking_balance=F("checking_balance") + amt
-            )
-            new_balance = (
-                type(acct)
-                .objects.values_list("checking_balance", flat=True)
-                .get(pk=acct.pk)
-            )
-            acc_label = "CHECKING"
-        else:
+    with transaction.atomic():
+        # Append-only credit leg: no lock on the destination account row
+        acct = instance.destination_account
+        entry = post_credit(instance, acct, instance.account_type, amt)
+        if entry is None:
             print(
-                f"[SIG] Unknown account_type='{instance.account_type}'; skipping credit."
+                f"[SIG] Ledger credit already exists • ref={instance.reference} • skipping."
             )
             return
+        new_balance = available_balance(acct, instance.account_type)
+        acc_label = instance.account_type.upper()
 
         print(
             f"[SIG] Credited {acc_label} {amt} • new_balance={new_balance} • ref={instance.reference}"
@@ -153,36 +144,6 @@ def credit_account_on_successful_deposit(
                 " •"
             )
             hist.save(update_fields=["metadata", "note", "updated_at"])
-            content = f"{amt} has been credited into your {acc_label} account. New balance: {new_balance}"
-            mail_options = (
-                {
-                    "title": "Deposit Successful",
-                    "content": {
-                        "user": instance.destination_account.user,
-                        "current_year": timezone.now().year,
-                        "amount": instance.amount,
-                        "currency": instance.currency,
-                        "account_name": instance.destination_account.account_name,
-                        "reference": instance.reference,
-                        "new_balance": new_balance,
-                        "account_type": acc_label,
-                    },
-                    "recipient": instance.destination_account.user.email,
-                    "template": "deposit_successful",
-                    "message": content,
-                }
-                if instance.destination_account.user.email_notifications
-                else None
-            )
-
-            send_notification(
-                user=instance.destination_account.user,
-                content=content,
-                title="Deposit Successful",
-                type=NotificationType.TRANSACTION,
-                mail_options=mail_options,
-            )
-
             print(
                 f"[SIG] Updated existing history • id={hist.id} • ref={instance.reference}"
             )
@@ -193,42 +154,22 @@ def credit_account_on_successful_deposit(
                 metadata=meta_patch,
                 note=note_patch,
             )
-
-            content = f"{amt} has been credited into your {acc_label} account. New balance: {new_balance}"
-
-            mail_options = (
-                {
-                    "to": instance.destination_account.user.email,
-                    "subject": "Deposit Successful",
-                    "body": content,
-                    "title": "Deposit Successful",
-                    "recipient": instance.destination_account.user.email,
-                    "message": content,
-                    "template": "deposit_successful",  # TODO: create template
-                    "content": {
-                        "user": instance.destination_account.user,
-                        "current_year": timezone.now().year,
-                        "amount": instance.amount,
-                        "currency": instance.currency,
-                        "account_name": instance.destination_account.account_name,
-                        "reference": instance.reference,
-                    },
-                }
-                if instance.destination_account.user.email_notifications
-                else None
-            )
-
-            send_notification(
-                user=instance.destination_account.user,
-                content=content,
-                title="Deposit Successful",
-                type=NotificationType.TRANSACTION,
-                mail_options=mail_options,
-            )
             print(
                 f"[SIG] Created history (credit marker) • ref={instance.reference}"
             )
 
+        # Notification + mail run in the outbox worker, not in the request
+        enqueue(
+            "transaction.deposit_credited",
+            {
+                "transaction_id": str(instance.pk),
+                "new_balance": str(new_balance),
+            },
+            dedupe_key=transaction_event_key(
+                instance.pk, instance.status, instance.updated_at
+            ),
+        )
+
 
 MESSAGES: Dict[str, Dict[str, Dict[str, str]]] = {
     TxCategory.DEPOSIT: {
@@ -401,38 +342,21 @@ def build_mail_options_for_transaction(
 
 @receiver(post_save, sender=Transaction)
 def transaction_signal(sender, instance, created, **kwargs):
-    if instance or created:
-        built_message = build_transaction_message(instance)
-        # Determine the user to notify based on transaction category
-        if instance.category == TxCategory.DEPOSIT:
-            user_to_notify = (
-                instance.destination_account.user
-                if instance.destination_account
-                else None
-            )
-        else:
-            user_to_notify = (
-                instance.source_account.user
-                if instance.source_account
-                else None
-            )
+    """Queue the status notification; see service/notification_handlers.py."""
+    if not created and not instance.has_changed("status"):
+        return
+    enqueue(
+        "transaction.notify",
+        {"transaction_id": str(instance.pk), "status": instance.status},
+        dedupe_key=transaction_event_key(
+            instance.pk, instance.status, instance.updated_at
+        ),
+    )
 
-        if not user_to_notify:
-            print(
-                f"[SIG] No user to notify for transaction {instance.reference}"
-            )
-            return
 
-        # Build mail_options based on transaction type and status
-        mail_options = None
-        if user_to_notify.email_notifications:
-            mail_options = build_mail_options_for_transaction(
-                instance, built_message
-            )
-        send_notification(
-            user_to_notify,
-            built_message["message"],
-            built_message["title"],
-            type=NotificationType.TRANSACTION,
-            mail_options=mail_options,
-        )
+def notify_batch_transfer(user, count: int, total: Decimal):
+    """Queue a single summary notification for a batch of internal transfers."""
+    enqueue(
+        "transaction.batch_notify",
+        {"user_id": str(user.pk), "count": count, "total": str(total)},
+    )
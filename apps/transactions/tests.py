@@ -1,3 +1,720 @@
-from django.test import TestCase
+import base64
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.db import IntegrityError, connection
+from django.utils import timezone
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Account
+from apps.notifications.models import OutboxEvent
+from apps.notifications.service.outbox_service import enqueue_many
+from apps.transactions.models import (
+    AccountActivity,
+    IdempotencyRecord,
+    IdempotencyStatus,
+    LedgerDirection,
+    LedgerEntry,
+    Transaction,
+    TransactionMeta,
+    TxCategory,
+    TxMethod,
+    TxStatus,
+)
+from apps.transactions.service import reference_service
+from apps.transactions.service.idempotency_service import (
+    begin,
+    request_fingerprint,
+)
+from apps.transactions.service.ledger_service import (
+    available_balance,
+    available_balances,
+    post_entries,
+    roll_up,
+)
+from apps.transactions.service.transition_service import bulk_set_status
+from apps.users.models import User
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+@skipUnlessDBFeature("has_select_for_update")
+class OpposingTransfersStressTests(TransactionTestCase):
+    """
+    End-to-end A→B / B→A transfers through the API. Needs real row locks:
+    SQLite's shared-cache test database locks whole tables mid-request, so
+    there the lock_accounts() stress test in apps.accounts covers the flow.
+    """
+
+    workers = 8
+    rounds = 200
+
+    def setUp(self):
+        self.users, self.accounts = [], []
+        for n in range(2):
+            user = User.objects.create_user(
+                email=f"payer{n}@example.com",
+                username=f"payer{n}",
+                password="password",
+            )
+            self.users.append(user)
+            self.accounts.append(
+                Account.objects.create(
+                    user=user,
+                    account_name=f"Payer {n}",
+                    checking_acc_number=f"3000000000{n}",
+                    savings_acc_number=f"4000000000{n}",
+                    account_pin="1234",
+                    checking_balance=Decimal("1000.00"),
+                )
+            )
+
+    def _transfer(self, payer, beneficiary):
+        try:
+            client = APIClient()
+            client.force_authenticate(payer)
+            response = client.post(
+                "/api/transaction/transfer/",
+                {
+                    "amount": "1.00",
+                    "category": "transfer_internal",
+                    "method": "internal",
+                    "account_pin": "1234",
+                    "account_type": "checking",
+                    "meta": {
+                        "beneficiary_account_number": beneficiary.checking_acc_number
+                    },
+                },
+                format="json",
+            )
+            self.assertEqual(response.status_code, 201, response.data)
+        finally:
+            connection.close()
+
+    def test_opposing_internal_transfers(self):
+        (user_a, user_b), (account_a, account_b) = self.users, self.accounts
+        jobs = [
+            (user_a, account_b) if i % 2 else (user_b, account_a)
+            for i in range(self.rounds)
+        ]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for future in [pool.submit(self._transfer, *job) for job in jobs]:
+                future.result(timeout=120)
+
+        roll_up()
+        self.assertEqual(Transaction.objects.count(), self.rounds)
+        self.assertFalse(LedgerEntry.objects.filter(rolled_up=False).exists())
+        account_a.refresh_from_db()
+        account_b.refresh_from_db()
+        self.assertEqual(account_a.checking_balance, Decimal("1000.00"))
+        self.assertEqual(account_b.checking_balance, Decimal("1000.00"))
+
+
+class AccountFeedMixin:
+    """An account with a payee to send it transactions to."""
+
+    def setUp(self):
+        owner = User.objects.create_user(
+            email="reader@example.com", username="reader", password="password"
+        )
+        other = User.objects.create_user(
+            email="payee@example.com", username="payee", password="password"
+        )
+        self.account = Account.objects.create(
+            user=owner,
+            account_name="Reader",
+            checking_acc_number="50000000001",
+            savings_acc_number="60000000001",
+            account_pin="1234",
+        )
+        self.payee = Account.objects.create(
+            user=other,
+            account_name="Payee",
+            checking_acc_number="50000000002",
+            savings_acc_number="60000000002",
+            account_pin="1234",
+        )
+        # Fresh instance: nothing cached from the setup above
+        self.user = User.objects.get(pk=owner.pk)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _make_transactions(self, count):
+        txs = []
+        for _ in range(count):
+            tx = Transaction.objects.create(
+                category=TxCategory.TRANSFER_INT,
+                method=TxMethod.INTERNAL,
+                account_type="checking",
+                amount=Decimal("1.00"),
+                source_account=self.account,
+                destination_account=self.payee,
+                initiated_by=self.user,
+            )
+            TransactionMeta.objects.create(transaction=tx, description="rent")
+            txs.append(tx)
+        return txs
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class ReadEndpointQueryBudgetTests(AccountFeedMixin, TestCase):
+    """
+    List/detail endpoints must cost a fixed number of queries however many
+    rows they return; a new N+1 in a read serializer fails here.
+    """
+
+    HISTORY_QUERIES = 2  # account lookup, one feed page
+    DETAIL_QUERIES = 3  # account lookup, transaction + joins, history
+
+    def test_history_query_count_is_constant(self):
+        for count in (3, 15):
+            self._make_transactions(count)
+            self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+            with self.assertNumQueries(self.HISTORY_QUERIES):
+                response = self.client.get(
+                    "/api/transaction/user-history/?page_size=50"
+                )
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 18)
+
+    def test_transaction_detail_query_budget(self):
+        tx = self._make_transactions(1)[0]
+        with self.assertNumQueries(self.DETAIL_QUERIES):
+            response = self.client.get(f"/api/transaction/{tx.reference}/view")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["destination_account"]["account_name"], "Payee")
+        self.assertEqual(len(response.data["history"]), 1)
+        self.assertNotIn("account_pin", str(response.data))
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class KeysetPaginationTests(AccountFeedMixin, TestCase):
+    """The transaction feed's cursor pages (KeysetPagination)."""
+
+    url = "/api/transaction/user-history/"
+
+    def walk(self, page_size):
+        seen, url = [], f"{self.url}?page_size={page_size}"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row["reference"] for row in response.data["results"]]
+            url = response.data["next"]
+        return seen
+
+    def test_pages_cover_every_row_once_newest_first(self):
+        txs = self._make_transactions(7)
+        # Ties on created_at are broken by id, so no row is skipped or repeated
+        AccountActivity.objects.update(created_at=timezone.now())
+
+        references = self.walk(page_size=3)
+
+        self.assertEqual(sorted(references), sorted(tx.reference for tx in txs))
+        expected = (
+            AccountActivity.objects.filter(account=self.account)
+            .order_by("-created_at", "-id")
+            .values_list("transaction__reference", flat=True)
+        )
+        self.assertEqual(references, list(expected))
+
+    def test_invalid_cursors_are_404(self):
+        def token(value):
+            raw = json.dumps(value).encode()
+            return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+        for cursor in (
+            "not-base64!",
+            token(["2024-01-01T00:00:00+00:00", "not-a-uuid"]),
+            token(["2024-01-01T00:00:00+00:00", 5]),
+            token(["2024-01-01T00:00:00", str(uuid.uuid4())]),
+            token(["yesterday", str(uuid.uuid4())]),
+            token({"a": 1}),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f"{self.url}?cursor={cursor}")
+                self.assertEqual(response.status_code, 404)
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class TransactionNotificationDedupeTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email="saver@example.com", username="saver", password="password"
+        )
+        self.account = Account.objects.create(
+            user=user,
+            account_name="Saver",
+            checking_acc_number="70000000001",
+            savings_acc_number="80000000001",
+            account_pin="1234",
+        )
+        self.deposit = Transaction.objects.create(
+            category=TxCategory.DEPOSIT,
+            method=TxMethod.WIRE,
+            account_type="checking",
+            amount=Decimal("25.00"),
+            destination_account=self.account,
+            initiated_by=user,
+        )
+
+    def events(self, **filters):
+        return sorted(
+            OutboxEvent.objects.filter(
+                payload__transaction_id=str(self.deposit.pk), **filters
+            ).values_list("topic", flat=True)
+        )
+
+    def set_status(self, status):
+        self.deposit.status = status
+        self.deposit.save()
+
+    def test_approved_deposit_is_announced_once_with_its_balance(self):
+        self.set_status(TxStatus.SUCCESSFUL)
+        self.deposit.save()  # a later save without a status change
+
+        # The credit event took the status event's key
+        self.assertEqual(
+            self.events(), ["transaction.deposit_credited", "transaction.notify"]
+        )
+        self.assertEqual(
+            self.events(topic="transaction.notify", payload__status="successful"), []
+        )
+
+    def test_returning_to_a_status_notifies_again(self):
+        for status in (TxStatus.FAILED, TxStatus.PENDING, TxStatus.FAILED):
+            self.set_status(status)
+
+        self.assertEqual(len(self.events(payload__status="failed")), 2)
+
+    def test_bulk_approval_is_announced_once(self):
+        self.assertEqual(bulk_set_status([self.deposit.pk], TxStatus.SUCCESSFUL), (1, 1))
+        self.assertEqual(bulk_set_status([self.deposit.pk], TxStatus.SUCCESSFUL), (0, 0))
+
+        self.assertEqual(
+            self.events(payload__new_balance__isnull=False),
+            ["transaction.deposit_credited"],
+        )
+        self.assertEqual(
+            self.events(topic="transaction.notify", payload__status="successful"), []
+        )
+
+    def test_enqueue_many_drops_duplicate_keys(self):
+        enqueue_many([("notify.test", {"n": 1}, "k1"), ("notify.test", {"n": 2}, "k1")])
+        enqueue_many([("notify.test", {"n": 3}, "k1"), ("notify.test", {"n": 4})])
+
+        payloads = OutboxEvent.objects.filter(topic="notify.test").values_list(
+            "payload__n", flat=True
+        )
+        self.assertEqual(sorted(payloads), [1, 4])
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class BatchTransferTests(TestCase):
+    url = "/api/transaction/transfer/batch/"
+
+    def setUp(self):
+        self.accounts = []
+        for n, balance in enumerate(("100.00", "0.00", "0.00")):
+            user = User.objects.create_user(
+                email=f"batch{n}@example.com", username=f"batch{n}", password="password"
+            )
+            self.accounts.append(
+                Account.objects.create(
+                    user=user,
+                    account_name=f"Batch {n}",
+                    checking_acc_number=f"9000000000{n}",
+                    savings_acc_number=f"9100000000{n}",
+                    account_pin="1234",
+                    checking_balance=Decimal(balance),
+                )
+            )
+        self.payer, self.payee, self.other_payee = self.accounts
+        self.client = APIClient()
+        self.client.force_authenticate(self.payer.user)
+
+    def post(self, *items, **headers):
+        return self.client.post(
+            self.url,
+            {
+                "account_type": "checking",
+                "account_pin": "1234",
+                "transfers": [
+                    {"beneficiary_account_number": number, "amount": amount}
+                    for number, amount in items
+                ],
+            },
+            format="json",
+            **headers,
+        )
+
+    def balances(self):
+        roll_up()
+        for account in self.accounts:
+            account.refresh_from_db()
+        return [str(account.checking_balance) for account in self.accounts]
+
+    def test_takeover_after_lease_expiry_does_not_pay_twice(self):
+        items = [
+            (self.payee.checking_acc_number, "30.00"),
+            ("0000000000", "5.00"),
+            (self.other_payee.checking_acc_number, "20.00"),
+        ]
+        first = self.post(*items, HTTP_IDEMPOTENCY_KEY="batch-1")
+        self.assertEqual(first.status_code, 201, first.data)
+        # The first run committed but died before completing its record
+        IdempotencyRecord.objects.update(
+            status=IdempotencyStatus.PENDING,
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+
+        retry = self.post(*items, HTTP_IDEMPOTENCY_KEY="batch-1")
+
+        self.assertEqual(retry.status_code, 400, retry.data)
+        keys = Transaction.objects.values_list("idempotency_key", flat=True)
+        self.assertEqual(len(keys), 2)
+        self.assertEqual(sorted(key.rsplit(":", 1)[1] for key in keys), ["0", "2"])
+        self.assertEqual(self.balances(), ["50.00", "30.00", "20.00"])
+
+    def test_all_items_succeed(self):
+        response = self.post(
+            (self.payee.checking_acc_number, "30.00"),
+            (self.other_payee.savings_acc_number, "20.00"),
+        )
+
+        self.assertEqual(response.status_code, 201, response.data)
+        data = response.data["data"]
+        self.assertEqual((data["successful"], data["failed"]), (2, 0))
+        self.assertEqual(
+            [r["status"] for r in data["results"]], [TxStatus.SUCCESSFUL] * 2
+        )
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    def test_partial_failure_reports_each_item(self):
+        response = self.post(
+            (self.payee.checking_acc_number, "30.00"),
+            ("99999999999", "10.00"),
+        )
+
+        self.assertEqual(response.status_code, 201, response.data)
+        first, second = response.data["data"]["results"]
+        self.assertEqual(first["status"], TxStatus.SUCCESSFUL)
+        self.assertEqual(second["status"], TxStatus.FAILED)
+        self.assertIn("does not have an account", second["detail"])
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_all_items_failing_is_400(self):
+        response = self.post(("99999999999", "10.00"))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["data"]["failed"], 1)
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(LedgerEntry.objects.exists())
+
+    def test_transfer_to_own_account_is_rejected(self):
+        response = self.post((self.payer.savings_acc_number, "10.00"))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["data"]["results"][0]["detail"],
+            "Cannot transfer to your own account.",
+        )
+
+    def test_funds_are_checked_across_the_batch(self):
+        response = self.post(
+            (self.payee.checking_acc_number, "60.00"),
+            (self.other_payee.checking_acc_number, "60.00"),
+        )
+
+        self.assertEqual(response.status_code, 201, response.data)
+        results = response.data["data"]["results"]
+        self.assertEqual(results[0]["status"], TxStatus.SUCCESSFUL)
+        self.assertEqual(results[1]["detail"], "Insufficient funds in checking.")
+        self.assertEqual(self.balances(), ["40.00", "60.00", "0.00"])
+
+    def test_ledger_legs_and_rolled_up_balances(self):
+        self.post(
+            (self.payee.checking_acc_number, "30.00"),
+            (self.other_payee.checking_acc_number, "20.00"),
+        )
+
+        for tx in Transaction.objects.all():
+            legs = {
+                (entry.account_id, entry.direction, entry.amount)
+                for entry in tx.ledger_entries.all()
+            }
+            self.assertEqual(
+                legs,
+                {
+                    (self.payer.pk, LedgerDirection.DEBIT, tx.amount),
+                    (tx.destination_account_id, LedgerDirection.CREDIT, tx.amount),
+                },
+            )
+        self.assertEqual(self.balances(), ["50.00", "30.00", "20.00"])
+        self.assertFalse(LedgerEntry.objects.filter(rolled_up=False).exists())
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class IdempotencyKeyTests(TestCase):
+    url = "/api/transaction/transfer/"
+
+    def setUp(self):
+        accounts = []
+        for n in range(2):
+            user = User.objects.create_user(
+                email=f"retry{n}@example.com", username=f"retry{n}", password="password"
+            )
+            accounts.append(
+                Account.objects.create(
+                    user=user,
+                    account_name=f"Retry {n}",
+                    checking_acc_number=f"9200000000{n}",
+                    savings_acc_number=f"9300000000{n}",
+                    account_pin="1234",
+                    checking_balance=Decimal("100.00"),
+                )
+            )
+        self.payer, self.payee = accounts
+        self.client = APIClient()
+        self.client.force_authenticate(self.payer.user)
+
+    def payload(self, amount="10.00"):
+        return {
+            "amount": amount,
+            "category": "transfer_internal",
+            "method": "internal",
+            "account_pin": "1234",
+            "account_type": "checking",
+            "meta": {"beneficiary_account_number": self.payee.checking_acc_number},
+        }
+
+    def post(self, payload, key="key-1"):
+        return self.client.post(
+            self.url, payload, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def claim(self, payload, key="key-1"):
+        """A PENDING record as left by a request that is running (or died)."""
+        request = SimpleNamespace(path=self.url, data=payload)
+        record, created = begin(self.payer.user, key, request_fingerprint(request))
+        self.assertTrue(created)
+        return record
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.post(self.payload())
+        second = self.post(self.payload())
+
+        self.assertEqual(first.status_code, 201, first.data)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_key_reused_for_another_payload_is_422(self):
+        self.post(self.payload())
+
+        response = self.post(self.payload(amount="20.00"))
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_retry_while_in_flight_is_409(self):
+        self.claim(self.payload())
+
+        response = self.post(self.payload())
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_retry_takes_over_a_key_whose_lease_ran_out(self):
+        record = self.claim(self.payload())
+        IdempotencyRecord.objects.filter(pk=record.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+
+        response = self.post(self.payload())
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Transaction.objects.count(), 1)
+        record.refresh_from_db()
+        self.assertEqual(record.status, IdempotencyStatus.COMPLETED)
+        self.assertIsNone(record.locked_until)
+
+
+class RequestFingerprintTests(SimpleTestCase):
+    def fingerprint(self, **data):
+        payload = {"amount": "10.00", "account_pin": "1234", **data}
+        return request_fingerprint(SimpleNamespace(path="/api/x/", data=payload))
+
+    def test_pin_is_not_part_of_the_fingerprint(self):
+        self.assertEqual(self.fingerprint(), self.fingerprint(account_pin="9876"))
+        self.assertNotEqual(self.fingerprint(), self.fingerprint(amount="20.00"))
+
+    def test_fingerprint_is_keyed(self):
+        fingerprint = self.fingerprint()
+
+        with self.settings(SECRET_KEY="another-secret"):
+            self.assertNotEqual(self.fingerprint(), fingerprint)
+
+
+class ReferenceFormatTests(SimpleTestCase):
+    pattern = r"^TRX[0-9A-HJKMNP-TV-Z]{16}$"
+
+    def test_format(self):
+        self.assertRegex(reference_service.generate_reference(), self.pattern)
+
+    @override_settings(REFERENCE_NODE_ID=12345)
+    def test_node_id_is_encoded(self):
+        reference = reference_service.generate_reference()
+        self.assertEqual(reference[13:17], reference_service._encode(12345, 4))
+
+    @override_settings(REFERENCE_NODE_ID=32**4)
+    def test_node_id_out_of_range(self):
+        with self.assertRaises(ValueError):
+            reference_service.generate_reference()
+
+    def test_references_increase_past_the_per_millisecond_sequence(self):
+        # More than one millisecond's 1024 slots in a single block
+        references = reference_service.generate_references(3000)
+        references.append(reference_service.generate_reference())
+
+        self.assertEqual(len(set(references)), len(references))
+        self.assertEqual(references, sorted(references))
+
+
+class ReferenceCollisionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="saver@example.com", username="saver", password="password"
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            account_name="Saver",
+            checking_acc_number="70000000001",
+            savings_acc_number="80000000001",
+            account_pin="1234",
+        )
+
+    def deposit(self):
+        return Transaction.objects.create(
+            category=TxCategory.DEPOSIT,
+            method=TxMethod.WIRE,
+            account_type="checking",
+            amount=Decimal("25.00"),
+            destination_account=self.account,
+            initiated_by=self.user,
+        )
+
+    def test_colliding_reference_is_drawn_again(self):
+        taken = self.deposit().reference
+
+        # Another process on the same node drew the same reference
+        with mock.patch(
+            "apps.transactions.signals.generate_reference", return_value=taken
+        ):
+            tx = self.deposit()
+
+        self.assertNotEqual(tx.reference, taken)
+        self.assertRegex(tx.reference, ReferenceFormatTests.pattern)
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertEqual(tx.history.count(), 1)
+
+    def test_other_integrity_errors_are_raised(self):
+        tx = self.deposit()
+
+        with self.assertRaises(IntegrityError):
+            Transaction(
+                pk=tx.pk,
+                category=TxCategory.DEPOSIT,
+                method=TxMethod.WIRE,
+                amount=Decimal("1.00"),
+            ).save(force_insert=True)
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email="saver@example.com", username="saver", password="password"
+        )
+        self.account = Account.objects.create(
+            user=user,
+            account_name="Saver",
+            checking_acc_number="70000000001",
+            savings_acc_number="80000000001",
+            account_pin="1234",
+            checking_balance=Decimal("100.00"),
+        )
+        tx = Transaction.objects.create(
+            category=TxCategory.DEPOSIT,
+            method=TxMethod.WIRE,
+            account_type="checking",
+            amount=Decimal("50.00"),
+            destination_account=self.account,
+            initiated_by=user,
+        )
+        post_entries(
+            tx,
+            [
+                (self.account, "checking", LedgerDirection.CREDIT, Decimal("50.00")),
+                (self.account, "checking", LedgerDirection.DEBIT, Decimal("30.00")),
+                (self.account, "savings", LedgerDirection.CREDIT, Decimal("5.00")),
+            ],
+        )
+
+    def balances(self):
+        self.account.refresh_from_db()
+        return self.account.checking_balance, self.account.savings_balance
+
+    def test_available_balance_counts_pending_legs(self):
+        # Posting leaves the snapshot alone
+        self.assertEqual(self.balances(), (Decimal("100.00"), Decimal("0.00")))
+        self.assertEqual(available_balance(self.account, "checking"), Decimal("120.00"))
+        self.assertEqual(available_balance(self.account, "savings"), Decimal("5.00"))
+        self.assertEqual(
+            available_balances(
+                [(self.account.pk, "checking"), (self.account.pk, "savings")]
+            ),
+            {
+                (self.account.pk, "checking"): Decimal("120.00"),
+                (self.account.pk, "savings"): Decimal("5.00"),
+            },
+        )
+
+    def test_roll_up_folds_pending_legs_once(self):
+        self.assertEqual(roll_up(), 3)
+        self.assertEqual(self.balances(), (Decimal("120.00"), Decimal("5.00")))
+        self.assertFalse(LedgerEntry.objects.filter(rolled_up=False).exists())
+
+        self.assertEqual(roll_up(), 0)
+        self.assertEqual(roll_up([self.account.pk]), 0)
+        self.assertEqual(self.balances(), (Decimal("120.00"), Decimal("5.00")))
+        self.assertEqual(available_balance(self.account, "checking"), Decimal("120.00"))
@@ -1,6 +1,7 @@
 from django.urls import path
 
 from apps.transactions.apis import (
+    BatchTransferView,
     DepositView,
     TransactionInformationView,
     TransferView,
@@ -24,4 +25,5 @@ urlpatterns = [
         name="user transaction history",
     ),
     path("transaction/transfer/", TransferView.as_view()),
+    path("transaction/transfer/batch/", BatchTransferView.as_view()),
 ]
@@ -1,4 +1,6 @@
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
 
 
 from django.forms import ValidationError
@@ -27,6 +29,11 @@ from .serializers import (
 )
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from apps.accounts.service.profile_cache_service import (
+    get_profile,
+    stats as profile_cache_stats,
+)
+
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = UserLoginSerializer
@@ -175,13 +182,31 @@ class PasswordChangeView(UpdateAPIView):
 class UserDetailsAPIView(RetrieveAPIView):
     """
     GET /api/user/me
-    Returns the authenticated user's details with account and kyc status
+    Returns the authenticated user's details with account and kyc status.
+
+    Served from the Redis profile cache: the token is verified without a
+    User query, so a cache hit does not touch the database at all.
     """
 
     serializer_class = UserDetailsSerializer
     permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTStatelessUserAuthentication]
 
-    def get_object(self):
-        # Always return the logged-in user
-        return self.request.user
+    def retrieve(self, request, *args, **kwargs):
+        doc = get_profile(request.user.id)
+        if doc is None or not doc["is_active"]:
+            raise AuthenticationFailed("User not found or inactive")
+        return Response(doc["data"])
+
+
+class ProfileCacheStatsAPIView(APIView):
+    """
+    GET /api/user/me/cache-stats/
+    Hit/miss counters of the profile cache (staff only).
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(profile_cache_stats())
 
@@ -1,6 +1,7 @@
-import random
 import json
 
+from django.db import transaction
+
 from rest_framework.exceptions import ValidationError
 from rest_framework import serializers
 from cortanae.generic_utils.account_verification import verification_mail
@@ -12,6 +13,8 @@ from rest_framework_simplejwt.tokens import Token
 from typing import Union
 from apps.accounts.models import Account
 from apps.accounts.serializers import AccountSerializer
+from apps.accounts.service.account_number_service import claim_numbers
+from apps.accounts.service.profile_cache_service import get_profile
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -65,36 +68,23 @@ class UserRegisterSerializer(serializers.ModelSerializer):
 
         return attrs
 
-    def _generate_account_number(self):
-        """Generate a unique 11-digit account number."""
-        while True:
-            account_number = str(random.randint(10**10, (10**11) - 1))
-            if (
-                not Account.objects.filter(
-                    checking_acc_number=account_number
-                ).exists()
-                and not Account.objects.filter(
-                    savings_acc_number=account_number
-                ).exists()
-            ):
-                return account_number
-
     def create(self, validated_data):
         email = validated_data.pop("email").lower()
         account_pin = validated_data.pop("account_pin")
         validated_data["email"] = email
 
-        checking_acc_number = self._generate_account_number()
-        savings_acc_number = self._generate_account_number()
-
-        user = User.objects.create_user(**validated_data)
-        Account.objects.create(
-            user=user,
-            account_name=user.full_name,
-            account_pin=account_pin,
-            savings_acc_number=savings_acc_number,
-            checking_acc_number=checking_acc_number,
-        )
+        with transaction.atomic():
+            # Pre-generated, Luhn-checked numbers; no collision probing
+            checking_acc_number, savings_acc_number = claim_numbers(2)
+
+            user = User.objects.create_user(**validated_data)
+            Account.objects.create(
+                user=user,
+                account_name=user.full_name,
+                account_pin=account_pin,
+                savings_acc_number=savings_acc_number,
+                checking_acc_number=checking_acc_number,
+            )
 
         return user
 
@@ -228,13 +218,11 @@ class UserLoginSerializer(TokenObtainPairSerializer):
         # Attach serialized user data
         data["user"] = UserInfoSerializer(user).data
 
-        if hasattr(user, "user_accounts") and user.user_accounts:
-            data["account"] = AccountSerializer(user.user_accounts).data
-
-        if hasattr(user, "kyc_profile") and user.kyc_profile:
-            data["kyc_status"] = getattr(user.kyc_profile, "status", None)
-        else:
-            data["kyc_status"] = None
+        # Account + KYC from the profile cache (warms it for /user/me/ polls)
+        profile = get_profile(user.pk)["data"]
+        if profile.get("account"):
+            data["account"] = profile["account"]
+        data["kyc_status"] = profile.get("kyc_status")
         return data
 
     @classmethod
@@ -4,6 +4,13 @@ from django.dispatch import receiver
 
 from cortanae.generic_utils.account_verification import verification_mail
 from .models import TokenValidator, User
+from apps.accounts.service.profile_cache_service import invalidate_profiles
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_profile(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_profiles([instance.pk])
 
 
 @receiver(post_save, sender=User)
@@ -8,6 +8,7 @@ from .apis import (
     RegisterAPIView,
     VerifyAccount,
     UserDetailsAPIView,
+    ProfileCacheStatsAPIView,
 )
 
 urlpatterns = [
@@ -19,4 +20,9 @@ urlpatterns = [
     path("update-password/", PasswordChangeView.as_view()),
     path("verify-account/", VerifyAccount.as_view()),
     path("user/me/", UserDetailsAPIView.as_view(), name="user_details_api"),
+    path(
+        "user/me/cache-stats/",
+        ProfileCacheStatsAPIView.as_view(),
+        name="profile_cache_stats",
+    ),
 ]
@@ -46,6 +46,7 @@ from channels.security.websocket import AllowedHostsOriginValidator
 
 import apps.chat.routing as chat_routing
 import apps.notifications.routing as notification_routing
+from apps.chat.service.message_buffer import chat_buffer
 from cortanae.channels_jwt import JWTAuthMiddlewareStack
 
 
@@ -66,10 +67,23 @@ ws_app = JWTAuthMiddlewareStack(URLRouter(ws_urlpatterns))
 #     ws_app = AllowedHostsOriginValidator(ws_app)
 #     print("[ASGI] AllowedHostsOriginValidator enabled.")
 
+async def lifespan_app(scope, receive, send):
+    """Servers that speak ASGI lifespan (uvicorn) drain the chat buffer on shutdown."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await chat_buffer.drain()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
         "websocket": ws_app,
+        "lifespan": lifespan_app,
     }
 )
 
@@ -1,60 +1,179 @@
-from typing import Any
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterable
 
 from django.conf import settings
-from django.core.mail import send_mail, send_mass_mail, get_connection
-from django.template.loader import render_to_string
-import traceback
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+from cortanae.generic_utils.template_utils import prepare, render
 
 
 class Mailer:
     """
     class to handle sending of mails
+
+    SMTP sessions are pooled per sender and reused across sends; a session
+    that sat idle is NOOP-checked before use and replaced if the server
+    dropped it.
     """
 
     def __init__(self):
         self.sender = settings.DEFAULT_FROM_EMAIL
         self.password = settings.EMAIL_HOST_PASSWORD
+        self._pools: dict[str, queue.LifoQueue] = {}
+        self._pools_lock = threading.Lock()
 
     def reset_connection(self, username, password):
         if not username:
             username = self.sender
         if not password:
             password = self.password
-        print(username, password)
-        connection = get_connection(
+        return get_connection(
             backend=settings.EMAIL_BACKEND,
-            host=settings.EMAIL_HOST,
-            port=settings.EMAIL_PORT,
+            host=getattr(settings, "EMAIL_HOST", None),
+            port=getattr(settings, "EMAIL_PORT", None),
             username=username,
             password=password,
+            timeout=settings.EMAIL_TIMEOUT,
         )
-        print(connection)
-        return connection
 
-    def _create_message(self, template, content: dict[str, Any]) -> str:
-        """_summary_
+    # -------- Connection pool --------
+    def _pool(self, sender: str) -> queue.LifoQueue:
+        with self._pools_lock:
+            if sender not in self._pools:
+                self._pools[sender] = queue.LifoQueue(maxsize=settings.EMAIL_POOL_SIZE)
+            return self._pools[sender]
+
+    @staticmethod
+    def _healthy(connection, last_used: float) -> bool:
+        # Non-SMTP backends (console, locmem) have no session to go stale
+        if not hasattr(connection, "connection"):
+            return True
+        if connection.connection is None:
+            return False
+        if time.monotonic() - last_used < settings.EMAIL_HEALTHCHECK_SECONDS:
+            return True
+        try:
+            return connection.connection.noop()[0] == 250
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(connection) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self, sender: str = "", password: str = ""):
+        """Check an open session for `sender` out of the pool."""
+        sender = sender or self.sender
+        pool = self._pool(sender)
+        connection = None
+        try:
+            connection, last_used = pool.get_nowait()
+            if not self._healthy(connection, last_used):
+                self._close(connection)
+                connection = None
+        except queue.Empty:
+            pass
+        if connection is None:
+            connection = self.reset_connection(sender, password)
+        # Opened here so send_messages() leaves the session open afterwards
+        connection.open()
+        try:
+            yield connection
+        except Exception:
+            self._close(connection)
+            raise
+        else:
+            try:
+                pool.put_nowait((connection, time.monotonic()))
+            except queue.Full:
+                self._close(connection)
 
-        Args:
-                template (_type_): _description_
-                content (dict[str, Any]): _description_
+    def close(self) -> None:
+        """Close every pooled session (e.g. on worker shutdown)."""
+        with self._pools_lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            while True:
+                try:
+                    connection, _ = pool.get_nowait()
+                except queue.Empty:
+                    break
+                self._close(connection)
 
-        Returns:
-                str: _description_
+    def _create_message(self, template, content: dict[str, Any]) -> str | None:
+        """
+        Render `template` (name with or without ".html") with `content`.
+        Returns None if it cannot be rendered; the plain-text body still goes out.
         """
-        print(content)
         if not content:
             raise ValueError("No content provided")
         if not template:
             raise ValueError("No template provided")
-        if template:
-            print("this is the template: ", template)
-            try:
-                data = render_to_string(template, content)
-                print("generated data", data)
-                return data
-            except Exception as e:
-                print("this is the error message", e)
-                traceback.print_exc()
+        try:
+            return render(template, content)
+        except Exception as e:
+            # Name and error only: the context holds customer data
+            print(f"[MAIL] Template render failed • template={template} • {e}")
+            return None
+
+    def build_message(
+        self,
+        title: str,
+        recipient: str,
+        html: str | None,
+        sender: str = "",
+        message: str = "",
+    ) -> EmailMultiAlternatives:
+        mail = EmailMultiAlternatives(
+            subject=title,
+            body=message,
+            from_email=sender or self.sender,
+            to=[recipient],
+        )
+        if html:
+            mail.attach_alternative(html, "text/html")
+        return mail
+
+    def send_messages(
+        self,
+        messages: Iterable[EmailMultiAlternatives],
+        sender: str = "",
+        password: str = "",
+    ) -> int:
+        """
+        Send over pooled sessions, EMAIL_BATCH_SIZE messages per checkout.
+        A message whose session drops is retried once on a fresh session.
+        Returns how many were sent.
+        """
+        messages = list(messages)
+        batch_size = settings.EMAIL_BATCH_SIZE
+        sent = 0
+        for start in range(0, len(messages), batch_size):
+            pending = messages[start : start + batch_size]
+            for attempt in range(2):
+                try:
+                    with self.connection(sender, password) as connection:
+                        while pending:
+                            # One at a time so a dropped session is retried
+                            # from the failed message, not the whole batch
+                            try:
+                                sent += connection.send_messages(pending[:1]) or 0
+                            except smtplib.SMTPRecipientsRefused as e:
+                                print(f"[MAIL] Recipient refused • {pending[0].to} • {e}")
+                            pending = pending[1:]
+                    break
+                except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError):
+                    if attempt:
+                        raise
+        return sent
 
     def mail_send(
         self,
@@ -67,21 +186,11 @@ class Mailer:
         password: str = "",
     ) -> None:
         try:
-            print("sending....", type(content))
-            content = self._create_message(template, content)
-            print(content)
-            if not sender:
-                sender = self.sender
-            if not password:
-                password = self.password
-            email_connection = self.reset_connection(sender, password)
-            send_mail(
-                title,
-                message,
-                from_email=sender,
-                recipient_list=[recipient],
-                html_message=content,
-                fail_silently=False,
+            html = self._create_message(template, content)
+            self.send_messages(
+                [self.build_message(title, recipient, html, sender, message)],
+                sender,
+                password,
             )
         except Exception as e:
             # log the error somewhere
@@ -96,19 +205,33 @@ class Mailer:
         template: str,
         sender: str = "",
         message: str = "",
-    ) -> None:
+        password: str = "",
+        slots: list[dict[str, Any]] | None = None,
+    ) -> int | Exception:
+        """
+        One message per recipient so addresses are not disclosed to each
+        other. The layout is rendered once from `content`; `slots`, if given,
+        holds each recipient's own values (e.g. {"user": user}) in the same
+        order as `recipients`, and only those are filled in per message.
+        """
         try:
-            content = self._create_message(template, content)
-            if sender is None:
-                sender = self.sender
-            send_mass_mail(
-                title,
-                message,
-                sender,
-                recipients,
-                html_content=content,
-            )
+            if not slots:
+                html = self._create_message(template, content)
+                messages = (
+                    self.build_message(title, recipient, html, sender, message)
+                    for recipient in recipients
+                )
+            else:
+                prepared = prepare(template, content, slots[0].keys())
+                messages = (
+                    self.build_message(
+                        title, recipient, prepared.render(values), sender, message
+                    )
+                    for recipient, values in zip(recipients, slots)
+                )
+            return self.send_messages(messages, sender, password)
         except Exception as e:
+            print(e)
             return e
 
 
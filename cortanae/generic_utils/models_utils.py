@@ -1,3 +1,4 @@
+import copy
 import uuid
 
 from django.db import models
@@ -32,6 +33,74 @@ class BaseModelMixin(UUIDPrimaryKeyModelMixin, TimestampModelMixin):
         abstract = True
 
 
+class TrackedFieldsMixin(models.Model):
+    """
+    Remembers the values a row was loaded (or last saved) with, so callers
+    can tell what changed without querying the row again.
+
+    Set `tracked_fields` to a tuple of field names to limit tracking;
+    by default every concrete field is tracked. Deferred fields are not
+    snapshotted until they are loaded. New, unsaved instances report no
+    changes: check `created`/`_state.adding` for those.
+    """
+
+    tracked_fields: tuple[str, ...] | None = None
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def _tracked_attnames(cls) -> dict[str, str]:
+        """Map of field name -> attname (``account`` -> ``account_id``)."""
+        fields = cls._meta.concrete_fields
+        if cls.tracked_fields is not None:
+            fields = [cls._meta.get_field(name) for name in cls.tracked_fields]
+        return {field.name: field.attname for field in fields}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked()
+        return instance
+
+    def _snapshot_tracked(self, fields=None):
+        # Read __dict__ directly so deferred fields are never fetched.
+        if not hasattr(self, "_tracked_snapshot"):
+            self._tracked_snapshot = {}
+        for name, attname in self._tracked_attnames().items():
+            if fields is not None and name not in fields and attname not in fields:
+                continue
+            if attname in self.__dict__:
+                self._tracked_snapshot[name] = copy.deepcopy(self.__dict__[attname])
+
+    def previous(self, field: str):
+        """Value of `field` when the row was loaded/last saved (None if unknown)."""
+        return getattr(self, "_tracked_snapshot", {}).get(field)
+
+    def has_changed(self, field: str) -> bool:
+        return field in self.changed_fields
+
+    @property
+    def changed_fields(self) -> dict:
+        """{field name: previous value} for every tracked field that changed."""
+        snapshot = getattr(self, "_tracked_snapshot", {})
+        attnames = self._tracked_attnames()
+        return {
+            name: old
+            for name, old in snapshot.items()
+            if self.__dict__.get(attnames[name]) != old
+        }
+
+    def save(self, *args, **kwargs):
+        # post_save receivers still see the pre-save snapshot.
+        super().save(*args, **kwargs)
+        self._snapshot_tracked(kwargs.get("update_fields"))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot_tracked(fields)
+
+
 class ActiveInactiveModelMixin(models.Model):
     is_active = models.BooleanField(default=True)
 
@@ -1,5 +1,174 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
 
 class CustomLimitOffsetPagination(pagination.LimitOffsetPagination):
     default_limit = 40
     max_limit = 100
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Forward-only keyset pagination on (ordering_field, id), newest first.
+
+    Each page is one indexed range scan: ``WHERE (created_at, id) < cursor
+    ORDER BY created_at DESC, id DESC LIMIT n + 1``. There is no COUNT and
+    no OFFSET, so page N costs the same as page 1. The cursor is an opaque
+    base64 token; clients only pass back the `next` link.
+    """
+
+    ordering_field = "created_at"
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, obj, field: str | None = None) -> str:
+        raw = json.dumps([getattr(obj, field or self.ordering_field).isoformat(), str(obj.pk)])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request, param: str | None = None):
+        token = request.query_params.get(param or self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            value, pk = json.loads(base64.urlsafe_b64decode(padded).decode())
+            value = datetime.fromisoformat(value)
+            if timezone.is_naive(value):
+                raise ValueError("cursor timestamp has no timezone")
+            # Primary keys are UUIDs; anything else would only fail later,
+            # inside the query
+            return value, uuid.UUID(pk)
+        except (TypeError, ValueError, AttributeError, UnicodeDecodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        field = self.ordering_field
+        queryset = queryset.order_by(f"-{field}", "-pk")
+        if position is not None:
+            value, pk = position
+            queryset = queryset.filter(
+                Q(**{f"{field}__lt": value}) | Q(**{field: value, "pk__lt": pk})
+            )
+
+        rows = list(queryset[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class InboxPagination(KeysetPagination):
+    """Chat rooms by most recent activity."""
+
+    ordering_field = "last_message_at"
+    page_size = 30
+
+
+class ChatHistoryPagination(KeysetPagination):
+    """
+    Keyset pagination over a room's messages.
+
+    Without `since`, pages walk back from the newest message on (date, id)
+    (`next` loads older ones); each page is returned oldest first for
+    display. The newest page's `latest` marks the room's most recent write
+    (older pages have none): passing it back as `since=<latest>` returns
+    only messages written after it, on (stored_at, id), so a reconnecting
+    client fetches the delta instead of the whole history. Deltas follow
+    write order rather than `date` because a buffered message can be
+    written after newer ones.
+    """
+
+    ordering_field = "date"
+    delta_field = "stored_at"
+    page_size = 50
+    max_page_size = 200
+    since_query_param = "since"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.since = request.query_params.get(self.since_query_param)
+        position = self.decode_cursor(request, self.since_query_param)
+        if position is None:
+            self.since = None
+            self.latest = None
+            # Only the newest page hands out `latest`: a client that is
+            # scrolling back already has it
+            if not request.query_params.get(self.cursor_query_param):
+                newest = queryset.order_by(f"-{self.delta_field}", "-pk").only("pk", self.delta_field).first()
+                self.latest = self.encode_cursor(newest, self.delta_field) if newest else None
+            return super().paginate_queryset(queryset, request, view)[::-1]
+
+        self.page_size = self.get_page_size(request)
+        field = self.delta_field
+        value, pk = position
+        queryset = queryset.order_by(field, "pk").filter(
+            Q(**{f"{field}__gt": value}) | Q(**{field: value, "pk__gt": pk})
+        )
+        rows = list(queryset[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        self.latest = self.encode_cursor(self.page[-1], field) if self.page else self.since
+        return self.page
+
+    def get_next_link(self):
+        if self.since is None:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(
+            url, self.since_query_param, self.encode_cursor(self.page[-1], self.delta_field)
+        )
+
+    def get_latest_cursor(self) -> str | None:
+        """`since` value for the client's next delta fetch."""
+        return self.latest
+
+    def get_paginated_response(self, data):
+        return Response(
+            {"next": self.get_next_link(), "latest": self.get_latest_cursor(), "results": data}
+        )
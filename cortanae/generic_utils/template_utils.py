@@ -0,0 +1,185 @@
+"""
+Email template rendering.
+
+Templates are compiled once per process and rendered with only the context
+keys they reference, without context processors. A template using a tag
+the scan does not follow ({% for %}, {% with %}, {% include %}, ...) gets
+the whole context instead. For one layout sent to many people, prepare()
+renders the shared parts once and leaves markers where the per-recipient
+values ("slots") go.
+"""
+import re
+import secrets
+import threading
+from typing import Any, Iterable
+
+from django.template import engines
+from django.template.base import Lexer, TokenType
+from django.utils.html import conditional_escape
+
+TEMPLATE_SUFFIX = ".html"
+
+# Tags whose arguments _scan() collects as context variables
+_SCANNED_TAGS = {"if", "elif", "static"}
+# Tags that read no context variables
+_PLAIN_TAGS = {"else", "endif", "load", "comment", "endcomment", "csrf_token"}
+# Words in {% if %} / {% elif %} tags that are not context variables
+_IF_KEYWORDS = {"if", "elif", "and", "or", "not", "in", "is", "None", "True", "False"}
+_IDENTIFIER = re.compile(r"^[A-Za-z_]\w*")
+
+_cache: dict[str, "CompiledTemplate"] = {}
+_cache_lock = threading.Lock()
+
+
+def normalize_name(name: str) -> str:
+    """Callers pass "deposit_successful"; the file is deposit_successful.html."""
+    if not name:
+        raise ValueError("No template provided")
+    return name if name.endswith(TEMPLATE_SUFFIX) else f"{name}{TEMPLATE_SUFFIX}"
+
+
+def _root(expression: str) -> str | None:
+    match = _IDENTIFIER.match(expression.strip())
+    return match.group(0) if match else None
+
+
+class CompiledTemplate:
+    def __init__(self, name: str):
+        self.name = name
+        self.template = engines["django"].get_template(name)
+        self.names: set[str] = set()  # every root variable the template reads
+        self.filtered: set[str] = set()  # roots used with a filter or in a tag
+        # A tag the scan cannot follow (loops, {% with %}, other files):
+        # render with the whole context
+        self.reads_all = False
+        self._scan(self.template.template.source)
+
+    def _scan(self, source: str) -> None:
+        for token in Lexer(source).tokenize():
+            if token.token_type == TokenType.VAR:
+                expression, *filters = token.contents.split("|")
+                root = _root(expression)
+                if root:
+                    self.names.add(root)
+                    if filters:
+                        self.filtered.add(root)
+                # Filter arguments can be variables too (default:user.username)
+                for f in filters:
+                    _, _, arg = f.partition(":")
+                    arg_root = _root(arg) if arg and arg[0] not in "\"'" else None
+                    if arg_root:
+                        self.names.add(arg_root)
+                        self.filtered.add(arg_root)
+            elif token.token_type == TokenType.BLOCK:
+                bits = token.split_contents()
+                if not bits or bits[0] in _PLAIN_TAGS:
+                    continue
+                if bits[0] not in _SCANNED_TAGS:
+                    self.reads_all = True
+                    return
+                for bit in bits[1:]:
+                    root = _root(bit) if bit[0] not in "\"'" else None
+                    if root and root not in _IF_KEYWORDS:
+                        self.names.add(root)
+                        self.filtered.add(root)
+
+    def context(self, content: dict[str, Any]) -> dict[str, Any]:
+        """Only the keys this template reads."""
+        if self.reads_all:
+            return content
+        return {key: value for key, value in content.items() if key in self.names}
+
+    def render(self, content: dict[str, Any]) -> str:
+        return self.template.render(self.context(content))
+
+
+def get_template(name: str) -> CompiledTemplate:
+    name = normalize_name(name)
+    compiled = _cache.get(name)
+    if compiled is None:
+        with _cache_lock:
+            compiled = _cache.get(name)
+            if compiled is None:
+                compiled = _cache[name] = CompiledTemplate(name)
+    return compiled
+
+
+def clear_cache() -> None:
+    """Forget compiled templates (e.g. after editing them in development)."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def render(name: str, content: dict[str, Any]) -> str:
+    if not content:
+        raise ValueError("No content provided")
+    return get_template(name).render(content)
+
+
+class _Slot:
+    """Stands in for a slot value during pre-rendering; prints as a marker."""
+
+    def __init__(self, token: str, path: str):
+        self._token = token
+        self._path = path
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return _Slot(self._token, f"{self._path}.{attr}")
+
+    def __str__(self):
+        return f"\x00{self._token}:{self._path}\x00"
+
+    __html__ = __str__
+
+
+def _resolve(slots: dict[str, Any], path: str) -> Any:
+    root, *attrs = path.split(".")
+    value = slots.get(root, "")
+    for attr in attrs:
+        if isinstance(value, dict):
+            value = value.get(attr, "")
+        else:
+            value = getattr(value, attr, "")
+        if callable(value):
+            value = value()
+    return value
+
+
+class PreparedTemplate:
+    """
+    A template rendered once with the shared context. render(slots) only
+    substitutes the per-recipient values, which costs a string scan instead
+    of a template render.
+    """
+
+    def __init__(self, name: str, shared: dict[str, Any], slot_names: Iterable[str]):
+        self.compiled = get_template(name)
+        self.shared = shared
+        slot_names = set(slot_names)
+        # A slot that feeds a filter or an {% if %} changes the markup around
+        # it, so a marker cannot stand in for it: render those in full. So
+        # do templates whose tags the scan does not follow.
+        self.full_render = self.compiled.reads_all or bool(
+            slot_names & self.compiled.filtered
+        )
+        self.html = None
+        if not self.full_render:
+            token = secrets.token_hex(4)
+            context = dict(shared)
+            context.update({slot: _Slot(token, slot) for slot in slot_names})
+            self.html = self.compiled.render(context)
+            self._marker = re.compile(f"\x00{token}:([\\w.]+)\x00")
+
+    def render(self, slots: dict[str, Any]) -> str:
+        if self.full_render:
+            return self.compiled.render({**self.shared, **slots})
+        return self._marker.sub(
+            lambda m: str(conditional_escape(_resolve(slots, m.group(1)))),
+            self.html,
+        )
+
+
+def prepare(name: str, shared: dict[str, Any], slot_names: Iterable[str]) -> PreparedTemplate:
+    return PreparedTemplate(name, shared, slot_names)
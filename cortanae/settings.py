@@ -35,6 +35,77 @@ ALLOWED_HOSTS = config("ALLOWED_HOSTS").split(",")
 
 TOKEN_EXPIRY_MINUTES = 60
 
+# Upper bound on items accepted by POST /api/transaction/transfer/batch/
+BATCH_TRANSFER_MAX_ITEMS = config("BATCH_TRANSFER_MAX_ITEMS", default=500, cast=int)
+
+# Rows locked and updated per statement by the bulk status transition service
+BULK_TRANSITION_BATCH_SIZE = config("BULK_TRANSITION_BATCH_SIZE", default=500, cast=int)
+
+# Transactional outbox drained by `manage.py process_outbox`
+OUTBOX_WORKERS = config("OUTBOX_WORKERS", default=4, cast=int)
+OUTBOX_BATCH_SIZE = config("OUTBOX_BATCH_SIZE", default=100, cast=int)
+OUTBOX_MAX_ATTEMPTS = config("OUTBOX_MAX_ATTEMPTS", default=5, cast=int)
+OUTBOX_LEASE_SECONDS = config("OUTBOX_LEASE_SECONDS", default=60, cast=int)
+OUTBOX_POLL_INTERVAL = config("OUTBOX_POLL_INTERVAL", default=1.0, cast=float)
+
+# Admin bulk actions run as jobs by `manage.py run_admin_jobs`
+ADMIN_JOB_CHUNK_SIZE = config("ADMIN_JOB_CHUNK_SIZE", default=200, cast=int)
+ADMIN_JOB_POLL_INTERVAL = config("ADMIN_JOB_POLL_INTERVAL", default=1.0, cast=float)
+# A running job with no progress for this long is taken over by another worker
+ADMIN_JOB_STALE_SECONDS = config("ADMIN_JOB_STALE_SECONDS", default=300, cast=int)
+
+# Mailer keeps up to this many open SMTP sessions per sender
+EMAIL_POOL_SIZE = config("EMAIL_POOL_SIZE", default=4, cast=int)
+# Messages sent per session checkout by Mailer.send_messages / mail_send_bulk
+EMAIL_BATCH_SIZE = config("EMAIL_BATCH_SIZE", default=100, cast=int)
+# A pooled session idle for longer than this is NOOP-checked before reuse
+EMAIL_HEALTHCHECK_SECONDS = config("EMAIL_HEALTHCHECK_SECONDS", default=30, cast=int)
+EMAIL_TIMEOUT = config("EMAIL_TIMEOUT", default=10, cast=int)
+
+# FCM push: overrides the messages:send URL (e.g. a local stub server)
+FCM_ENDPOINT = config("FCM_ENDPOINT", default="")
+# Concurrent sends (and pooled HTTPS connections) per process
+FCM_PUSH_WORKERS = config("FCM_PUSH_WORKERS", default=8, cast=int)
+# Send pushes from a background pool; disable to send inline
+FCM_PUSH_ASYNC = config("FCM_PUSH_ASYNC", default=True, cast=bool)
+FCM_TIMEOUT = config("FCM_TIMEOUT", default=5, cast=int)
+# FCM topic for everyone-broadcasts, sent in one request. Only set it once
+# the apps subscribe to it: the server does not subscribe tokens. Empty
+# sends broadcasts to every registered token instead.
+FCM_BROADCAST_TOPIC = config("FCM_BROADCAST_TOPIC", default="")
+# Notification rows inserted per statement by broadcasts
+NOTIFICATION_BROADCAST_CHUNK_SIZE = config(
+    "NOTIFICATION_BROADCAST_CHUNK_SIZE", default=2000, cast=int
+)
+# Chat write-behind: messages are broadcast at once and bulk-inserted
+# every CHAT_BUFFER_MAX_MESSAGES messages or CHAT_BUFFER_FLUSH_MS ms.
+# Off by default: buffered messages are lost if the process is killed.
+CHAT_WRITE_BEHIND = config("CHAT_WRITE_BEHIND", default=False, cast=bool)
+CHAT_BUFFER_MAX_MESSAGES = config("CHAT_BUFFER_MAX_MESSAGES", default=50, cast=int)
+CHAT_BUFFER_FLUSH_MS = config("CHAT_BUFFER_FLUSH_MS", default=100, cast=int)
+
+# Node component of transaction references (0..1048575). Give every process
+# that writes transactions its own id; unset draws a random one per process.
+# Processes that end up sharing an id retry the insert with a fresh reference.
+REFERENCE_NODE_ID = config("REFERENCE_NODE_ID", default=None, cast=lambda v: None if v in (None, "") else int(v))
+
+# How long a stored Idempotency-Key response is replayed for
+IDEMPOTENCY_KEY_TTL_HOURS = config("IDEMPOTENCY_KEY_TTL_HOURS", default=24, cast=int)
+# How long an in-flight request holds its key; a retry after that (the
+# first request crashed) takes the key over instead of getting 409
+IDEMPOTENCY_LEASE_SECONDS = config("IDEMPOTENCY_LEASE_SECONDS", default=60, cast=int)
+
+# Account PINs: dedicated hasher, bounded hashing pool and lockout
+ACCOUNT_PIN_HASHER = config("ACCOUNT_PIN_HASHER", default="pin_pbkdf2_sha256")
+ACCOUNT_PIN_HASH_ITERATIONS = config("ACCOUNT_PIN_HASH_ITERATIONS", default=60000, cast=int)
+PIN_HASH_WORKERS = config("PIN_HASH_WORKERS", default=4, cast=int)
+PIN_VERIFY_CACHE_SECONDS = config("PIN_VERIFY_CACHE_SECONDS", default=60, cast=int)
+ACCOUNT_PIN_MAX_ATTEMPTS = config("ACCOUNT_PIN_MAX_ATTEMPTS", default=5, cast=int)
+ACCOUNT_PIN_LOCKOUT_MINUTES = config("ACCOUNT_PIN_LOCKOUT_MINUTES", default=15, cast=int)
+
+# Free, pre-generated account numbers kept by `manage.py replenish_account_numbers`
+ACCOUNT_NUMBER_POOL_SIZE = config("ACCOUNT_NUMBER_POOL_SIZE", default=1000, cast=int)
+
 # Application definition
 
 
@@ -70,6 +141,7 @@ LOCAL_APPS = [
     "apps.accounts.apps.AccountsConfig",
     "apps.transactions.apps.TransactionsConfig",
     "apps.chat.apps.ChatConfig",
+    "apps.jobs.apps.JobsConfig",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -152,6 +224,16 @@ else:
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+    # Account PINs only (see ACCOUNT_PIN_HASHER)
+    "apps.accounts.hashers.PinPBKDF2PasswordHasher",
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -253,3 +335,18 @@ CHANNEL_LAYERS = {
         "CONFIG": {"hosts": [("127.0.0.1", 6379)]},
     }
 }
+
+# Same Redis as the channel layer, separate logical database
+REDIS_URL = config("REDIS_URL", default="redis://127.0.0.1:6379/1")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "cortanae",
+        "OPTIONS": {"socket_connect_timeout": 0.25, "socket_timeout": 0.25},
+    }
+}
+
+# Seconds a cached /api/user/me/ profile document lives without a write
+PROFILE_CACHE_TTL = config("PROFILE_CACHE_TTL", default=300, cast=int)